@@ -0,0 +1,81 @@
+from collections import Counter
+from itertools import compress
+from typing import Any, Dict, Optional, Sequence
+
+# Profit is accumulated in integer micro-USDC so that adding and later removing
+# the same transaction leaves the running total exactly where it was.
+MICRO = 1_000_000
+
+
+def _to_micro(amount: float) -> int:
+    return int(round(amount * MICRO))
+
+
+class MEVAggregates:
+    """Running totals over the transactions currently held in a store"""
+
+    def __init__(self):
+        self.total_transactions = 0
+        self.mev_transactions = 0
+        self.mev_profit_micro = 0
+        self.patterns: Dict[str, int] = {}
+
+    def add(self, is_mev: bool, profit_usdc: float, pattern: Any):
+        self._apply(is_mev, profit_usdc, pattern, 1)
+
+    def add_all(self, is_mev: Sequence[bool], profits: Sequence[float], patterns: Sequence[Any]):
+        """add() for many records given column by column, e.g. a bulk load"""
+        mev_rows = list(compress(range(len(is_mev)), is_mev))
+        self.total_transactions += len(is_mev)
+        self.mev_transactions += len(mev_rows)
+        self.mev_profit_micro += sum(map(_to_micro, map(profits.__getitem__, mev_rows)))
+        for pattern, count in Counter(map(patterns.__getitem__, mev_rows)).items():
+            pattern = self._pattern_key(pattern)
+            if pattern:
+                self.patterns[pattern] = self.patterns.get(pattern, 0) + count
+
+    def remove(self, is_mev: bool, profit_usdc: float, pattern: Any):
+        self._apply(is_mev, profit_usdc, pattern, -1)
+
+    def _apply(self, is_mev: bool, profit_usdc: float, pattern: Any, sign: int):
+        self.total_transactions += sign
+        if not is_mev:
+            return
+        self.mev_transactions += sign
+        self.mev_profit_micro += sign * _to_micro(profit_usdc)
+        pattern = self._pattern_key(pattern)
+        if pattern:
+            count = self.patterns.get(pattern, 0) + sign
+            if count:
+                self.patterns[pattern] = count
+            else:
+                self.patterns.pop(pattern, None)
+
+    @staticmethod
+    def _pattern_key(pattern: Any) -> Optional[str]:
+        if pattern is None:
+            return None
+        return getattr(pattern, "value", pattern)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Stats in the /api/stats response shape"""
+        if self.total_transactions == 0:
+            return {
+                "total_transactions": 0,
+                "mev_transactions": 0,
+                "mev_percentage": 0,
+                "total_profit": 0,
+                "avg_profit": 0,
+                "patterns": {}
+            }
+
+        total_profit = self.mev_profit_micro / MICRO
+        avg_profit = total_profit / max(self.mev_transactions, 1)
+        return {
+            "total_transactions": self.total_transactions,
+            "mev_transactions": self.mev_transactions,
+            "mev_percentage": (self.mev_transactions / self.total_transactions) * 100,
+            "total_profit": round(total_profit, 4),
+            "avg_profit": round(avg_profit, 4),
+            "patterns": dict(self.patterns)
+        }
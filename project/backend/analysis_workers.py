@@ -0,0 +1,227 @@
+import asyncio
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple, Union
+import logging
+
+from mev_detector import MEVDetector
+from price_service import PriceService, StubPriceSource
+from transaction_decoder import TransactionDecoder
+
+logger = logging.getLogger(__name__)
+
+# Decoded fields worth sending back to the parent. The bulky instruction and
+# log arrays stay in the worker.
+COMPACT_FIELDS = (
+    "wallet", "path", "platforms", "input_token", "output_token",
+    "input_amount", "output_amount", "token_transfers"
+)
+
+# What decode_and_detect returns, instead of analyzing, when the worker's prices
+# are older than the task's version and the task didn't carry them
+PRICES_NEEDED = "prices_needed"
+
+# Per-process state, created by _init_worker
+_decoder: Optional[TransactionDecoder] = None
+_detector: Optional[MEVDetector] = None
+
+
+def _init_worker():
+    global _decoder, _detector
+    _decoder = TransactionDecoder()
+    _detector = MEVDetector(PriceService(StubPriceSource()))
+
+
+def _load_prices(price_version: int, prices: Optional[Dict[str, float]]) -> bool:
+    """Bring this process's prices up to `price_version`; False if that takes prices not sent.
+
+    Prices newer than the task's version are kept when none were sent.
+    """
+    if _decoder is None:
+        _init_worker()
+
+    prices_service = _detector.price_service
+    # The parent tracks use (AnalysisPool.analyze touches the mints), so this copy keeps no lookups
+    prices_service.forget_lookups()
+    if prices_service.version != price_version:
+        if prices is not None:
+            prices_service.load_snapshot(prices, price_version)
+        elif prices_service.version < price_version:
+            return False
+    return True
+
+
+def _result(tx_data: Dict[str, Any], decoded: Dict[str, Any],
+            analysis: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    summary = {
+        "slot": tx_data.get("slot", 0),
+        "blockTime": tx_data.get("blockTime"),
+        "transactionIndex": tx_data.get("transactionIndex"),
+        "meta": {"fee": (tx_data.get("meta") or {}).get("fee", 0)}
+    }
+    compact = {field: decoded.get(field) for field in COMPACT_FIELDS}
+    return summary, compact, analysis
+
+
+def decode_and_detect(payload: Union[bytes, str, Dict[Any, Any]],
+                      price_version: int,
+                      prices: Optional[Dict[str, float]] = None) -> Union[Optional[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]], str]:
+    """Worker entry point: decode and analyze one raw transaction.
+
+    `payload` is the getTransaction result, either as raw JSON bytes or already
+    parsed. Returns (summary, compact_decoded, analysis), where summary carries
+    the few raw fields MEVTransaction needs, or None if it can't be decoded.
+    `prices` may be left out while the worker is likely to have `price_version`
+    already; if it doesn't, PRICES_NEEDED is returned.
+    """
+    if not _load_prices(price_version, prices):
+        return PRICES_NEEDED
+
+    tx_data = json.loads(payload) if isinstance(payload, (bytes, str)) else payload
+    decoded = _decoder.decode_transaction(tx_data)
+    if not decoded:
+        return None
+    return _result(tx_data, decoded, _detector.analyze_transaction(decoded))
+
+
+def decode_and_detect_batch(payloads: List[Dict[Any, Any]],
+                            price_version: int,
+                            prices: Dict[str, float]) -> List[Optional[Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]]]:
+    """Like decode_and_detect for many parsed transactions, analyzed with MEVDetector.analyze_batch.
+
+    Returns one entry per payload, None where it couldn't be decoded.
+    """
+    _load_prices(price_version, prices)
+
+    decoded_txs = [_decoder.decode_transaction(tx_data) for tx_data in payloads]
+    analyses = iter(_detector.analyze_batch([decoded for decoded in decoded_txs if decoded]))
+    return [
+        _result(tx_data, decoded, next(analyses)) if decoded else None
+        for tx_data, decoded in zip(payloads, decoded_txs)
+    ]
+
+
+def split_response(body: bytes) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+    """Parse a raw JSON-RPC response body, keeping each object result as JSON bytes.
+
+    Run in a worker so that the parent only handles bytes: the parsed
+    responses are small (id, error, null results), and each result can be
+    passed on to decode_and_detect as is.
+    """
+    body = json.loads(body)
+    for response in body if isinstance(body, list) else [body]:
+        if isinstance(response, dict) and isinstance(response.get("result"), dict):
+            response["result"] = json.dumps(response["result"], separators=(",", ":")).encode()
+    return body
+
+
+class AnalysisPool:
+    """Runs decode + detect in a pool of worker processes.
+
+    Each call ships the raw transaction, ideally as the JSON bytes the RPC
+    returned (see split_response), to a worker and gets back a compact
+    result, so heavy blocks are spread across cores instead of stalling the
+    event loop. The price snapshot goes along with the first `processes`
+    tasks after the prices change, and otherwise only when the worker that
+    picked up a task reports its copy is out of date. If a worker dies (e.g.
+    killed for running out of memory), the executor is broken for good; its
+    pending tasks fail and a fresh one is started on the next call.
+    """
+
+    def __init__(self, processes: int, price_service: PriceService):
+        self.processes = processes
+        self.price_service = price_service
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.submitted = 0
+        self.failed = 0
+        self.restarts = 0
+        self.price_snapshots_sent = 0
+        self._snapshot_version = 0
+        self._snapshot_sends = 0
+
+    def start(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+            logger.info(f"Analysis process pool started with {self.processes} workers")
+
+    def _restart(self, executor: ProcessPoolExecutor):
+        """Drop a broken executor; start() builds a new one on the next call"""
+        # Every task pending on it fails, so only the first failure replaces it
+        if self._executor is not executor:
+            return
+        logger.error("Analysis worker process died; restarting the process pool")
+        executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self.restarts += 1
+        # New workers start without prices
+        self._snapshot_sends = self.processes
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def analyze(self, payload: Union[bytes, str, Dict[Any, Any]]):
+        """Decode and detect in a worker; same return shape as decode_and_detect"""
+        self.start()
+        self.submitted += 1
+        loop = asyncio.get_running_loop()
+        version = self.price_service.version
+        if version != self._snapshot_version:
+            self._snapshot_version = version
+            self._snapshot_sends = self.processes
+        prices = None
+        if self._snapshot_sends:
+            self._snapshot_sends -= 1
+            self.price_snapshots_sent += 1
+            prices = self.price_service.snapshot()
+        executor = self._executor
+        try:
+            result = await loop.run_in_executor(executor, decode_and_detect, payload, version, prices)
+            if result == PRICES_NEEDED:
+                self.price_snapshots_sent += 1
+                result = await loop.run_in_executor(
+                    executor,
+                    decode_and_detect,
+                    payload,
+                    self.price_service.version,
+                    self.price_service.snapshot()
+                )
+        except BrokenProcessPool as e:
+            self.failed += 1
+            logger.error(f"Error analyzing transaction in worker process: {e}")
+            self._restart(executor)
+            return None
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Error analyzing transaction in worker process: {e}")
+            return None
+        if result is not None:
+            # The worker priced these from its copy; keep them refreshed and from expiring here
+            self.price_service.touch(transfer["mint"] for transfer in result[1].get("token_transfers") or ())
+        return result
+
+    async def split_response(self, body: bytes) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """split_response in a worker"""
+        self.start()
+        executor = self._executor
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, split_response, body)
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "processes": self.processes,
+            "submitted": self.submitted,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "price_snapshots_sent": self.price_snapshots_sent
+        }
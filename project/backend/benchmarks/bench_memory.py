@@ -0,0 +1,107 @@
+"""Memory per retained transaction: MEVTransaction models vs the compact store.
+
+Records are built from a pool of synthetic transactions run through the real
+decoder and detector. Each record is re-created from JSON with a unique
+signature, so like records ingested live it owns its own strings. Sizes are
+measured with tracemalloc:
+
+- models: a list of MEVTransaction models (what the in-memory store held before)
+- columns: the same records in TransactionColumns
+- store: a full TransactionStore, i.e. columns plus the signature, filter and
+  profit indexes
+
+    python benchmarks/bench_memory.py --records 100000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from benchmarks import harness  # noqa: E402
+from benchmarks.synthetic import SyntheticTransactionGenerator  # noqa: E402
+from compact_records import TransactionColumns  # noqa: E402
+from mev_detector import MEVDetector  # noqa: E402
+from models import MEVTransaction  # noqa: E402
+from pipeline import build_mev_transaction  # noqa: E402
+from transaction_decoder import TransactionDecoder  # noqa: E402
+from transaction_store import TransactionStore  # noqa: E402
+from wire_format import b58encode  # noqa: E402
+
+
+def _pool(size: int, seed: int) -> List[str]:
+    """JSON of distinct analyzed transactions to cycle through"""
+    decoder = TransactionDecoder()
+    detector = MEVDetector()
+    pool = []
+    for tx_data in SyntheticTransactionGenerator(seed=seed).generate_many(size, encoding="jsonParsed"):
+        decoded = decoder.decode_transaction(tx_data)
+        if decoded:
+            tx = build_mev_transaction("", tx_data, decoded, detector.analyze_transaction(decoded))
+            pool.append(json.dumps(jsonable_encoder(tx)))
+    return pool
+
+
+def _records(pool: List[str], count: int) -> Iterator[MEVTransaction]:
+    for index in range(count):
+        fields = json.loads(pool[index % len(pool)])
+        fields["signature"] = b58encode(index.to_bytes(64, "big"))
+        yield MEVTransaction(**fields)
+
+
+def _measure(build: Callable[[], Any], records: int) -> Dict[str, Any]:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    retained = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del retained
+    return harness.result(elapsed, records, bytes_per_record=round(size / records, 1))
+
+
+def run(records: int, seed: int = 0, pool_size: int = 2000) -> Dict[str, Dict[str, Any]]:
+    pool = _pool(pool_size, seed)
+
+    def columns():
+        table = TransactionColumns(records)
+        for row, tx in enumerate(_records(pool, records)):
+            table.write(row, tx)
+        return table
+
+    def store():
+        transaction_store = TransactionStore(capacity=records)
+        for tx in _records(pool, records):
+            transaction_store.add(tx)
+        return transaction_store
+
+    return {
+        "memory.models": _measure(lambda: list(_records(pool, records)), records),
+        "memory.columns": _measure(columns, records),
+        "memory.store": _measure(store, records),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--pool-size", type=int, default=2000, help="Distinct synthetic transactions to cycle through")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = run(args.records, args.seed, args.pool_size)
+    for name, entry in results.items():
+        print(f"{name:<44} {entry['bytes_per_record']:12,.1f} bytes/record")
+
+
+if __name__ == "__main__":
+    main()
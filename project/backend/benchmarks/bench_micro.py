@@ -0,0 +1,161 @@
+"""Microbenchmarks of the per-transaction hot paths.
+
+Covers TransactionDecoder.decode_transaction (both encodings) and
+_extract_token_transfers, MEVDetector.analyze_transaction, analyze_batch and
+the slot index, building MEVTransaction records, TransactionStore inserts and
+bulk loads, and the /api/transactions filters (store query plus response encoding).
+The pool_handoff entries are the parent's share of getting batched
+getTransaction responses to analysis worker processes: parsing the body and
+pickling each transaction dict, or (raw) only moving bytes while a worker
+runs split_response.
+
+    python benchmarks/bench_micro.py --count 2000 --output results/micro.json
+"""
+import argparse
+import json
+import os
+import pickle
+import random
+import sys
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from benchmarks import harness  # noqa: E402
+from analysis_workers import split_response  # noqa: E402
+from benchmarks.synthetic import SyntheticTransactionGenerator  # noqa: E402
+from mev_detector import MEVDetector  # noqa: E402
+from models import MEVPattern  # noqa: E402
+from persistent_store import transaction_row  # noqa: E402
+from pipeline import build_mev_transaction  # noqa: E402
+from swap_index import SwapIndex  # noqa: E402
+from transaction_decoder import TransactionDecoder  # noqa: E402
+from transaction_store import TransactionStore  # noqa: E402
+
+QUERY_COUNT = 200
+RPC_BATCH_SIZE = 100
+
+
+def _signature(tx_data: Dict[str, Any], index: int) -> str:
+    signatures = tx_data["transaction"].get("signatures") if isinstance(tx_data["transaction"], dict) else None
+    return signatures[0] if signatures else f"synthetic-{index}"
+
+
+def run(count: int, seed: int = 0, repeat: int = 5) -> Dict[str, Dict[str, Any]]:
+    generator = SyntheticTransactionGenerator(seed=seed)
+    pairs = generator.generate_many(count)
+    parsed = [p for p, _ in pairs]
+    wire = [w for _, w in pairs]
+
+    decoder = TransactionDecoder()
+    detector = MEVDetector()
+    results: Dict[str, Dict[str, Any]] = {}
+
+    # Fill the pubkey memo the way a long-running process would
+    for tx in wire[:100]:
+        decoder.decode_transaction(tx)
+
+    results["decode.jsonParsed"] = harness.measure(
+        lambda: [decoder.decode_transaction(tx) for tx in parsed], count, repeat)
+    results["decode.base64"] = harness.measure(
+        lambda: [decoder.decode_transaction(tx) for tx in wire], count, repeat)
+    metas = [tx["meta"] for tx in parsed]
+    results["decode.extract_token_transfers"] = harness.measure(
+        lambda: [decoder._extract_token_transfers(meta) for meta in metas], count, repeat)
+
+    for encoding, txs in (("jsonParsed", parsed), ("base64", wire)):
+        bodies = [json.dumps([{"jsonrpc": "2.0", "id": i, "result": tx}
+                              for i, tx in enumerate(txs[start:start + RPC_BATCH_SIZE])]).encode()
+                  for start in range(0, count, RPC_BATCH_SIZE)]
+        # What comes back from the worker, as the parent receives it
+        splits = [pickle.dumps(split_response(body), pickle.HIGHEST_PROTOCOL) for body in bodies]
+
+        def handoff_parsed(bodies=bodies):
+            for body in bodies:
+                for response in json.loads(body):
+                    pickle.dumps(response["result"], pickle.HIGHEST_PROTOCOL)
+
+        def handoff_raw(bodies=bodies, splits=splits):
+            for body, split in zip(bodies, splits):
+                pickle.dumps(body, pickle.HIGHEST_PROTOCOL)
+                for response in pickle.loads(split):
+                    pickle.dumps(response["result"], pickle.HIGHEST_PROTOCOL)
+        results[f"pool_handoff.{encoding}.parsed"] = harness.measure(handoff_parsed, count, repeat)
+        results[f"pool_handoff.{encoding}.raw"] = harness.measure(handoff_raw, count, repeat)
+
+    decoded = [decoder.decode_transaction(tx) for tx in parsed]
+    results["detect.analyze_transaction"] = harness.measure(
+        lambda: [detector.analyze_transaction(d) for d in decoded], count, repeat)
+    results["detect.analyze_batch"] = harness.measure(
+        lambda: detector.analyze_batch(decoded), count, repeat)
+
+    signatures = [_signature(tx, i) for i, tx in enumerate(parsed)]
+    slots = [tx["slot"] for tx in parsed]
+
+    def slot_context():
+        detector.swap_index = SwapIndex()
+        # Generation order stands in for the position in the block
+        for position, (signature, slot, d) in enumerate(zip(signatures, slots, decoded)):
+            detector.analyze_slot_context(signature, slot, d, position=position)
+    results["detect.slot_context"] = harness.measure(slot_context, count, repeat)
+
+    analyses = [detector.analyze_transaction(d) for d in decoded]
+    results["build_mev_transaction"] = harness.measure(
+        lambda: [build_mev_transaction(s, tx, d, a) for s, tx, d, a in zip(signatures, parsed, decoded, analyses)],
+        count, repeat)
+
+    records = [build_mev_transaction(s, tx, d, a) for s, tx, d, a in zip(signatures, parsed, decoded, analyses)]
+
+    def store_add():
+        # Half the records' capacity, so the second half also exercises eviction
+        store = TransactionStore(capacity=max(1, count // 2))
+        for record in records:
+            store.add(record)
+    results["store.add"] = harness.measure(store_add, count, repeat)
+
+    # Warm restart: rows as read back from SQLite into an empty store
+    rows = [transaction_row(record) for record in records]
+    results["store.extend_rows"] = harness.measure(
+        lambda: TransactionStore(capacity=count).extend_rows(rows), count, repeat)
+
+    store = TransactionStore(capacity=count)
+    store.extend(records)
+    rnd = random.Random(seed)
+    wallets = [r.wallet for r in rnd.sample(records, min(len(records), QUERY_COUNT))]
+    platforms = sorted({p for r in records for p in r.platforms})
+    filters: Dict[str, List[Dict[str, Any]]] = {
+        "none": [{}],
+        "is_mev": [{"is_mev": True}, {"is_mev": False}],
+        "pattern": [{"pattern": p.value} for p in (MEVPattern.ARBITRAGE, MEVPattern.SANDWICH, MEVPattern.UNKNOWN)],
+        "min_profit": [{"min_profit": v} for v in (0.0, 10.0, 1000.0)],
+        "wallet": [{"wallet": w} for w in wallets],
+        "platform": [{"platform": p} for p in platforms],
+        "combined": [{"is_mev": True, "min_profit": 1.0, "platform": p} for p in platforms],
+    }
+    for name, variants in filters.items():
+        queries = [variants[i % len(variants)] for i in range(QUERY_COUNT)]
+        results[f"api.transactions.{name}"] = harness.measure(
+            lambda queries=queries: [jsonable_encoder(store.query(limit=50, **q)) for q in queries],
+            QUERY_COUNT, repeat)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.count, args.seed, args.repeat)
+    harness.print_table(results)
+    if args.output:
+        harness.save(args.output, results, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""End-to-end throughput of the fetch -> decode -> detect -> store pipeline.
+
+The decode, detect and sink stages are the service's own (main.py); the fetch
+stage serves pre-generated transactions instead of calling an RPC, so this
+measures everything after the network. A pool of distinct synthetic
+transactions is cycled to reach large record counts without holding millions
+of them in memory; every record still gets its own signature and slot.
+
+    python benchmarks/bench_pipeline.py --records 1000 100000 1000000 --output results/pipeline.json
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+import main as app  # noqa: E402
+from benchmarks import harness  # noqa: E402
+from benchmarks.synthetic import SyntheticTransactionGenerator  # noqa: E402
+from mev_detector import MEVDetector  # noqa: E402
+from pipeline import AnalysisPipeline  # noqa: E402
+from swap_index import SwapIndex  # noqa: E402
+from transaction_store import TransactionStore  # noqa: E402
+
+
+async def _run_pipeline(pool: List[Dict[str, Any]], records: int) -> Dict[str, Any]:
+    # The service's own decode, detect and store stages, on fresh state, analyzing
+    # in this process and keeping results in memory only
+    app.mev_detector = detector = MEVDetector(
+        swap_index=SwapIndex(config.SWAP_INDEX_SLOTS, config.SWAP_INDEX_MAX_PER_SLOT)
+    )
+    app.transaction_store = store = TransactionStore(capacity=config.STORE_CAPACITY)
+    app.analysis_pool = None
+    app.persistent_store = None
+    pool_size = len(pool)
+    # Each pass over the pool moves to fresh slots, past the swap index window
+    slot_span = pool[-1]["slot"] - pool[0]["slot"] + config.SWAP_INDEX_SLOTS + 1
+
+    def fetch(signature: str, _payload: Any) -> Dict[str, Any]:
+        index = int(signature)
+        tx_data = pool[index % pool_size]
+        # As block ingestion would, with generation order as the position in the block
+        return dict(tx_data, slot=tx_data["slot"] + (index // pool_size) * slot_span, transactionIndex=index)
+
+    pipeline = AnalysisPipeline(
+        fetch=fetch,
+        decode=app._decode_stage,
+        detect=app._detect_stage,
+        sink=app._store_result,
+        fetch_concurrency=config.FETCH_CONCURRENCY,
+        decode_concurrency=config.DECODE_CONCURRENCY,
+        detect_concurrency=config.DETECT_CONCURRENCY,
+        fetch_queue_size=config.FETCH_QUEUE_SIZE,
+        decode_queue_size=config.DECODE_QUEUE_SIZE,
+        detect_queue_size=config.DETECT_QUEUE_SIZE
+    )
+    pipeline.start()
+    started = time.perf_counter()
+    try:
+        for index in range(records):
+            await pipeline.submit(str(index))
+        await pipeline.join()
+        elapsed = time.perf_counter() - started
+        stats = pipeline.stats()
+    finally:
+        await pipeline.stop()
+
+    return harness.result(
+        elapsed, records,
+        completed=stats["completed"],
+        stored=len(store),
+        stage_busy_seconds={name: stage["busy_seconds"] for name, stage in stats["stages"].items()},
+        swap_index=detector.swap_index.stats()
+    )
+
+
+def run(records: List[int], seed: int = 0, pool_size: int = 5000, encoding: str = "jsonParsed",
+        report: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Dict[str, Any]]:
+    generator = SyntheticTransactionGenerator(seed=seed)
+    pool = generator.generate_many(pool_size, encoding=encoding)
+    results = {}
+    for count in records:
+        name = f"pipeline.{encoding}.{count}"
+        results[name] = asyncio.run(_run_pipeline(pool, count))
+        if report:
+            report(name, results[name])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--pool-size", type=int, default=5000, help="Distinct synthetic transactions to cycle through")
+    parser.add_argument("--encoding", choices=("jsonParsed", "base64"), default="jsonParsed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = run(args.records, args.seed, args.pool_size, args.encoding,
+                  report=lambda name, entry: harness.print_table({name: entry}))
+    if args.output:
+        harness.save(args.output, results, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""getTransaction latency and success rate through the RPC endpoint pool, against fake nodes.
+
+Every scenario starts local fake RPC nodes (benchmarks/fake_rpc.py) with the
+given behavior, then fires `--calls` getTransaction requests, at most
+`--concurrency` at a time, through an RpcPool. Reported per scenario: wall
+time per call, p50/p99 call latency, failed calls, and how the requests were
+spread over the endpoints.
+
+- single: one healthy node (baseline)
+- mixed: a fast node, a slow node and one failing half its requests
+- throttled: two nodes that answer HTTP 429 above 50 requests/s, first
+  without and then with a matching client-side rate limit
+- outage: two healthy nodes, one of which goes down part way through
+- slow_tail: two nodes where 2% of responses take an extra second, first
+  with retries only and then with hedging
+- not_ready_batched: two nodes answering 5% of calls as if behind (a null
+  transaction), with the calls merged into batch requests that the
+  batcher retries call by call; a call still null after retrying counts
+  as failed
+
+    python benchmarks/bench_rpc_pool.py --calls 2000 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import harness  # noqa: E402
+from benchmarks.fake_rpc import FakeRpcBehavior, FakeRpcNode, FakeRpcServer  # noqa: E402
+from rpc_batch import JsonRpcBatcher  # noqa: E402
+from rpc_pool import RpcEndpoint, RpcError, RpcPool  # noqa: E402
+
+SCENARIOS = {
+    "single": [FakeRpcBehavior(latency=0.01, jitter=0.01)],
+    "mixed": [
+        FakeRpcBehavior(latency=0.01, jitter=0.01),
+        FakeRpcBehavior(latency=0.1, jitter=0.05),
+        FakeRpcBehavior(latency=0.01, jitter=0.01, error_rate=0.5),
+    ],
+    "throttled": [
+        FakeRpcBehavior(latency=0.01, jitter=0.01, max_rps=50),
+        FakeRpcBehavior(latency=0.01, jitter=0.01, max_rps=50),
+    ],
+    "throttled_limited": [
+        FakeRpcBehavior(latency=0.01, jitter=0.01, max_rps=50),
+        FakeRpcBehavior(latency=0.01, jitter=0.01, max_rps=50),
+    ],
+    "outage": [
+        FakeRpcBehavior(latency=0.01, jitter=0.01),
+        FakeRpcBehavior(latency=0.01, jitter=0.01),
+    ],
+    "slow_tail": [
+        FakeRpcBehavior(latency=0.01, jitter=0.01, slow_rate=0.02, slow_latency=1.0),
+        FakeRpcBehavior(latency=0.01, jitter=0.01, slow_rate=0.02, slow_latency=1.0),
+    ],
+    "slow_tail_hedged": [
+        FakeRpcBehavior(latency=0.01, jitter=0.01, slow_rate=0.02, slow_latency=1.0),
+        FakeRpcBehavior(latency=0.01, jitter=0.01, slow_rate=0.02, slow_latency=1.0),
+    ],
+    "not_ready_batched": [
+        FakeRpcBehavior(latency=0.01, jitter=0.01, not_ready_rate=0.05),
+        FakeRpcBehavior(latency=0.01, jitter=0.01, not_ready_rate=0.05),
+    ],
+}
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def _scenario(name: str, calls: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    servers = [FakeRpcServer(FakeRpcNode(FakeRpcBehavior(**behavior.to_dict()), seed=seed))
+               for behavior in SCENARIOS[name]]
+    for server in servers:
+        await server.start()
+    rate_limit = 45 if name == "throttled_limited" else 0
+    pool = RpcPool((RpcEndpoint(server.url, rate_limit=rate_limit, max_connections=concurrency, eject_seconds=1.0)
+                    for server in servers), hedging=name == "slow_tail_hedged")
+    pool.open()
+    batcher = None
+    if name.endswith("_batched"):
+        batcher = JsonRpcBatcher(lambda payload: pool.post(payload, retry=False), max_batch_size=50,
+                                 retry=pool.retry, budget=pool.budget)
+    try:
+        probe = await pool.post({"jsonrpc": "2.0", "id": 1, "method": "getSignaturesForAddress",
+                                 "params": [servers[0].node.programs[0], {"limit": 100}]})
+        signatures = [info["signature"] for info in probe["result"]]
+
+        latencies: List[float] = []
+        failures = 0
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(index: int):
+            nonlocal failures
+            params = [signatures[index % len(signatures)], {"encoding": "jsonParsed"}]
+            payload = {"jsonrpc": "2.0", "id": index, "method": "getTransaction", "params": params}
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    if batcher:
+                        response = await batcher.call("getTransaction", params)
+                    else:
+                        response = await pool.post(payload)
+                except RpcError:
+                    failures += 1
+                else:
+                    if response.get("result") is None:
+                        failures += 1
+                    else:
+                        latencies.append(time.perf_counter() - started)
+            if name == "outage" and len(latencies) + failures == calls // 3:
+                servers[1].node.behavior.down = True
+
+        started = time.perf_counter()
+        await asyncio.gather(*(call(index) for index in range(calls)))
+        elapsed = time.perf_counter() - started
+        requests = sum(endpoint.requests for endpoint in pool.endpoints) or 1
+        return harness.result(
+            elapsed, calls,
+            p50_ms=round(statistics.median(latencies) * 1000, 2) if latencies else None,
+            p99_ms=round(_percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+            failed=failures,
+            retries=pool.retries + (batcher.retries if batcher else 0),
+            hedges=pool.hedges,
+            hedge_wins=pool.hedge_wins,
+            requests=sum(endpoint.requests for endpoint in pool.endpoints),
+            share=[round(endpoint.requests / requests, 3) for endpoint in pool.endpoints],
+            ejections=[endpoint.ejections for endpoint in pool.endpoints],
+            throttled=[endpoint.throttled for endpoint in pool.endpoints]
+        )
+    finally:
+        await pool.close()
+        for server in servers:
+            await server.stop()
+
+
+def run(calls: int = 1000, concurrency: int = 32, seed: int = 0, scenarios: List[str] = None) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for name in scenarios or list(SCENARIOS):
+        results[f"rpc_pool.{name}"] = asyncio.run(_scenario(name, calls, concurrency, seed))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.calls, args.concurrency, args.seed, args.scenarios)
+    for name, entry in results.items():
+        print(f"{name:<26} p50 {entry['p50_ms']} ms  p99 {entry['p99_ms']} ms  failed {entry['failed']}  "
+              f"retries {entry['retries']}  hedges {entry['hedges']} (won {entry['hedge_wins']})  "
+              f"share {entry['share']}  ejections {entry['ejections']}  throttled {entry['throttled']}")
+    if args.output:
+        harness.save(args.output, results, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compare the jsonParsed and base64 getTransaction decoder paths.
+
+Measures response size on the wire and the time to parse the JSON-RPC body
+plus run TransactionDecoder.decode_transaction, on identical synthetic
+transactions. Also checks both paths produce the same trading fields.
+
+    python benchmarks/bench_wire_format.py --count 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import SyntheticTransactionGenerator  # noqa: E402
+from transaction_decoder import TransactionDecoder  # noqa: E402
+
+COMPARED_FIELDS = (
+    "wallet", "path", "platforms", "input_token", "output_token",
+    "input_amount", "output_amount", "token_transfers"
+)
+
+
+def _bodies(results):
+    return [
+        json.dumps({"jsonrpc": "2.0", "id": i, "result": result}).encode()
+        for i, result in enumerate(results)
+    ]
+
+
+def _decode_all(decoder, bodies):
+    started = time.perf_counter()
+    decoded = [decoder.decode_transaction(json.loads(body)["result"]) for body in bodies]
+    return decoded, time.perf_counter() - started
+
+
+def run(count: int, seed: int):
+    generator = SyntheticTransactionGenerator(seed=seed)
+    pairs = generator.generate_many(count)
+    parsed_bodies = _bodies(parsed for parsed, _ in pairs)
+    wire_bodies = _bodies(wire for _, wire in pairs)
+
+    decoder = TransactionDecoder()
+    # Warm up (and fill the pubkey memo the way a long-running process would)
+    _decode_all(decoder, wire_bodies[:100])
+    parsed_decoded, parsed_seconds = _decode_all(decoder, parsed_bodies)
+    wire_decoded, wire_seconds = _decode_all(decoder, wire_bodies)
+
+    mismatches = 0
+    for a, b in zip(parsed_decoded, wire_decoded):
+        if any(
+            sorted(a[f]) != sorted(b[f]) if f == "platforms" else a[f] != b[f]
+            for f in COMPARED_FIELDS
+        ):
+            mismatches += 1
+
+    parsed_bytes = sum(len(body) for body in parsed_bodies)
+    wire_bytes = sum(len(body) for body in wire_bodies)
+    return {
+        "count": count,
+        "jsonParsed": {
+            "bytes_per_tx": parsed_bytes / count,
+            "us_per_tx": parsed_seconds / count * 1e6,
+        },
+        "base64": {
+            "bytes_per_tx": wire_bytes / count,
+            "us_per_tx": wire_seconds / count * 1e6,
+        },
+        "bytes_saved_pct": (1 - wire_bytes / parsed_bytes) * 100,
+        "time_saved_pct": (1 - wire_seconds / parsed_seconds) * 100,
+        "field_mismatches": mismatches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    result = run(args.count, args.seed)
+    for encoding in ("jsonParsed", "base64"):
+        stats = result[encoding]
+        print(f"{encoding:>10}: {stats['bytes_per_tx']:8.0f} B/tx  {stats['us_per_tx']:8.1f} us/tx")
+    print(f"base64 saves {result['bytes_saved_pct']:.1f}% bytes and {result['time_saved_pct']:.1f}% parse+decode time "
+          f"({result['field_mismatches']} field mismatches over {result['count']} transactions)")
+
+
+if __name__ == "__main__":
+    main()
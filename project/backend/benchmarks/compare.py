@@ -0,0 +1,51 @@
+"""Compare two benchmark result files and flag regressions.
+
+    python benchmarks/compare.py results/baseline.json results/current.json --threshold 10
+
+Exits with status 1 if any benchmark present in both files got slower by more
+than the threshold (percent, seconds per op).
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import harness  # noqa: E402
+
+
+def compare(baseline: dict, current: dict, threshold: float):
+    """Yield (name, baseline s/op, current s/op, change %, regressed) for shared benchmarks"""
+    for name in sorted(set(baseline) & set(current)):
+        before = baseline[name]["seconds_per_op"]
+        after = current[name]["seconds_per_op"]
+        change = (after / before - 1) * 100 if before else 0.0
+        yield name, before, after, change, change > threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent")
+    args = parser.parse_args()
+
+    baseline = harness.load(args.baseline)
+    current = harness.load(args.current)
+    print(f"baseline: {baseline['meta'].get('commit')} ({baseline['meta'].get('created')})")
+    print(f"current:  {current['meta'].get('commit')} ({current['meta'].get('created')})")
+
+    regressions = 0
+    for name, before, after, change, regressed in compare(baseline["results"], current["results"], args.threshold):
+        regressions += regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<44} {before * 1e6:12.2f} -> {after * 1e6:12.2f} us/op {change:+7.1f}%{flag}")
+
+    for name in sorted(set(baseline["results"]) ^ set(current["results"])):
+        print(f"{name:<44} only in {'baseline' if name in baseline['results'] else 'current'}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
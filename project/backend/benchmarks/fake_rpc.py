@@ -0,0 +1,422 @@
+"""A local stand-in for a Solana JSON-RPC node, with injectable slowness and errors.
+
+It answers getSlot, getSignaturesForAddress, getTransaction, getBlocks and
+getBlock (single requests and batch arrays) from the synthetic transaction
+generator, and logsSubscribe over a WebSocket on the same URL. Slots advance
+in real time, each slot carrying a fixed number of transactions per DEX
+program. Signatures encode their slot and position, so `before`/`until`
+paging works without any stored state, and streamed signatures are the same
+ones the HTTP methods return.
+
+Faults apply per HTTP request: a base latency plus jitter, an occasional slow
+response, HTTP 500s, HTTP 429s, and a server-side rate limit. Within a request,
+individual calls can be answered as a node that is behind would (a null
+getTransaction result, otherwise error -32004). The WebSocket
+can drop a fraction of notifications and close connections after a while.
+Faults can be changed while the server is running, either through the
+`behavior` attribute or with POST /admin/behavior.
+
+    python benchmarks/fake_rpc.py --port 8899 --latency-ms 20 --error-rate 0.05
+    MEV_RPC_URLS=http://127.0.0.1:8899,http://127.0.0.1:8900 uvicorn main:app
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import base58  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect  # noqa: E402
+from fastapi.responses import JSONResponse, Response  # noqa: E402
+from starlette.requests import ClientDisconnect  # noqa: E402
+
+from benchmarks.synthetic import DEX_PROGRAMS, SyntheticTransactionGenerator  # noqa: E402
+from wire_format import b58encode  # noqa: E402
+
+SLOT_SECONDS = 0.4
+GENESIS_SLOT = 250_000_000
+
+
+class FakeRpcBehavior:
+    """Fault injection settings; latencies in seconds, rates as probabilities per request"""
+
+    FIELDS = ("latency", "jitter", "slow_rate", "slow_latency", "error_rate", "throttle_rate", "max_rps", "down",
+              "not_ready_rate", "ws_drop_rate", "ws_disconnect_after")
+
+    def __init__(self, latency: float = 0.005, jitter: float = 0.0,
+                 slow_rate: float = 0.0, slow_latency: float = 1.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 max_rps: Optional[float] = None, down: bool = False,
+                 not_ready_rate: float = 0.0, ws_drop_rate: float = 0.0, ws_disconnect_after: Optional[float] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+        self.down = down
+        self.not_ready_rate = not_ready_rate
+        self.ws_drop_rate = ws_drop_rate
+        self.ws_disconnect_after = ws_disconnect_after
+
+    def update(self, **changes: Any):
+        for name, value in changes.items():
+            if name not in self.FIELDS:
+                raise ValueError(f"Unknown behavior setting {name!r}")
+            setattr(self, name, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+
+class FakeRpcNode:
+    """The simulated chain and the HTTP app serving it"""
+
+    def __init__(self, behavior: Optional[FakeRpcBehavior] = None, seed: int = 0,
+                 pool_size: int = 500, txs_per_slot: int = 4, programs: Optional[List[str]] = None):
+        self.behavior = behavior or FakeRpcBehavior()
+        self.random = random.Random(seed)
+        self.txs_per_slot = txs_per_slot
+        self.programs = list(programs or DEX_PROGRAMS)
+        self.pool = SyntheticTransactionGenerator(seed=seed).generate_many(pool_size)
+        self.started = time.time()
+        self.requests = 0
+        self.calls = 0
+        self.errors = 0
+        self.throttled = 0
+        self.not_ready = 0
+        self._tokens = 0.0
+        self._tokens_updated = time.monotonic()
+        self._subscription_ids = itertools.count(1)
+        self.ws_connections = 0
+        self.ws_notifications = 0
+        self.ws_dropped = 0
+        self.app = self._build_app()
+
+    def current_slot(self) -> int:
+        return GENESIS_SLOT + int((time.time() - self.started) / SLOT_SECONDS)
+
+    def block_time(self, slot: int) -> int:
+        return int(self.started + (slot - GENESIS_SLOT) * SLOT_SECONDS)
+
+    def signature(self, slot: int, program: int, index: int) -> str:
+        head = slot.to_bytes(8, "big") + program.to_bytes(2, "big") + index.to_bytes(2, "big")
+        return b58encode(head + hashlib.sha512(head).digest()[:52])
+
+    @staticmethod
+    def position(signature: str) -> Optional[tuple]:
+        """(slot, program, index) encoded in a signature from `signature`"""
+        try:
+            raw = base58.b58decode(signature)
+        except Exception:
+            return None
+        if len(raw) != 64:
+            return None
+        return int.from_bytes(raw[:8], "big"), int.from_bytes(raw[8:10], "big"), int.from_bytes(raw[10:12], "big")
+
+    def transaction(self, slot: int, program: int, index: int, encoding: str) -> Dict[str, Any]:
+        parsed, wire = self.pool[(slot * 31 + program * 7 + index) % len(self.pool)]
+        tx = dict(wire if encoding == "base64" else parsed)
+        tx["slot"] = slot
+        tx["blockTime"] = self.block_time(slot)
+        return tx
+
+    def get_slot(self, params: List[Any]) -> int:
+        return self.current_slot()
+
+    def get_signatures_for_address(self, params: List[Any]) -> List[Dict[str, Any]]:
+        address = params[0]
+        options = params[1] if len(params) > 1 else {}
+        if address not in self.programs:
+            return []
+        program = self.programs.index(address)
+        limit = min(int(options.get("limit") or 1000), 1000)
+        # Newest first: positions (slot, index) strictly below `before` and above `until`
+        start = (self.current_slot(), self.txs_per_slot)
+        if options.get("before"):
+            position = self.position(options["before"])
+            if position:
+                start = (position[0], position[2])
+        stop = (self.current_slot() - 10_000, 0)
+        if options.get("until"):
+            position = self.position(options["until"])
+            if position:
+                stop = (position[0], position[2])
+
+        infos = []
+        slot, index = start
+        while len(infos) < limit:
+            index -= 1
+            if index < 0:
+                slot, index = slot - 1, self.txs_per_slot - 1
+            if (slot, index) <= stop:
+                break
+            infos.append({
+                "signature": self.signature(slot, program, index),
+                "slot": slot,
+                "err": None,
+                "memo": None,
+                "blockTime": self.block_time(slot),
+                "confirmationStatus": "confirmed"
+            })
+        return infos
+
+    def get_transaction(self, params: List[Any]) -> Optional[Dict[str, Any]]:
+        position = self.position(params[0])
+        if position is None or position[0] > self.current_slot():
+            return None
+        options = params[1] if len(params) > 1 else {}
+        return self.transaction(*position, options.get("encoding", "json"))
+
+    def get_blocks(self, params: List[Any]) -> List[int]:
+        end = min(params[1] if len(params) > 1 and isinstance(params[1], int) else params[0], self.current_slot())
+        return list(range(params[0], end + 1))
+
+    def get_block(self, params: List[Any]) -> Optional[Dict[str, Any]]:
+        slot = params[0]
+        if slot > self.current_slot():
+            return None
+        options = params[1] if len(params) > 1 else {}
+        encoding = options.get("encoding", "json")
+        transactions = []
+        for program in range(len(self.programs)):
+            for index in range(self.txs_per_slot):
+                tx = self.transaction(slot, program, index, encoding)
+                transactions.append({key: tx[key] for key in ("transaction", "meta", "version") if key in tx})
+        return {"blockTime": self.block_time(slot), "blockHeight": slot, "transactions": transactions}
+
+    METHODS = {
+        "getSlot": get_slot,
+        "getSignaturesForAddress": get_signatures_for_address,
+        "getTransaction": get_transaction,
+        "getBlocks": get_blocks,
+        "getBlock": get_block,
+    }
+
+    def call(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls += 1
+        method = self.METHODS.get(request.get("method"))
+        if method is None:
+            return {"jsonrpc": "2.0", "id": request.get("id"),
+                    "error": {"code": -32601, "message": "Method not found"}}
+        if self.random.random() < self.behavior.not_ready_rate:
+            self.not_ready += 1
+            if request.get("method") == "getTransaction":
+                return {"jsonrpc": "2.0", "id": request.get("id"), "result": None}
+            return {"jsonrpc": "2.0", "id": request.get("id"),
+                    "error": {"code": -32004, "message": "Block not available for slot"}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": method(self, request.get("params") or [])}
+
+    def _over_rate(self) -> bool:
+        max_rps = self.behavior.max_rps
+        if not max_rps:
+            return False
+        now = time.monotonic()
+        self._tokens = min(max_rps, self._tokens + (now - self._tokens_updated) * max_rps)
+        self._tokens_updated = now
+        if self._tokens < 1:
+            return True
+        self._tokens -= 1
+        return False
+
+    async def handle(self, request: Request):
+        self.requests += 1
+        behavior = self.behavior
+        delay = behavior.latency + self.random.uniform(0, behavior.jitter)
+        if self.random.random() < behavior.slow_rate:
+            delay += behavior.slow_latency
+        if behavior.down:
+            self.errors += 1
+            return JSONResponse({"error": "unavailable"}, status_code=503)
+        if self._over_rate() or self.random.random() < behavior.throttle_rate:
+            self.throttled += 1
+            return JSONResponse({"error": "Too many requests"}, status_code=429, headers={"Retry-After": "1"})
+        try:
+            payload = await request.json()
+        except ClientDisconnect:
+            # The client gave up (e.g. a hedged request that lost the race)
+            return Response(status_code=499)
+        await asyncio.sleep(delay)
+        if self.random.random() < behavior.error_rate:
+            self.errors += 1
+            return JSONResponse({"error": "internal error"}, status_code=500)
+        if isinstance(payload, list):
+            return JSONResponse([self.call(item) for item in payload])
+        return JSONResponse(self.call(payload))
+
+    def logs_notification(self, subscription: int, slot: int, program: int, index: int) -> str:
+        address = self.programs[program]
+        return json.dumps({
+            "jsonrpc": "2.0",
+            "method": "logsNotification",
+            "params": {
+                "result": {
+                    "context": {"slot": slot},
+                    "value": {
+                        "signature": self.signature(slot, program, index),
+                        "err": None,
+                        "logs": [f"Program {address} invoke [1]", "Program log: Instruction: Swap",
+                                 f"Program {address} success"]
+                    }
+                },
+                "subscription": subscription
+            }
+        })
+
+    async def stream(self, websocket: WebSocket):
+        """PubSub connection: logsSubscribe by `mentions`, then a notification per new transaction"""
+        await websocket.accept()
+        if self.behavior.down:
+            await websocket.close(code=1013)
+            return
+        self.ws_connections += 1
+        subscriptions: Dict[int, int] = {}
+        opened = time.monotonic()
+
+        async def read():
+            async for text in websocket.iter_text():
+                request = json.loads(text)
+                params = request.get("params") or []
+                if request.get("method") == "logsSubscribe":
+                    mentions = params[0].get("mentions") if params and isinstance(params[0], dict) else None
+                    if not mentions or mentions[0] not in self.programs:
+                        reply = {"error": {"code": -32602, "message": "Invalid params: unsupported filter"}}
+                    else:
+                        subscription = next(self._subscription_ids)
+                        subscriptions[subscription] = self.programs.index(mentions[0])
+                        reply = {"result": subscription}
+                elif request.get("method") == "logsUnsubscribe":
+                    reply = {"result": subscriptions.pop(params[0] if params else None, None) is not None}
+                else:
+                    reply = {"error": {"code": -32601, "message": "Method not found"}}
+                await websocket.send_text(json.dumps(dict(reply, jsonrpc="2.0", id=request.get("id"))))
+
+        reader = asyncio.ensure_future(read())
+        next_slot = self.current_slot() + 1
+        try:
+            while not reader.done():
+                behavior = self.behavior
+                if behavior.down or (behavior.ws_disconnect_after is not None
+                                     and time.monotonic() - opened > behavior.ws_disconnect_after):
+                    await websocket.close(code=1001)
+                    break
+                current = self.current_slot()
+                while next_slot <= current:
+                    for subscription, program in list(subscriptions.items()):
+                        for index in range(self.txs_per_slot):
+                            if self.random.random() < behavior.ws_drop_rate:
+                                self.ws_dropped += 1
+                                continue
+                            await websocket.send_text(self.logs_notification(subscription, next_slot, program, index))
+                            self.ws_notifications += 1
+                    next_slot += 1
+                await asyncio.sleep(SLOT_SECONDS / 4)
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            reader.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"slot": self.current_slot(), "requests": self.requests, "calls": self.calls,
+                "errors": self.errors, "throttled": self.throttled, "not_ready": self.not_ready,
+                "ws_connections": self.ws_connections, "ws_notifications": self.ws_notifications,
+                "ws_dropped": self.ws_dropped, "behavior": self.behavior.to_dict()}
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Fake Solana RPC")
+
+        @app.post("/")
+        async def rpc(request: Request):
+            return await self.handle(request)
+
+        @app.websocket("/")
+        async def pubsub(websocket: WebSocket):
+            await self.stream(websocket)
+
+        @app.get("/admin/stats")
+        async def admin_stats():
+            return self.stats()
+
+        @app.post("/admin/behavior")
+        async def admin_behavior(request: Request):
+            try:
+                self.behavior.update(**(await request.json()))
+            except ValueError as e:
+                return JSONResponse({"error": str(e)}, status_code=400)
+            return self.behavior.to_dict()
+
+        return app
+
+
+class FakeRpcServer:
+    """Runs a FakeRpcNode on a local port inside the current event loop"""
+
+    def __init__(self, node: FakeRpcNode, port: int = 0, host: str = "127.0.0.1"):
+        self.node = node
+        self.host = host
+        self.port = port
+        self._server: Optional[uvicorn.Server] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        config = uvicorn.Config(self.node.app, host=self.host, port=self.port, log_level="warning", lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._task = asyncio.ensure_future(self._server.serve())
+        while not self._server.started:
+            if self._task.done():
+                self._task.result()
+            await asyncio.sleep(0.01)
+        # Port 0 picks a free port; read back the one bound
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.should_exit = True
+            await self._task
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of requests delayed by --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=1000.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 429")
+    parser.add_argument("--max-rps", type=float, help="Server-side rate limit (HTTP 429 above it)")
+    parser.add_argument("--not-ready-rate", type=float, default=0.0,
+                        help="Fraction of calls answered as by a node that is behind")
+    parser.add_argument("--ws-drop-rate", type=float, default=0.0, help="Fraction of log notifications not sent")
+    parser.add_argument("--ws-disconnect-after", type=float, help="Close each WebSocket after this many seconds")
+    parser.add_argument("--txs-per-slot", type=int, default=4, help="Transactions per DEX program per slot")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    behavior = FakeRpcBehavior(
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+        slow_rate=args.slow_rate, slow_latency=args.slow_ms / 1000,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate, max_rps=args.max_rps,
+        not_ready_rate=args.not_ready_rate,
+        ws_drop_rate=args.ws_drop_rate, ws_disconnect_after=args.ws_disconnect_after
+    )
+    node = FakeRpcNode(behavior, seed=args.seed, txs_per_slot=args.txs_per_slot)
+    uvicorn.run(node.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
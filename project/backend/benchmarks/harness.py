@@ -0,0 +1,85 @@
+"""Timing helpers and the JSON result format shared by the benchmark scripts.
+
+A results file looks like:
+
+    {
+      "meta": {"created": ..., "python": ..., "platform": ..., "cpus": ..., "commit": ..., "seed": ...},
+      "results": {
+        "decode.jsonParsed": {"seconds_per_op": 1.2e-4, "ops_per_second": 8300.0, "ops": 2000, "repeat": 5},
+        ...
+      }
+    }
+
+Every result is normalized to seconds per operation, so two files can be
+compared key by key (lower is better) with benchmarks/compare.py.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+def measure(run: Callable[[], Any], ops: int, repeat: int = 5, warmup: int = 1) -> Dict[str, Any]:
+    """Time `run` (which performs `ops` operations) and report the median per-op cost"""
+    for _ in range(warmup):
+        run()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+    median = statistics.median(samples)
+    return result(median, ops, repeat=repeat, spread=(max(samples) - min(samples)) / median if median else 0.0)
+
+
+def result(seconds: float, ops: int, **extra: Any) -> Dict[str, Any]:
+    """A result entry for `ops` operations that took `seconds` in total"""
+    entry = {
+        "seconds_per_op": seconds / ops if ops else 0.0,
+        "ops_per_second": ops / seconds if seconds > 0 else 0.0,
+        "ops": ops,
+    }
+    entry.update(extra)
+    return entry
+
+
+def environment(seed: Optional[int] = None) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+        "seed": seed,
+    }
+
+
+def save(path: str, results: Dict[str, Dict[str, Any]], seed: Optional[int] = None):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"meta": environment(seed), "results": results}, f, indent=2, sort_keys=True)
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def print_table(results: Dict[str, Dict[str, Any]], names: Optional[Iterable[str]] = None):
+    for name in names or sorted(results):
+        entry = results[name]
+        print(f"{name:<44} {entry['seconds_per_op'] * 1e6:12.2f} us/op {entry['ops_per_second']:14,.0f} ops/s")
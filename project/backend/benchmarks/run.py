@@ -0,0 +1,57 @@
+"""Run the whole benchmark suite and save one results file.
+
+    python benchmarks/run.py                                  # micro + wire format + memory + pipeline at 1k/100k/1M
+    python benchmarks/run.py --records 1000 --output results/quick.json
+
+Results default to benchmarks/results/<commit>-<timestamp>.json; compare two
+runs with benchmarks/compare.py.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import bench_memory, bench_micro, bench_pipeline, bench_wire_format, harness  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000, help="Transactions per microbenchmark")
+    parser.add_argument("--records", type=int, nargs="+", default=[1_000, 100_000, 1_000_000],
+                        help="Record counts for the end-to-end pipeline runs")
+    parser.add_argument("--memory-records", type=int, default=100_000, help="Records retained for the memory comparison")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    results = {}
+    results.update(bench_micro.run(args.count, args.seed))
+    harness.print_table(results)
+
+    wire = bench_wire_format.run(args.count, args.seed)
+    for encoding in ("jsonParsed", "base64"):
+        name = f"wire_format.{encoding}"
+        results[name] = harness.result(wire[encoding]["us_per_tx"] / 1e6 * args.count, args.count,
+                                       bytes_per_op=wire[encoding]["bytes_per_tx"])
+        harness.print_table(results, [name])
+
+    memory = bench_memory.run(args.memory_records, args.seed)
+    results.update(memory)
+    harness.print_table(results, sorted(memory))
+
+    results.update(bench_pipeline.run(args.records, args.seed,
+                                      report=lambda name, entry: harness.print_table({name: entry})))
+
+    output = args.output
+    if not output:
+        commit = harness.environment()["commit"] or "unknown"
+        output = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                              f"{commit}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    harness.save(output, results, seed=args.seed)
+    print(f"Saved {len(results)} results to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Seeded generator of realistic-looking getTransaction results.
+
+Each generated transaction is available both as a `jsonParsed` result and as
+the equivalent `base64` wire-format result, so the two decoder paths can be
+compared on identical input.
+"""
+import base64
+import os
+import random
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import base58  # noqa: E402
+
+from wire_format import serialize_transaction  # noqa: E402
+
+TOKEN_PROGRAM = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+COMPUTE_BUDGET_PROGRAM = "ComputeBudget111111111111111111111111111111"
+SYSTEM_PROGRAM = "11111111111111111111111111111111"
+
+DEX_PROGRAMS = [
+    "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4",
+    "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8",
+    "9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM",
+    "MERLuDFBMmsHnsBPZw2sDQZHvXFMwp8EdjudcU2HKky",
+    "PhoeNiX7VavoDXL4ZMD4fDbBGEz7dhc8EJQ1J4TjTaE",
+]
+
+MINTS = [
+    ("So11111111111111111111111111111111111111112", 9),
+    ("EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v", 6),
+    ("Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB", 6),
+    ("mSoLzYCxHdYgdzU16g5QSh3i5K3z3KZK7ytfqcJm7So", 9),
+    ("DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263", 5),
+    ("J1toso1uCk3RLmjorhTtrVwY9HJ7X8V9yYac6Y7kGCPn", 9),
+]
+
+LOG_TEMPLATES = [
+    "Program {program} invoke [{depth}]",
+    "Program log: Instruction: Swap",
+    "Program log: Instruction: Transfer",
+    "Program log: Instruction: Route",
+    "Program log: ray_log: {blob}",
+    "Program data: {blob}",
+    "Program {program} consumed {units} of 200000 compute units",
+    "Program {program} success",
+]
+
+
+class SyntheticTransactionGenerator:
+    """Deterministic source of varied DEX transactions"""
+
+    def __init__(self, seed: int = 0,
+                 instructions: Tuple[int, int] = (2, 8),
+                 inner_instructions: Tuple[int, int] = (0, 12),
+                 logs: Tuple[int, int] = (10, 80),
+                 token_balances: Tuple[int, int] = (2, 10),
+                 lookup_addresses: Tuple[int, int] = (0, 24),
+                 wallets: int = 2_000,
+                 accounts: int = 20_000):
+        self.random = random.Random(seed)
+        self.instructions = instructions
+        self.inner_instructions = inner_instructions
+        self.logs = logs
+        self.token_balances = token_balances
+        self.lookup_addresses = lookup_addresses
+        self.slot = 250_000_000
+        # Mainnet traffic keeps touching the same bots, pools and vaults, so keys
+        # are drawn (skewed towards the front) from finite populations.
+        self.wallet_keys = [self._key() for _ in range(wallets)]
+        self.account_keys = [self._key() for _ in range(accounts)]
+
+    def _key(self) -> bytes:
+        return self.random.getrandbits(256).to_bytes(32, "little")
+
+    def _pick(self, population: List[bytes]) -> bytes:
+        return population[int(len(population) * self.random.random() ** 2)]
+
+    def _blob(self, low: int, high: int) -> bytes:
+        return self.random.getrandbits(8 * high).to_bytes(high, "little")[:self.random.randint(low, high)]
+
+    def generate(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """One transaction as (jsonParsed result, base64 result)"""
+        rnd = self.random
+        self.slot += rnd.randint(0, 2)
+
+        programs = [COMPUTE_BUDGET_PROGRAM, TOKEN_PROGRAM, SYSTEM_PROGRAM] + rnd.sample(DEX_PROGRAMS, rnd.randint(1, 3))
+        signer = self._pick(self.wallet_keys)
+        other_static = list(dict.fromkeys(self._pick(self.account_keys) for _ in range(rnd.randint(4, 16))))
+        other_static = [key for key in other_static if key != signer]
+        static_keys = [signer] + other_static + [base58.b58decode(p) for p in programs]
+        static_strs = [base58.b58encode(k).decode() for k in static_keys]
+
+        versioned = rnd.random() < 0.7
+        lookup_count = rnd.randint(*self.lookup_addresses) if versioned else 0
+        writable_loaded = [base58.b58encode(self._pick(self.account_keys)).decode() for _ in range(lookup_count // 2)]
+        readonly_loaded = [base58.b58encode(self._pick(self.account_keys)).decode() for _ in range(lookup_count - lookup_count // 2)]
+        all_keys = static_strs + writable_loaded + readonly_loaded
+        program_index = {p: static_strs.index(p) for p in programs}
+        non_program = list(range(len(other_static) + 1)) + list(range(len(static_strs), len(all_keys)))
+
+        compiled = []
+        for _ in range(rnd.randint(*self.instructions)):
+            program = rnd.choice(programs[:1] + programs[3:])
+            accounts = [rnd.choice(non_program) for _ in range(rnd.randint(0, 14))]
+            compiled.append((program_index[program], accounts, self._blob(1, 48)))
+
+        inner_groups_compiled = []
+        inner_groups_parsed = []
+        remaining_inner = rnd.randint(*self.inner_instructions)
+        for index in range(len(compiled)):
+            if remaining_inner <= 0:
+                break
+            count = rnd.randint(1, remaining_inner)
+            remaining_inner -= count
+            group_compiled = []
+            group_parsed = []
+            for _ in range(count):
+                source, destination, authority = (rnd.choice(non_program) for _ in range(3))
+                amount = str(rnd.randint(1, 10 ** 12))
+                data = base58.b58encode(b"\x03" + int(amount).to_bytes(8, "little")).decode()
+                group_compiled.append({
+                    "programIdIndex": program_index[TOKEN_PROGRAM],
+                    "accounts": [source, destination, authority],
+                    "data": data,
+                    "stackHeight": 2
+                })
+                group_parsed.append({
+                    "parsed": {
+                        "info": {
+                            "amount": amount,
+                            "authority": all_keys[authority],
+                            "destination": all_keys[destination],
+                            "source": all_keys[source]
+                        },
+                        "type": "transfer"
+                    },
+                    "program": "spl-token",
+                    "programId": TOKEN_PROGRAM,
+                    "stackHeight": 2
+                })
+            inner_groups_compiled.append({"index": index, "instructions": group_compiled})
+            inner_groups_parsed.append({"index": index, "instructions": group_parsed})
+
+        logs = []
+        for _ in range(rnd.randint(*self.logs)):
+            logs.append(rnd.choice(LOG_TEMPLATES).format(
+                program=rnd.choice(programs),
+                depth=rnd.randint(1, 3),
+                units=rnd.randint(1000, 200000),
+                blob=base64.b64encode(self._blob(8, 64)).decode()
+            ))
+
+        pre_balances, post_balances = self._token_balances(signer, len(all_keys))
+
+        meta_common = {
+            "err": None,
+            "fee": 5000 + rnd.randint(0, 100000),
+            "preBalances": [rnd.randint(0, 10 ** 12) for _ in all_keys],
+            "postBalances": [rnd.randint(0, 10 ** 12) for _ in all_keys],
+            "preTokenBalances": pre_balances,
+            "postTokenBalances": post_balances,
+            "logMessages": logs,
+            "computeUnitsConsumed": rnd.randint(10_000, 1_400_000),
+            "rewards": [],
+            "status": {"Ok": None},
+        }
+
+        signature = self._blob(64, 64)
+        recent_blockhash = self._key()
+        header = (1, 0, len(programs))
+        num_signers = header[0]
+
+        parsed_account_keys = []
+        for i, key in enumerate(all_keys):
+            parsed_account_keys.append({
+                "pubkey": key,
+                "signer": i < num_signers,
+                "writable": i <= len(other_static) or (len(static_strs) <= i < len(static_strs) + len(writable_loaded)),
+                "source": "transaction" if i < len(static_strs) else "lookupTable"
+            })
+
+        parsed_instructions = []
+        for program_id_index, accounts, data in compiled:
+            parsed_instructions.append({
+                "accounts": [all_keys[i] for i in accounts],
+                "data": base58.b58encode(data).decode(),
+                "programId": all_keys[program_id_index],
+                "stackHeight": None
+            })
+
+        lookups = []
+        if versioned and lookup_count:
+            lookups.append((self._key(), list(range(len(writable_loaded))), list(range(len(readonly_loaded)))))
+
+        block_time = 1_700_000_000 + self.slot // 3
+        version: Any = 0 if versioned else "legacy"
+
+        json_parsed = {
+            "blockTime": block_time,
+            "slot": self.slot,
+            "version": version,
+            "meta": dict(meta_common, innerInstructions=inner_groups_parsed),
+            "transaction": {
+                "signatures": [base58.b58encode(signature).decode()],
+                "message": {
+                    "accountKeys": parsed_account_keys,
+                    "recentBlockhash": base58.b58encode(recent_blockhash).decode(),
+                    "instructions": parsed_instructions,
+                    "addressTableLookups": [
+                        {
+                            "accountKey": base58.b58encode(table).decode(),
+                            "writableIndexes": writable,
+                            "readonlyIndexes": readonly
+                        }
+                        for table, writable, readonly in lookups
+                    ] if versioned else None
+                }
+            }
+        }
+
+        raw = serialize_transaction(
+            [signature], header, static_keys, recent_blockhash, compiled,
+            address_table_lookups=lookups, version=0 if versioned else None
+        )
+        wire_meta = dict(meta_common, innerInstructions=inner_groups_compiled)
+        if versioned:
+            wire_meta["loadedAddresses"] = {"writable": writable_loaded, "readonly": readonly_loaded}
+        wire = {
+            "blockTime": block_time,
+            "slot": self.slot,
+            "version": version,
+            "meta": wire_meta,
+            "transaction": [base64.b64encode(raw).decode(), "base64"]
+        }
+        return json_parsed, wire
+
+    def _token_balances(self, signer: bytes, key_count: int) -> Tuple[List[Dict], List[Dict]]:
+        rnd = self.random
+        owner = base58.b58encode(signer).decode()
+        pre, post = [], []
+        for _ in range(rnd.randint(*self.token_balances)):
+            account_index = rnd.randrange(key_count)
+            mint, decimals = rnd.choice(MINTS)
+            before = rnd.randint(0, 10 ** (decimals + 4))
+            after = max(0, before + rnd.randint(-10 ** (decimals + 2), 10 ** (decimals + 2)))
+            for target, amount in ((pre, before), (post, after)):
+                target.append({
+                    "accountIndex": account_index,
+                    "mint": mint,
+                    "owner": owner,
+                    "programId": TOKEN_PROGRAM,
+                    "uiTokenAmount": {
+                        "amount": str(amount),
+                        "decimals": decimals,
+                        "uiAmount": amount / 10 ** decimals,
+                        "uiAmountString": str(amount / 10 ** decimals)
+                    }
+                })
+        return pre, post
+
+    def generate_many(self, count: int, encoding: Optional[str] = None) -> List[Any]:
+        """`count` transactions; a single encoding, or (jsonParsed, base64) pairs"""
+        pairs = (self.generate() for _ in range(count))
+        if encoding == "jsonParsed":
+            return [parsed for parsed, _ in pairs]
+        if encoding == "base64":
+            return [wire for _, wire in pairs]
+        return list(pairs)
@@ -0,0 +1,95 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Set
+import logging
+
+from fastapi.encoders import jsonable_encoder
+
+from models import MEVTransaction
+
+logger = logging.getLogger(__name__)
+
+
+def encode_message(message_type: str, transactions: List[MEVTransaction]) -> str:
+    """Serialize a WebSocket message carrying transactions"""
+    return json.dumps({"type": message_type, "data": jsonable_encoder(transactions)})
+
+
+class Subscriber:
+    """One WebSocket client: its filters and a bounded queue of encoded messages"""
+
+    def __init__(self, queue_size: int,
+                 pattern: Optional[str] = None,
+                 min_profit: Optional[float] = None,
+                 is_mev: Optional[bool] = None):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.pattern = pattern
+        self.min_profit = min_profit
+        self.is_mev = is_mev
+        self.sent = 0
+        # Set when the client fell too far behind and was cut off
+        self.overflowed = asyncio.Event()
+
+    def matches(self, tx: MEVTransaction) -> bool:
+        if self.is_mev is not None and tx.is_mev != self.is_mev:
+            return False
+        if self.pattern and tx.pattern != self.pattern:
+            return False
+        if self.min_profit is not None and tx.profit_usdc < self.min_profit:
+            return False
+        return True
+
+
+class BroadcastHub:
+    """Fan-out of newly analyzed transactions to WebSocket subscribers.
+
+    Each transaction is published once; it is serialized at most once no
+    matter how many clients receive it, and the same string is queued for
+    every matching subscriber. A subscriber whose queue is full is dropped
+    rather than allowed to hold up everyone else.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscriber] = set()
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    def subscribe(self, **filters: Any) -> Subscriber:
+        subscriber = Subscriber(self.queue_size, **filters)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, tx: MEVTransaction):
+        """Queue a new transaction for every subscriber whose filters match"""
+        self.published += 1
+        if not self.subscribers:
+            return
+
+        message = None
+        for subscriber in list(self.subscribers):
+            if not subscriber.matches(tx):
+                continue
+            if message is None:
+                message = encode_message("transactions_update", [tx])
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "dropped_subscribers": self.dropped_subscribers,
+            "max_queue_depth": max((s.queue.qsize() for s in self.subscribers), default=0)
+        }
+
+    def _drop(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+        self.dropped_subscribers += 1
+        subscriber.overflowed.set()
+        logger.warning("Dropping slow WebSocket subscriber (send queue full)")
@@ -0,0 +1,145 @@
+import asyncio
+import fcntl
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from models import MEVTransaction
+from persistent_store import PersistentStore
+
+logger = logging.getLogger(__name__)
+
+ROLES = ("standalone", "auto", "leader", "api")
+
+
+class LeaderLock:
+    """Exclusive advisory lock on a file; the process holding it is the ingestion leader.
+
+    The kernel releases the lock when its holder exits, crashed or not, so a
+    standby process retrying `acquire()` takes over without lease timeouts or
+    clock assumptions. The holder's pid is written into the file for operators.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self) -> bool:
+        """Take the lock if it is free; never blocks"""
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class StoreFollower:
+    """Replays the leader's writes from the shared SQLite change log into this process.
+
+    Every `poll_interval` it checks SQLite's `data_version`, which changes
+    only when another connection commits, so an idle follower costs one
+    pragma per poll. On a change it reads the new change log entries and
+    passes each transaction to `apply(tx)`. If the follower fell so far
+    behind that the log was trimmed past it, it can't tell what it missed,
+    so the newest `resync_limit` rows are passed to `reload(rows)` instead
+    (oldest first, as warm restart loads them) to replace what it holds.
+    """
+
+    def __init__(self, store: PersistentStore,
+                 apply: Callable[[MEVTransaction], None],
+                 reload: Callable[[List[tuple]], None],
+                 poll_interval: float = 0.1,
+                 batch_size: int = 1000,
+                 resync_limit: int = 100_000):
+        self.store = store
+        self.apply = apply
+        self.reload = reload
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.resync_limit = resync_limit
+        self.seq = 0
+        self.applied = 0
+        self.resyncs = 0
+        self.last_applied: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._version: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self, seq: int):
+        """Follow changes after `seq` (taken before the store was loaded from disk)"""
+        self.seq = seq
+        self._task = asyncio.create_task(self._run(), name="store-follower")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def sync(self):
+        """Apply everything committed so far"""
+        while True:
+            seq, txs, missed = await self.store.changes_since(self.seq, self.batch_size)
+            if missed:
+                await self._resync()
+                continue
+            self.seq = seq
+            for tx in txs:
+                self.apply(tx)
+            if txs:
+                self.applied += len(txs)
+                self.last_applied = time.time()
+            if len(txs) < self.batch_size:
+                return
+
+    async def _resync(self):
+        self.resyncs += 1
+        logger.warning(f"Store follower fell behind the change log at {self.seq}; reloading recent transactions")
+        self.seq = await self.store.last_change()
+        self.reload(await self.store.load_recent_rows(self.resync_limit))
+
+    async def _run(self):
+        while True:
+            try:
+                version = await self.store.data_version()
+                if version != self._version:
+                    self._version = version
+                    await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Error following the shared store: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "seq": self.seq,
+            "applied": self.applied,
+            "resyncs": self.resyncs,
+            "seconds_since_change": round(time.time() - self.last_applied, 1) if self.last_applied else None,
+            "last_error": self.last_error
+        }
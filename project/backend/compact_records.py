@@ -0,0 +1,249 @@
+import math
+from array import array
+from collections import Counter
+from datetime import datetime
+from itertools import repeat
+from typing import Callable, Dict, Generic, Hashable, List, Optional, Sequence, Tuple, TypeVar
+
+from models import MEVPattern, MEVTransaction
+
+T = TypeVar("T", bound=Hashable)
+
+# Pattern codes; -1 is "no pattern"
+PATTERNS: Tuple[MEVPattern, ...] = tuple(MEVPattern)
+_PATTERN_CODES: Dict[Optional[str], int] = {pattern: code for code, pattern in enumerate(PATTERNS)}
+
+MICROSECONDS = 1_000_000
+
+
+def _to_micros(timestamp: datetime) -> int:
+    return int(timestamp.timestamp()) * MICROSECONDS + timestamp.microsecond
+
+
+def _timestamp_micros(timestamp: float) -> int:
+    # Same rounding as datetime.fromtimestamp, so both load paths agree
+    fraction, seconds = math.modf(timestamp)
+    return int(seconds) * MICROSECONDS + round(fraction * MICROSECONDS)
+
+
+def _from_micros(micros: int) -> datetime:
+    seconds, microsecond = divmod(micros, MICROSECONDS)
+    return datetime.fromtimestamp(seconds).replace(microsecond=microsecond)
+
+
+class SymbolTable(Generic[T]):
+    """Reference-counted interning of repeated values (wallets, mints, paths, platform sets).
+
+    Each distinct value is stored once and referred to by a small integer id.
+    Ids are released when the last record using them goes away and are then
+    reused, so the table only holds values that are still referenced.
+    """
+
+    def __init__(self):
+        self._ids: Dict[T, int] = {}
+        self._values: List[Optional[T]] = []
+        self._refs = array("i")
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, symbol: int) -> T:
+        return self._values[symbol]
+
+    def lookup(self, value: T) -> Optional[int]:
+        """Id of a value if any record currently uses it"""
+        return self._ids.get(value)
+
+    def intern(self, value: T) -> int:
+        symbol = self._ids.get(value)
+        if symbol is None:
+            if self._free:
+                symbol = self._free.pop()
+                self._values[symbol] = value
+                self._refs[symbol] = 0
+            else:
+                symbol = len(self._values)
+                self._values.append(value)
+                self._refs.append(0)
+            self._ids[value] = symbol
+        self._refs[symbol] += 1
+        return symbol
+
+    def intern_all(self, values: Sequence[Hashable],
+                   convert: Optional[Callable[[Hashable], T]] = None) -> List[int]:
+        """Ids for many values at once, taking one reference each.
+
+        `convert` turns a raw value into the stored one (e.g. a comma-separated
+        string into a tuple); it runs once per distinct value.
+        """
+        symbols: Dict[Hashable, int] = {}
+        for value, count in Counter(values).items():
+            symbol = self.intern(convert(value) if convert else value)
+            self._refs[symbol] += count - 1
+            symbols[value] = symbol
+        return list(map(symbols.__getitem__, values))
+
+    def release(self, symbol: int):
+        self._refs[symbol] -= 1
+        if self._refs[symbol] == 0:
+            del self._ids[self._values[symbol]]
+            self._values[symbol] = None
+            self._free.append(symbol)
+
+
+class TransactionColumns:
+    """Analyzed transactions stored column by column in fixed-size arrays.
+
+    Row `i` of every column belongs to the same transaction. Numbers live in
+    typed arrays (timestamps as integer microseconds), patterns as small codes,
+    and wallets, mints, paths and platform sets as ids into shared symbol
+    tables. Only the signature and the free-text explanation are kept as
+    per-row Python strings. MEVTransaction models are built on demand by
+    `materialize`, e.g. for an API response.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.strings: SymbolTable[str] = SymbolTable()
+        self.platform_sets: SymbolTable[Tuple[str, ...]] = SymbolTable()
+        self.signatures: List[Optional[str]] = [None] * capacity
+        self.explanations: List[str] = [""] * capacity
+        self.timestamps = array("q", bytes(8 * capacity))
+        self.slots = array("q", bytes(8 * capacity))
+        self.gas_used = array("q", bytes(8 * capacity))
+        self.input_amounts = array("d", bytes(8 * capacity))
+        self.output_amounts = array("d", bytes(8 * capacity))
+        self.profits = array("d", bytes(8 * capacity))
+        self.confidences = array("d", bytes(8 * capacity))
+        self.is_mev = array("b", bytes(capacity))
+        self.patterns = array("b", bytes(capacity))
+        self.wallets = array("i", bytes(4 * capacity))
+        self.paths = array("i", bytes(4 * capacity))
+        self.input_tokens = array("i", bytes(4 * capacity))
+        self.output_tokens = array("i", bytes(4 * capacity))
+        self.platforms = array("i", bytes(4 * capacity))
+
+    def write(self, row: int, tx: MEVTransaction):
+        """Store a transaction in an empty row"""
+        strings = self.strings
+        self.signatures[row] = tx.signature
+        self.explanations[row] = tx.explanation
+        self.timestamps[row] = _to_micros(tx.timestamp)
+        self.slots[row] = tx.slot
+        self.gas_used[row] = tx.gas_used
+        self.input_amounts[row] = tx.input_amount
+        self.output_amounts[row] = tx.output_amount
+        self.profits[row] = tx.profit_usdc
+        self.confidences[row] = tx.confidence
+        self.is_mev[row] = tx.is_mev
+        self.patterns[row] = self.pattern_code(tx.pattern)
+        self.wallets[row] = strings.intern(tx.wallet)
+        self.paths[row] = strings.intern(tx.trade_path)
+        self.input_tokens[row] = strings.intern(tx.input_token)
+        self.output_tokens[row] = strings.intern(tx.output_token)
+        self.platforms[row] = self.platform_sets.intern(tuple(tx.platforms))
+
+    def write_values(self, row: int, values: tuple):
+        """Store a persisted row (persistent_store.COLUMNS order) in an empty row.
+
+        Skips building an MEVTransaction, which dominates bulk loads.
+        """
+        (signature, slot, block_time, wallet, trade_path, platforms, input_token, output_token,
+         input_amount, output_amount, profit_usdc, is_mev, pattern, confidence, explanation,
+         gas_used) = values
+        strings = self.strings
+        self.signatures[row] = signature
+        self.explanations[row] = explanation
+        self.timestamps[row] = _timestamp_micros(block_time)
+        self.slots[row] = slot
+        self.gas_used[row] = gas_used
+        self.input_amounts[row] = input_amount
+        self.output_amounts[row] = output_amount
+        self.profits[row] = profit_usdc
+        self.confidences[row] = confidence
+        self.is_mev[row] = 1 if is_mev else 0
+        self.patterns[row] = self.pattern_code(pattern)
+        self.wallets[row] = strings.intern(wallet)
+        self.paths[row] = strings.intern(trade_path)
+        self.input_tokens[row] = strings.intern(input_token)
+        self.output_tokens[row] = strings.intern(output_token)
+        self.platforms[row] = self.platform_sets.intern(tuple(platforms.split(",")) if platforms else ())
+
+    def fill(self, rows: List[tuple]):
+        """Store persisted rows (COLUMNS order) in rows 0..len(rows)-1 of empty columns.
+
+        Works a column at a time, for bulk loads into a new store.
+        """
+        if not rows:
+            return
+        (signatures, slots, block_times, wallets, trade_paths, platforms, input_tokens, output_tokens,
+         input_amounts, output_amounts, profits, is_mev, patterns, confidences, explanations,
+         gas_used) = zip(*rows)
+        count = len(rows)
+        strings = self.strings
+        self.signatures[:count] = signatures
+        self.explanations[:count] = explanations
+        self.timestamps[:count] = array("q", map(_timestamp_micros, block_times))
+        self.slots[:count] = array("q", slots)
+        self.gas_used[:count] = array("q", gas_used)
+        self.input_amounts[:count] = array("d", input_amounts)
+        self.output_amounts[:count] = array("d", output_amounts)
+        self.profits[:count] = array("d", profits)
+        self.confidences[:count] = array("d", confidences)
+        self.is_mev[:count] = array("b", is_mev)
+        self.patterns[:count] = array("b", map(_PATTERN_CODES.get, patterns, repeat(-1, count)))
+        self.wallets[:count] = array("i", strings.intern_all(wallets))
+        self.paths[:count] = array("i", strings.intern_all(trade_paths))
+        self.input_tokens[:count] = array("i", strings.intern_all(input_tokens))
+        self.output_tokens[:count] = array("i", strings.intern_all(output_tokens))
+        self.platforms[:count] = array("i", self.platform_sets.intern_all(
+            platforms, lambda value: tuple(value.split(",")) if value else ()))
+
+    def clear(self, row: int):
+        """Empty a row, releasing its symbols"""
+        strings = self.strings
+        self.signatures[row] = None
+        self.explanations[row] = ""
+        strings.release(self.wallets[row])
+        strings.release(self.paths[row])
+        strings.release(self.input_tokens[row])
+        strings.release(self.output_tokens[row])
+        self.platform_sets.release(self.platforms[row])
+
+    @staticmethod
+    def pattern_code(pattern: Optional[str]) -> int:
+        # MEVPattern is a str enum, so plain values map to the same code
+        return _PATTERN_CODES.get(pattern, -1)
+
+    def pattern(self, row: int) -> Optional[MEVPattern]:
+        code = self.patterns[row]
+        return PATTERNS[code] if code >= 0 else None
+
+    def wallet(self, row: int) -> str:
+        return self.strings[self.wallets[row]]
+
+    def platform_set(self, row: int) -> Tuple[str, ...]:
+        return self.platform_sets[self.platforms[row]]
+
+    def materialize(self, row: int) -> MEVTransaction:
+        """Build the API model for a row; values were validated when written"""
+        strings = self.strings
+        return MEVTransaction.model_construct(
+            signature=self.signatures[row],
+            timestamp=_from_micros(self.timestamps[row]),
+            wallet=strings[self.wallets[row]],
+            trade_path=strings[self.paths[row]],
+            platforms=list(self.platform_sets[self.platforms[row]]),
+            input_token=strings[self.input_tokens[row]],
+            output_token=strings[self.output_tokens[row]],
+            input_amount=self.input_amounts[row],
+            output_amount=self.output_amounts[row],
+            profit_usdc=self.profits[row],
+            is_mev=bool(self.is_mev[row]),
+            pattern=self.pattern(row),
+            confidence=self.confidences[row],
+            explanation=self.explanations[row],
+            gas_used=self.gas_used[row],
+            slot=self.slots[row]
+        )
@@ -0,0 +1,151 @@
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting from the environment"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Monitoring loop
+POLL_INTERVAL = _env_float("MEV_POLL_INTERVAL", 5.0)
+SIGNATURE_LIMIT = _env_int("MEV_SIGNATURE_LIMIT", 50)
+
+# Analysis pipeline (concurrency per stage and bounded queue sizes between stages)
+FETCH_CONCURRENCY = _env_int("MEV_FETCH_CONCURRENCY", 16)
+DECODE_CONCURRENCY = _env_int("MEV_DECODE_CONCURRENCY", 4)
+DETECT_CONCURRENCY = _env_int("MEV_DETECT_CONCURRENCY", 4)
+FETCH_QUEUE_SIZE = _env_int("MEV_FETCH_QUEUE_SIZE", 1000)
+DECODE_QUEUE_SIZE = _env_int("MEV_DECODE_QUEUE_SIZE", 256)
+DETECT_QUEUE_SIZE = _env_int("MEV_DETECT_QUEUE_SIZE", 256)
+
+# RPC endpoints (comma-separated), with per-endpoint defaults: HTTP requests per second
+# (a batch counts once), connection pool size, starting concurrency limit and timeout.
+# MEV_RPC_ENDPOINTS_PATH points at a JSON list of {"url", "rate_limit", "max_connections", ...}
+# objects for per-endpoint settings and replaces MEV_RPC_URLS.
+RPC_URLS = [url.strip() for url in os.getenv("MEV_RPC_URLS", "https://api.mainnet-beta.solana.com").split(",") if url.strip()]
+RPC_ENDPOINTS_PATH = os.getenv("MEV_RPC_ENDPOINTS_PATH", "")
+RPC_RATE_LIMIT = _env_float("MEV_RPC_RATE_LIMIT", 10.0)
+RPC_MAX_CONNECTIONS = _env_int("MEV_RPC_MAX_CONNECTIONS", 20)
+RPC_INITIAL_CONCURRENCY = _env_int("MEV_RPC_INITIAL_CONCURRENCY", 4)
+RPC_TIMEOUT = _env_float("MEV_RPC_TIMEOUT", 30.0)
+# Consecutive failures before an endpoint is ejected, and the first ejection period (doubles up to a minute)
+RPC_EJECT_AFTER = _env_int("MEV_RPC_EJECT_AFTER", 3)
+RPC_EJECT_SECONDS = _env_float("MEV_RPC_EJECT_SECONDS", 5.0)
+
+# Retries: attempts per request, jittered exponential backoff, and the budget capping
+# retries (and hedges) at a fraction of requests plus a small per-second allowance
+RPC_RETRY_MAX_ATTEMPTS = _env_int("MEV_RPC_RETRY_MAX_ATTEMPTS", 3)
+RPC_RETRY_BASE_DELAY_MS = _env_float("MEV_RPC_RETRY_BASE_DELAY_MS", 50.0)
+RPC_RETRY_MAX_DELAY_MS = _env_float("MEV_RPC_RETRY_MAX_DELAY_MS", 2000.0)
+RPC_RETRY_BUDGET_RATIO = _env_float("MEV_RPC_RETRY_BUDGET_RATIO", 0.1)
+RPC_RETRY_BUDGET_MIN_PER_SECOND = _env_float("MEV_RPC_RETRY_BUDGET_MIN_PER_SECOND", 5.0)
+
+# Hedging: duplicate a request to a second endpoint once it has taken longer than this
+# percentile of recent latencies for its method
+RPC_HEDGE_ENABLED = _env_bool("MEV_RPC_HEDGE_ENABLED", False)
+RPC_HEDGE_PERCENTILE = _env_float("MEV_RPC_HEDGE_PERCENTILE", 0.95)
+
+# JSON-RPC batching: concurrent calls within the window are merged into one array request
+RPC_BATCH_ENABLED = _env_bool("MEV_RPC_BATCH_ENABLED", True)
+RPC_BATCH_WINDOW_MS = _env_float("MEV_RPC_BATCH_WINDOW_MS", 5.0)
+RPC_BATCH_MAX_SIZE = _env_int("MEV_RPC_BATCH_MAX_SIZE", 100)
+
+# In-memory transaction store retention (ring buffer capacity)
+STORE_CAPACITY = _env_int("MEV_STORE_CAPACITY", 100_000)
+
+# Persistent SQLite archive of analyzed transactions
+PERSIST_ENABLED = _env_bool("MEV_PERSIST_ENABLED", True)
+DB_PATH = os.getenv("MEV_DB_PATH", "mev_transactions.db")
+PERSIST_BATCH_SIZE = _env_int("MEV_PERSIST_BATCH_SIZE", 500)
+PERSIST_FLUSH_INTERVAL = _env_float("MEV_PERSIST_FLUSH_INTERVAL", 1.0)
+
+# Multi-process deployment: "standalone" runs everything in one process; with "auto" every
+# uvicorn worker serves the API, one of them (whoever takes the lock file) also ingests, and
+# the rest follow its writes through the SQLite change log; "leader" and "api" pin a role
+ROLE = os.getenv("MEV_ROLE", "standalone")
+LEADER_LOCK_PATH = os.getenv("MEV_LEADER_LOCK_PATH", "mev_leader.lock")
+CHANGE_LOG_SIZE = _env_int("MEV_CHANGE_LOG_SIZE", 100_000)
+FOLLOW_INTERVAL_MS = _env_float("MEV_FOLLOW_INTERVAL_MS", 100.0)
+LEADER_STATUS_INTERVAL = _env_float("MEV_LEADER_STATUS_INTERVAL", 1.0)
+
+# Raw transaction cache (in-memory LRU + compressed on-disk tier)
+TX_CACHE_ENABLED = _env_bool("MEV_TX_CACHE_ENABLED", True)
+TX_CACHE_DIR = os.getenv("MEV_TX_CACHE_DIR", "tx_cache")
+TX_CACHE_MEMORY_ENTRIES = _env_int("MEV_TX_CACHE_MEMORY_ENTRIES", 10_000)
+TX_CACHE_DISK_MB = _env_int("MEV_TX_CACHE_DISK_MB", 1024)
+
+# Token prices: "jupiter" for live prices, "stub" for the static offline table
+PRICE_SOURCE = os.getenv("MEV_PRICE_SOURCE", "jupiter")
+PRICE_TTL = _env_float("MEV_PRICE_TTL", 30.0)
+PRICE_REFRESH_INTERVAL = _env_float("MEV_PRICE_REFRESH_INTERVAL", 5.0)
+# Mints not looked up for this many seconds stop being refreshed and are dropped from the cache
+PRICE_IDLE_TTL = _env_float("MEV_PRICE_IDLE_TTL", 600.0)
+
+# Worker processes for decode + detect; 0 runs analysis on the event loop
+ANALYSIS_PROCESSES = _env_int("MEV_ANALYSIS_PROCESSES", 0)
+
+# getTransaction encoding: "jsonParsed" or the much smaller "base64" wire format
+TX_ENCODING = os.getenv("MEV_TX_ENCODING", "jsonParsed")
+
+# WebSocket fan-out: per-client send queue; clients that fill it are disconnected
+WS_QUEUE_SIZE = _env_int("MEV_WS_QUEUE_SIZE", 100)
+
+# Ingestion: "signatures" polls getSignaturesForAddress, "blocks" follows slots with getBlock,
+# "stream" subscribes to program logs over the RPC WebSocket and polls signatures only to fill gaps
+INGEST_MODE = os.getenv("MEV_INGEST_MODE", "signatures")
+BLOCK_POLL_INTERVAL = _env_float("MEV_BLOCK_POLL_INTERVAL", 0.4)
+BLOCK_FETCH_CONCURRENCY = _env_int("MEV_BLOCK_FETCH_CONCURRENCY", 4)
+BLOCK_MAX_SLOTS_PER_POLL = _env_int("MEV_BLOCK_MAX_SLOTS_PER_POLL", 50)
+# Polls a slot's block may fail on before block mode gives up on it and moves past it
+BLOCK_MAX_ATTEMPTS = _env_int("MEV_BLOCK_MAX_ATTEMPTS", 5)
+
+# Stream ingestion: PubSub URL (default: the first RPC URL with ws:// or wss://), how often
+# signatures are polled to catch anything the stream missed, and the longest reconnect backoff
+RPC_WS_URL = os.getenv("MEV_RPC_WS_URL", "")
+STREAM_BACKFILL_INTERVAL = _env_float("MEV_STREAM_BACKFILL_INTERVAL", 30.0)
+STREAM_RECONNECT_MAX_DELAY = _env_float("MEV_STREAM_RECONNECT_MAX_DELAY", 30.0)
+
+# Cross-transaction detection window (sandwiches, backruns): slots kept and swaps per slot
+SWAP_INDEX_SLOTS = _env_int("MEV_SWAP_INDEX_SLOTS", 150)
+SWAP_INDEX_MAX_PER_SLOT = _env_int("MEV_SWAP_INDEX_MAX_PER_SLOT", 20_000)
+
+# Signature polling cursors: page size (RPC max 1000), pages per poll, and where positions are saved
+SIGNATURE_PAGE_SIZE = _env_int("MEV_SIGNATURE_PAGE_SIZE", 1000)
+SIGNATURE_MAX_PAGES = _env_int("MEV_SIGNATURE_MAX_PAGES", 10)
+CURSOR_PATH = os.getenv("MEV_CURSOR_PATH", "signature_cursors.json")
+
+# Optional JSON file adding DEX programs, log patterns and token mints to the built-in registry
+REGISTRY_PATH = os.getenv("MEV_REGISTRY_PATH", "")
+
+# Optional JSON file replacing the built-in detection rules; checked for changes every RULES_RELOAD_INTERVAL seconds
+RULES_PATH = os.getenv("MEV_RULES_PATH", "")
+RULES_RELOAD_INTERVAL = _env_float("MEV_RULES_RELOAD_INTERVAL", 5.0)
+
+# On-demand profiling (POST /api/admin/profile): off unless enabled, and the longest window allowed
+PROFILING_ENABLED = _env_bool("MEV_PROFILING_ENABLED", False)
+PROFILE_MAX_SECONDS = _env_float("MEV_PROFILE_MAX_SECONDS", 60.0)
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import random
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+import logging
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+
+def websocket_url(http_url: str) -> str:
+    """The PubSub URL of an RPC node from its HTTP URL (same host and path)"""
+    if http_url.startswith("https://"):
+        return "wss://" + http_url[len("https://"):]
+    if http_url.startswith("http://"):
+        return "ws://" + http_url[len("http://"):]
+    return http_url
+
+
+class LogSubscriber:
+    """Signatures of new transactions mentioning any of `programs`, pushed over RPC PubSub.
+
+    One WebSocket connection carries a `logsSubscribe` per program (the
+    `mentions` filter takes a single address). Failed transactions are
+    skipped, and a transaction mentioning several programs is yielded once.
+    If the connection drops it is re-opened with a jittered exponential
+    backoff and every subscription is made again; `on_connect` is called
+    once all of them are acknowledged so the caller can backfill anything
+    published while it was away, which the stream itself never replays.
+    """
+
+    def __init__(self, url: str, programs: List[str],
+                 commitment: str = "confirmed",
+                 max_backoff: float = 30.0,
+                 recent_size: int = 10_000,
+                 on_connect: Optional[Callable[[], None]] = None,
+                 on_slot: Optional[Callable[[int], None]] = None):
+        self.url = url
+        self.programs = list(programs)
+        self.commitment = commitment
+        self.max_backoff = max_backoff
+        self.recent_size = recent_size
+        self.on_connect = on_connect
+        self.on_slot = on_slot
+
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._pending: Dict[int, str] = {}
+        self.subscriptions: Dict[int, str] = {}
+
+        self.connected = False
+        self.connects = 0
+        self.disconnects = 0
+        self.notifications = 0
+        self.duplicates = 0
+        self.failed_transactions = 0
+        self.last_notification: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    async def signatures(self) -> AsyncIterator[str]:
+        """Yield signatures as they are published, reconnecting for as long as it is iterated"""
+        failures = 0
+        while True:
+            try:
+                async with websockets.connect(self.url, open_timeout=10, ping_interval=20, ping_timeout=20,
+                                              max_size=2 ** 24) as connection:
+                    await self._subscribe(connection)
+                    async for message in connection:
+                        signature = self._handle(message)
+                        if not self.connected and not self._pending:
+                            # Only a connection whose every logsSubscribe was
+                            # acknowledged counts; a node rejecting them keeps backing off
+                            self.connected = True
+                            self.connects += 1
+                            failures = 0
+                            logger.info(f"Subscribed to logs of {len(self.programs)} programs at {self.url}")
+                            if self.on_connect:
+                                self.on_connect()
+                        if signature is not None:
+                            yield signature
+                    raise ConnectionError("Server closed the connection")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e) or type(e).__name__
+                failures += 1
+                if self.connected:
+                    self.disconnects += 1
+                delay = random.uniform(0, min(self.max_backoff, 0.5 * 2 ** (failures - 1)))
+                logger.warning(f"Log subscription to {self.url} lost ({self.last_error}); "
+                               f"reconnecting in {delay:.1f}s")
+            finally:
+                self.connected = False
+                self.subscriptions.clear()
+                self._pending.clear()
+            await asyncio.sleep(delay)
+
+    async def _subscribe(self, connection):
+        for request_id, program in enumerate(self.programs, start=1):
+            self._pending[request_id] = program
+            await connection.send(json.dumps({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": "logsSubscribe",
+                "params": [{"mentions": [program]}, {"commitment": self.commitment}]
+            }))
+
+    def _handle(self, message: Any) -> Optional[str]:
+        """The new signature a message announces, if any"""
+        data = json.loads(message)
+        if "id" in data:
+            program = self._pending.pop(data["id"], None)
+            if "error" in data:
+                raise ConnectionError(f"logsSubscribe for {program} failed: {data['error']}")
+            if program is not None:
+                self.subscriptions[data["result"]] = program
+            return None
+        if data.get("method") != "logsNotification":
+            return None
+
+        self.notifications += 1
+        self.last_notification = time.time()
+        result = data["params"]["result"]
+        slot = (result.get("context") or {}).get("slot")
+        if slot is not None and self.on_slot:
+            self.on_slot(slot)
+        value = result.get("value") or {}
+        if value.get("err") is not None:
+            self.failed_transactions += 1
+            return None
+        signature = value.get("signature")
+        if not signature:
+            return None
+        if signature in self._recent:
+            self.duplicates += 1
+            return None
+        self._recent[signature] = None
+        if len(self._recent) > self.recent_size:
+            self._recent.popitem(last=False)
+        return signature
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "connected": self.connected,
+            "subscriptions": len(self.subscriptions),
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "notifications": self.notifications,
+            "duplicates": self.duplicates,
+            "failed_transactions": self.failed_transactions,
+            "seconds_since_notification": round(time.time() - self.last_notification, 1)
+            if self.last_notification else None,
+            "last_error": self.last_error
+        }
@@ -1,18 +1,33 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 import asyncio
 import json
+import os
+from collections import deque
 import time
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 import logging
 from contextual_logging import setup_logging
 
+import config
+import metrics
+
 from models import MEVTransaction, TransactionAnalysis, MEVPattern
 from solana_client import SolanaClient
 from mev_detector import MEVDetector
+from swap_index import SwapIndex
 from transaction_decoder import TransactionDecoder
+from pipeline import AnalysisPipeline, build_mev_transaction
+from transaction_store import TransactionStore
+from persistent_store import PersistentStore
+from price_service import PriceService, JupiterPriceSource, StubPriceSource
+from analysis_workers import AnalysisPool
+from tx_cache import TransactionData
+from broadcast import BroadcastHub, encode_message
+from profiling import ProfileSession
+from cluster import LeaderLock, StoreFollower
 
 # Setup logging
 setup_logging()
@@ -31,17 +46,187 @@ app.add_middleware(
 
 # Global state
 solana_client = SolanaClient()
-mev_detector = MEVDetector()
+price_service = PriceService(
+    StubPriceSource() if config.PRICE_SOURCE == "stub" else JupiterPriceSource(solana_client),
+    default_ttl=config.PRICE_TTL,
+    refresh_interval=config.PRICE_REFRESH_INTERVAL,
+    idle_ttl=config.PRICE_IDLE_TTL
+)
+mev_detector = MEVDetector(
+    price_service,
+    SwapIndex(max_slots=config.SWAP_INDEX_SLOTS, max_swaps_per_slot=config.SWAP_INDEX_MAX_PER_SLOT)
+)
+analysis_pool = AnalysisPool(config.ANALYSIS_PROCESSES, price_service) if config.ANALYSIS_PROCESSES > 0 else None
 transaction_decoder = TransactionDecoder()
-recent_transactions: List[MEVTransaction] = []
+transaction_store = TransactionStore(capacity=config.STORE_CAPACITY)
+broadcast_hub = BroadcastHub(queue_size=config.WS_QUEUE_SIZE)
+# Multi-process deployment (cluster.py): workers share state through the SQLite store
+clustered = config.ROLE in ("auto", "leader", "api") and config.PERSIST_ENABLED
+persistent_store = PersistentStore(
+    config.DB_PATH,
+    batch_size=config.PERSIST_BATCH_SIZE,
+    flush_interval=config.PERSIST_FLUSH_INTERVAL,
+    change_log_size=config.CHANGE_LOG_SIZE if clustered else 0
+) if config.PERSIST_ENABLED else None
+leader_lock = LeaderLock(config.LEADER_LOCK_PATH) if clustered else None
+is_leader = not clustered
+cluster_task = None
+monitor_task = None
+profile_session = ProfileSession(max_seconds=config.PROFILE_MAX_SECONDS)
+log_subscriber = None
 is_monitoring = False
 
+# Newest analyzed transaction, for ingestion lag
+newest_analyzed_slot: Optional[int] = None
+newest_analyzed_time: Optional[float] = None
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize connections and start background monitoring"""
-    await solana_client.initialize()
+    global cluster_task
+    if config.ROLE != "standalone" and not clustered:
+        logger.warning(f"MEV_ROLE={config.ROLE} needs the persistent store (or is unknown); running standalone")
+    # In cluster mode the on-disk transaction cache belongs to the leader (see _lead)
+    await solana_client.initialize(open_cache=not clustered)
+    price_service.start()
+    if analysis_pool:
+        solana_client.use_raw_transactions(analysis_pool.split_response)
+    if analysis_pool and not clustered:
+        analysis_pool.start()
+    since = 0
+    if persistent_store:
+        await persistent_store.open()
+        # Changes committed after this point are replayed on top of what is loaded below
+        if clustered:
+            since = await persistent_store.last_change()
+        # Warm restart: rehydrate the in-memory window from disk
+        transaction_store.extend_rows(await persistent_store.load_recent_rows(transaction_store.capacity))
+    if clustered:
+        store_follower.start(since)
+        if config.ROLE != "api":
+            cluster_task = asyncio.create_task(_lead(), name="cluster-leader")
+        logger.info(f"Running as {config.ROLE} worker (pid {os.getpid()})")
     logger.info("Solana MEV Decoder started successfully")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop monitoring and release connections"""
+    global is_monitoring
+    is_monitoring = False
+    if cluster_task:
+        cluster_task.cancel()
+        await asyncio.gather(cluster_task, return_exceptions=True)
+    if store_follower:
+        await store_follower.stop()
+    await analysis_pipeline.stop()
+    await price_service.stop()
+    if analysis_pool:
+        analysis_pool.shutdown()
+    if persistent_store:
+        await persistent_store.close()
+    if leader_lock:
+        leader_lock.release()
+    await solana_client.close()
+
+def remember_transaction(tx: MEVTransaction) -> bool:
+    """Add an analyzed transaction to the in-memory store and queue it for disk"""
+    if not transaction_store.add(tx):
+        return False
+    if persistent_store:
+        persistent_store.enqueue(tx)
+    broadcast_hub.publish(tx)
+    return True
+
+def reclassify_transaction(signature: str, finding: Dict[str, Any]):
+    """Relabel a stored transaction once a later one reveals the pattern it belongs to"""
+    tx = transaction_store.get(signature)
+    if tx is None:
+        return
+    updated = tx.model_copy(update={
+        "is_mev": True,
+        "pattern": finding["pattern"],
+        "confidence": finding["confidence"],
+        "explanation": finding["explanation"]
+    })
+    transaction_store.replace(updated)
+    if persistent_store:
+        persistent_store.enqueue(updated)
+    broadcast_hub.publish(updated)
+    logger.info(f"Reclassified transaction {signature} as {finding['pattern'].value}")
+
+async def submit_transaction(tx: MEVTransaction):
+    """remember_transaction for a transaction analyzed on request rather than by ingestion.
+    
+    In cluster mode only the leader writes, so other workers hand it over and
+    get it back through the change log like any other write.
+    """
+    if is_leader:
+        remember_transaction(tx)
+    else:
+        await persistent_store.submit(tx)
+
+def follow_transaction(tx: MEVTransaction):
+    """Apply a transaction the leader wrote to this worker's in-memory store"""
+    existing = transaction_store.get(tx.signature)
+    if existing is None:
+        transaction_store.add(tx)
+    elif existing == tx:
+        return
+    else:
+        transaction_store.replace(tx)
+    broadcast_hub.publish(tx)
+
+def reload_transactions(rows: List[tuple]):
+    """Replace this worker's in-memory store with the newest persisted rows"""
+    transaction_store.clear()
+    transaction_store.extend_rows(rows)
+
+store_follower = StoreFollower(
+    persistent_store,
+    follow_transaction,
+    reload_transactions,
+    poll_interval=config.FOLLOW_INTERVAL_MS / 1000.0,
+    resync_limit=config.STORE_CAPACITY
+) if clustered else None
+
+async def _lead():
+    """Cluster mode: wait for the leader lock, then run ingestion for the rest of the process.
+    
+    Until then this worker only serves the API. Once it holds the lock it
+    applies the previous leader's last writes, stops following (its own
+    writes go straight into memory) and takes over the on-disk transaction
+    cache. From then on it stores what other workers submit, starts and
+    stops monitoring to match the shared switch any worker can flip, and
+    publishes its status for the other workers to report.
+    """
+    global is_leader, is_monitoring, monitor_task
+    while not leader_lock.acquire():
+        await asyncio.sleep(config.LEADER_STATUS_INTERVAL)
+    await store_follower.stop()
+    await store_follower.sync()
+    is_leader = True
+    if analysis_pool:
+        analysis_pool.start()
+    if solana_client.tx_cache:
+        await solana_client.tx_cache.open()
+    logger.info(f"Became the ingestion leader (pid {os.getpid()})")
+    
+    while True:
+        try:
+            for tx in await persistent_store.take_submissions():
+                remember_transaction(tx)
+            wanted = await persistent_store.get_state("monitoring") == "on"
+            if wanted and not is_monitoring and (monitor_task is None or monitor_task.done()):
+                is_monitoring = True
+                monitor_task = asyncio.create_task(monitor_transactions(), name="monitor")
+            elif not wanted:
+                is_monitoring = False
+            status = dict(_monitoring_status(), published=time.time())
+            await persistent_store.set_state("leader_status", json.dumps(status, default=str))
+        except Exception as e:
+            logger.error(f"Error in cluster leader loop: {e}")
+        await asyncio.sleep(config.LEADER_STATUS_INTERVAL)
+
 @app.get("/")
 async def root():
     return {"message": "Solana MEV Trade Decoder API", "status": "running"}
@@ -51,32 +236,30 @@ async def get_recent_transactions(
     limit: int = 50,
     is_mev: Optional[bool] = None,
     pattern: Optional[str] = None,
-    min_profit: Optional[float] = None
+    min_profit: Optional[float] = None,
+    wallet: Optional[str] = None,
+    platform: Optional[str] = None
 ):
     """Get recent transactions with optional filters"""
-    filtered_transactions = recent_transactions.copy()
-    
-    if is_mev is not None:
-        filtered_transactions = [tx for tx in filtered_transactions if tx.is_mev == is_mev]
-    
-    if pattern:
-        filtered_transactions = [tx for tx in filtered_transactions if tx.pattern == pattern]
-    
-    if min_profit is not None:
-        filtered_transactions = [tx for tx in filtered_transactions if tx.profit_usdc >= min_profit]
-    
-    return filtered_transactions[:limit]
+    return transaction_store.query(
+        limit=limit,
+        is_mev=is_mev,
+        pattern=pattern,
+        min_profit=min_profit,
+        wallet=wallet,
+        platform=platform
+    )
 
 @app.get("/api/transactions/{signature}", response_model=MEVTransaction)
 async def get_transaction_details(signature: str):
     """Get detailed information about a specific transaction"""
-    tx = next((t for t in recent_transactions if t.signature == signature), None)
+    tx = transaction_store.get(signature)
     if not tx:
         # Try to fetch and analyze the transaction
         try:
             tx = await analyze_transaction(signature)
             if tx:
-                recent_transactions.insert(0, tx)
+                await submit_transaction(tx)
             else:
                 raise HTTPException(status_code=404, detail="Transaction not found")
         except Exception as e:
@@ -84,46 +267,49 @@ async def get_transaction_details(signature: str):
     
     return tx
 
+@app.get("/api/history", response_model=List[MEVTransaction])
+async def get_transaction_history(
+    limit: int = 100,
+    slot_min: Optional[int] = None,
+    slot_max: Optional[int] = None,
+    wallet: Optional[str] = None,
+    pattern: Optional[str] = None,
+    min_profit: Optional[float] = None,
+    max_profit: Optional[float] = None
+):
+    """Query the full persisted history by slot range, wallet, pattern and profit"""
+    if not persistent_store:
+        raise HTTPException(status_code=404, detail="Persistent store is disabled")
+    return await persistent_store.query(
+        limit=limit,
+        slot_min=slot_min,
+        slot_max=slot_max,
+        wallet=wallet,
+        pattern=pattern,
+        min_profit=min_profit,
+        max_profit=max_profit
+    )
+
 @app.get("/api/stats")
 async def get_mev_stats():
     """Get MEV statistics from recent transactions"""
-    total_transactions = len(recent_transactions)
-    mev_transactions = [tx for tx in recent_transactions if tx.is_mev]
-    total_mev = len(mev_transactions)
-    
-    if total_transactions == 0:
-        return {
-            "total_transactions": 0,
-            "mev_transactions": 0,
-            "mev_percentage": 0,
-            "total_profit": 0,
-            "avg_profit": 0,
-            "patterns": {}
-        }
-    
-    total_profit = sum(tx.profit_usdc for tx in mev_transactions)
-    avg_profit = total_profit / max(total_mev, 1)
-    
-    # Pattern breakdown
-    patterns = {}
-    for tx in mev_transactions:
-        if tx.pattern:
-            patterns[tx.pattern] = patterns.get(tx.pattern, 0) + 1
+    stats = transaction_store.aggregates.snapshot()
+    if stats["total_transactions"] == 0:
+        return stats
     
-    return {
-        "total_transactions": total_transactions,
-        "mev_transactions": total_mev,
-        "mev_percentage": (total_mev / total_transactions) * 100,
-        "total_profit": round(total_profit, 4),
-        "avg_profit": round(avg_profit, 4),
-        "patterns": patterns,
-        "last_updated": datetime.now().isoformat()
-    }
+    stats["last_updated"] = datetime.now().isoformat()
+    return stats
 
 @app.post("/api/monitor/start")
 async def start_monitoring(background_tasks: BackgroundTasks):
     """Start real-time MEV monitoring"""
     global is_monitoring
+    if clustered:
+        # Any worker can flip the shared switch; the leader acts on it within LEADER_STATUS_INTERVAL
+        if await persistent_store.get_state("monitoring") == "on":
+            return {"status": "Already monitoring"}
+        await persistent_store.set_state("monitoring", "on")
+        return {"status": "Monitoring started"}
     if not is_monitoring:
         is_monitoring = True
         background_tasks.add_task(monitor_transactions)
@@ -134,46 +320,395 @@ async def start_monitoring(background_tasks: BackgroundTasks):
 async def stop_monitoring():
     """Stop real-time MEV monitoring"""
     global is_monitoring
+    if clustered:
+        await persistent_store.set_state("monitoring", "off")
     is_monitoring = False
     return {"status": "Monitoring stopped"}
 
 @app.get("/api/monitor/status")
 async def get_monitoring_status():
-    """Get current monitoring status"""
+    """Get current monitoring status.
+    
+    In cluster mode a worker that is not the leader reports ingestion as
+    last published by the leader, with its own store, WebSocket and cluster
+    details.
+    """
+    if not clustered or is_leader:
+        return _monitoring_status()
+    published = await persistent_store.get_state("leader_status")
+    status = json.loads(published) if published else {"is_monitoring": False}
+    published_at = status.pop("published", None)
+    leader = status.get("cluster") or {}
+    status.update(
+        recent_transaction_count=len(transaction_store),
+        websocket=broadcast_hub.stats(),
+        profiling=profile_session.stats() if config.PROFILING_ENABLED else None,
+        cluster=dict(_cluster_status(), leader_pid=leader.get("pid"),
+                     leader_status_age_seconds=round(time.time() - published_at, 1) if published_at else None)
+    )
+    return status
+
+def _cluster_status() -> Optional[Dict[str, Any]]:
+    if not clustered:
+        return None
+    return {
+        "role": config.ROLE,
+        "leader": is_leader,
+        "pid": os.getpid(),
+        "follower": store_follower.stats()
+    }
+
+def _monitoring_status() -> Dict[str, Any]:
     return {
         "is_monitoring": is_monitoring,
-        "recent_transaction_count": len(recent_transactions)
+        "recent_transaction_count": len(transaction_store),
+        "pipeline": analysis_pipeline.stats(),
+        "analysis_pool": analysis_pool.stats() if analysis_pool else None,
+        "rpc": solana_client.pool.stats() if solana_client.pool else None,
+        "rpc_batch": solana_client.batcher.stats() if solana_client.batcher else None,
+        "rpc_raw_batch": solana_client.raw_batcher.stats() if solana_client.raw_batcher else None,
+        "signature_cursors": solana_client.signature_cursors.stats(),
+        "log_subscription": log_subscriber.stats() if log_subscriber else None,
+        "swap_index": mev_detector.swap_index.stats(),
+        "websocket": broadcast_hub.stats(),
+        "profiling": profile_session.stats() if config.PROFILING_ENABLED else None,
+        "cluster": _cluster_status()
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics (text exposition format)"""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.post("/api/admin/profile")
+async def profile_event_loop(seconds: float = 10.0, mode: str = "sample", interval_ms: float = 5.0):
+    """Profile the event loop (monitor loop, pipeline and request handlers) for a window.
+    
+    mode=sample returns collapsed stacks of running code and of where tasks
+    are awaiting; mode=cprofile returns a pstats file. Disabled unless
+    MEV_PROFILING_ENABLED is set.
+    """
+    if not config.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (MEV_PROFILING_ENABLED)")
+    try:
+        data = await profile_session.run(seconds, mode=mode, interval=interval_ms / 1000.0)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if mode == "sample":
+        filename, media_type = "profile.collapsed.txt", "text/plain"
+    else:
+        filename, media_type = "profile.pstats", "application/octet-stream"
+    return Response(content=data, media_type=media_type,
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.get("/api/rules")
+async def get_detection_rules():
+    """Detection rules in effect, with per-rule hit rates and time spent.
+    
+    With analysis worker processes, detection (and these counters) happens in
+    the workers; this reports what ran in the API process.
+    """
+    return mev_detector.rule_engine.stats()
+
+@app.post("/api/rules/reload")
+async def reload_detection_rules():
+    """Reload MEV_RULES_PATH now instead of waiting for the change check"""
+    rule_engine = mev_detector.rule_engine
+    if not rule_engine.path:
+        raise HTTPException(status_code=404, detail="No rules file configured (MEV_RULES_PATH)")
+    if not rule_engine.reload():
+        raise HTTPException(status_code=400, detail=f"Invalid rules file: {rule_engine.last_error}")
+    return {"status": "Rules reloaded", "version": rule_engine.version, "rules": len(rule_engine.rules)}
+
 async def monitor_transactions():
     """Background task to monitor and analyze new transactions"""
-    logger.info("Starting MEV transaction monitoring")
+    logger.info(f"Starting MEV transaction monitoring ({config.INGEST_MODE} mode)")
+    analysis_pipeline.start()
+    
+    try:
+        if config.INGEST_MODE == "blocks":
+            await _monitor_blocks()
+        elif config.INGEST_MODE == "stream":
+            await _monitor_stream()
+        else:
+            await _monitor_signatures()
+    finally:
+        await analysis_pipeline.stop()
+    
+    logger.info("MEV monitoring stopped")
+
+async def _monitor_signatures(interval: float = config.POLL_INTERVAL, wake: Optional[asyncio.Event] = None):
+    """Poll new signatures of known DEX programs and fetch each transaction.
+    
+    Polls every `interval` seconds, or as soon as `wake` is set. While gaps
+    are open it polls again right away, as long as the last poll got pages
+    without errors; after a failed poll it waits, doubling the wait (up to
+    8 intervals) while polls keep failing.
+    """
+    cursors = solana_client.signature_cursors
+    # Resume from the last saved positions; anything past them was discarded
+    # with the pipeline when monitoring last stopped
+    cursors.load()
+    # Cursor positions after each poll, with the signatures that poll submitted.
+    # A position is saved only once everything up to it has left the pipeline,
+    # so a restart never skips signatures that were still queued.
+    checkpoints = deque()
+    failed_polls = 0
     
     while is_monitoring:
         try:
-            # Get recent signatures from known DEX programs
-            signatures = await solana_client.get_recent_signatures()
+            saved = None
+            while checkpoints and not any(analysis_pipeline.is_pending(sig) for sig in checkpoints[0][1]):
+                saved = checkpoints.popleft()[0]
+            if saved is not None:
+                cursors.save(saved)
+            
+            # Get the signatures that are new since the last poll
+            pages, errors = cursors.totals()
+            signatures = await solana_client.get_recent_signatures(limit=config.SIGNATURE_LIMIT)
+            pages_after, errors_after = cursors.totals()
+            failed_polls = 0 if pages_after > pages and errors_after == errors else failed_polls + 1
             
-            # Analyze each signature
-            for signature in signatures[:10]:  # Limit to prevent overwhelming
-                if not any(tx.signature == signature for tx in recent_transactions):
-                    try:
-                        mev_tx = await analyze_transaction(signature)
-                        if mev_tx:
-                            recent_transactions.insert(0, mev_tx)
-                            # Keep only recent 1000 transactions
-                            recent_transactions[:] = recent_transactions[:1000]
-                            logger.info(f"Analyzed transaction {signature}: MEV={mev_tx.is_mev}, Profit=${mev_tx.profit_usdc:.4f}")
-                    except Exception as e:
-                        logger.error(f"Error analyzing transaction {signature}: {e}")
+            # Queue every unseen signature; the pipeline bounds the work in flight
+            submitted = []
+            for signature in signatures:
+                if not is_monitoring:
+                    break
+                if signature in transaction_store:
+                    continue
+                if await analysis_pipeline.submit(signature):
+                    submitted.append(signature)
+            checkpoints.append((cursors.snapshot(), submitted))
             
-            await asyncio.sleep(5)  # Check every 5 seconds
+            # Keep going without a pause while catching up on a backlog, unless the RPC is failing
+            if failed_polls:
+                await _sleep_or_wake(interval * min(8, 2 ** (failed_polls - 1)), wake)
+            elif not cursors.has_gaps():
+                await _sleep_or_wake(interval, wake)
             
         except Exception as e:
             logger.error(f"Error in monitoring loop: {e}")
             await asyncio.sleep(10)
+
+async def _sleep_or_wake(seconds: float, wake: Optional[asyncio.Event]):
+    if wake is None:
+        await asyncio.sleep(seconds)
+        return
+    try:
+        await asyncio.wait_for(wake.wait(), timeout=seconds)
+    except asyncio.TimeoutError:
+        pass
+    wake.clear()
+
+async def _monitor_stream():
+    """Analyze signatures pushed by logsSubscribe as they arrive.
     
-    logger.info("MEV monitoring stopped")
+    The stream has no replay, so signature polling keeps running in the
+    background at a slow pace, and immediately after every (re)connect, to
+    pick up whatever the stream missed; signatures already stored or in the
+    pipeline are skipped.
+    """
+    global log_subscriber
+    backfill = asyncio.Event()
+    log_subscriber = solana_client.log_subscriber(on_connect=backfill.set)
+    poller = asyncio.ensure_future(_monitor_signatures(config.STREAM_BACKFILL_INTERVAL, backfill))
+    stream = log_subscriber.signatures()
+    try:
+        async for signature in stream:
+            if not is_monitoring:
+                break
+            if signature in transaction_store:
+                continue
+            await analysis_pipeline.submit(signature)
+    finally:
+        await stream.aclose()
+        poller.cancel()
+        await asyncio.gather(poller, return_exceptions=True)
+
+async def _monitor_blocks():
+    """Follow confirmed slots and pull every DEX transaction from each block.
+    
+    Slots are handed to the pipeline in order and `next_slot` only moves past
+    slots that were handled, so a block that could not be fetched is asked
+    for again on the next poll (after a pause), up to BLOCK_MAX_ATTEMPTS polls.
+    """
+    next_slot = None
+    failed_attempts: Dict[int, int] = {}
+    block_limiter = asyncio.Semaphore(config.BLOCK_FETCH_CONCURRENCY)
+    
+    async def fetch_block(slot: int) -> Optional[List[tuple]]:
+        # Any error counts as a failed poll of this slot, so a block that keeps
+        # failing is given up on after BLOCK_MAX_ATTEMPTS instead of stalling ingestion
+        try:
+            async with block_limiter:
+                return await solana_client.get_dex_block_transactions(slot)
+        except Exception as e:
+            logger.error(f"Error reading block {slot}: {e}")
+            return None
+    
+    while is_monitoring:
+        try:
+            tip = await solana_client.get_slot()
+            if tip is None:
+                await asyncio.sleep(config.POLL_INTERVAL)
+                continue
+            if next_slot is None:
+                next_slot = tip
+            
+            end_slot = min(tip, next_slot + config.BLOCK_MAX_SLOTS_PER_POLL - 1)
+            if end_slot < next_slot:
+                await asyncio.sleep(config.BLOCK_POLL_INTERVAL)
+                continue
+            slots = await solana_client.get_blocks(next_slot, end_slot)
+            if slots is None:
+                await asyncio.sleep(config.BLOCK_POLL_INTERVAL)
+                continue
+            
+            # Fetch blocks concurrently, but hand them to the pipeline in slot order
+            # and stop at the first one that failed
+            handled_through = end_slot
+            fetches = [asyncio.ensure_future(fetch_block(slot)) for slot in slots]
+            try:
+                for slot, fetch in zip(slots, fetches):
+                    transactions = await fetch
+                    if transactions is None:
+                        failed_attempts[slot] = failed_attempts.get(slot, 0) + 1
+                        if failed_attempts[slot] < config.BLOCK_MAX_ATTEMPTS:
+                            handled_through = slot - 1
+                            break
+                        logger.error(f"Giving up on block {slot} after {failed_attempts[slot]} failed polls")
+                    failed_attempts.pop(slot, None)
+                    for signature, tx_data in transactions or []:
+                        if not is_monitoring:
+                            break
+                        if signature in transaction_store:
+                            continue
+                        await analysis_pipeline.submit(signature, tx_data)
+            finally:
+                for fetch in fetches:
+                    fetch.cancel()
+            
+            next_slot = handled_through + 1
+            if handled_through < end_slot or end_slot >= tip:
+                await asyncio.sleep(config.BLOCK_POLL_INTERVAL)
+            
+        except Exception as e:
+            logger.error(f"Error in block monitoring loop: {e}")
+            await asyncio.sleep(10)
+
+async def _fetch_stage(signature: str, tx_data: Optional[Dict[Any, Any]]) -> Optional[TransactionData]:
+    """Pipeline fetch stage: pull the raw transaction from RPC unless it came with its block.
+    
+    With a process pool it stays JSON bytes where possible, for the worker to parse.
+    """
+    if tx_data is not None:
+        if solana_client.tx_cache:
+            await solana_client.tx_cache.put(signature, tx_data)
+        return tx_data
+    return await solana_client.get_transaction(signature, raw=analysis_pool is not None)
+
+async def _decode_stage(signature: str, tx_data: TransactionData) -> Optional[tuple]:
+    """Pipeline decode stage: extract trading information.
+
+    With a process pool, detection also happens in the worker so the
+    transaction only crosses the process boundary once.
+    """
+    if analysis_pool:
+        return await analysis_pool.analyze(tx_data)
+    decoded = transaction_decoder.decode_transaction(tx_data)
+    if not decoded:
+        return None
+    return tx_data, decoded, None
+
+def _detect_stage(signature: str, payload: tuple) -> MEVTransaction:
+    """Pipeline detect stage: run MEV detection and build the result.
+    
+    Besides the single-transaction checks, the swap is matched against others
+    in the same slot; a sandwich or backrun found that way overrides this
+    transaction's label and relabels earlier members already stored.
+    """
+    tx_data, decoded, analysis = payload
+    if analysis is None:
+        analysis = mev_detector.analyze_transaction(decoded)
+    
+    findings = mev_detector.analyze_slot_context(
+        signature, tx_data.get("slot", 0), decoded, position=tx_data.get("transactionIndex")
+    )
+    for finding in findings:
+        if finding["signature"] == signature:
+            analysis = dict(analysis, is_mev=True, pattern=finding["pattern"],
+                            confidence=finding["confidence"], explanation=finding["explanation"])
+        else:
+            reclassify_transaction(finding["signature"], finding)
+    return build_mev_transaction(signature, tx_data, decoded, analysis)
+
+def _store_result(signature: str, mev_tx: MEVTransaction):
+    """Pipeline sink: keep the analyzed transaction"""
+    global newest_analyzed_slot, newest_analyzed_time
+    if newest_analyzed_slot is None or mev_tx.slot >= newest_analyzed_slot:
+        newest_analyzed_slot = mev_tx.slot
+        newest_analyzed_time = mev_tx.timestamp.timestamp()
+    if not remember_transaction(mev_tx):
+        return
+    logger.debug(f"Analyzed transaction {signature}: MEV={mev_tx.is_mev}, Profit=${mev_tx.profit_usdc:.4f}")
+
+analysis_pipeline = AnalysisPipeline(
+    fetch=_fetch_stage,
+    decode=_decode_stage,
+    detect=_detect_stage,
+    sink=_store_result,
+    fetch_concurrency=config.FETCH_CONCURRENCY,
+    decode_concurrency=config.DECODE_CONCURRENCY,
+    detect_concurrency=config.DETECT_CONCURRENCY,
+    fetch_queue_size=config.FETCH_QUEUE_SIZE,
+    decode_queue_size=config.DECODE_QUEUE_SIZE,
+    detect_queue_size=config.DETECT_QUEUE_SIZE
+)
+
+def _lag_slots() -> Optional[int]:
+    if solana_client.tip_slot is None or newest_analyzed_slot is None:
+        return None
+    return max(0, solana_client.tip_slot - newest_analyzed_slot)
+
+def _lag_seconds() -> Optional[float]:
+    if newest_analyzed_time is None:
+        return None
+    return max(0.0, time.time() - newest_analyzed_time)
+
+metrics.gauge("mev_ingest_lag_slots", "Slots between the node's confirmed tip and the newest analyzed transaction", _lag_slots)
+metrics.gauge("mev_ingest_lag_seconds", "Seconds since the block time of the newest analyzed transaction", _lag_seconds)
+metrics.gauge("mev_store_transactions", "Transactions held in the in-memory store", lambda: len(transaction_store))
+metrics.gauge("mev_pipeline_queue_depth", "Items waiting in each pipeline stage queue",
+              lambda: {(stage.name,): stage.queue.qsize() for stage in analysis_pipeline.stages}, ["stage"])
+metrics.gauge("mev_pipeline_in_flight", "Items each pipeline stage is working on",
+              lambda: {(stage.name,): stage.in_flight for stage in analysis_pipeline.stages}, ["stage"])
+def _endpoint_gauge(read):
+    return lambda: {(endpoint.url,): read(endpoint) for endpoint in (solana_client.pool.endpoints if solana_client.pool else [])}
+
+metrics.gauge("mev_rpc_endpoint_up", "1 if the RPC endpoint is in rotation, 0 while ejected",
+              _endpoint_gauge(lambda endpoint: int(endpoint.ejected_until is None)), ["endpoint"])
+metrics.gauge("mev_rpc_endpoint_concurrency_limit", "Current AIMD concurrency limit of each RPC endpoint",
+              _endpoint_gauge(lambda endpoint: endpoint.limiter.limit), ["endpoint"])
+metrics.gauge("mev_rpc_endpoint_in_flight", "Requests in flight to each RPC endpoint",
+              _endpoint_gauge(lambda endpoint: endpoint.in_flight), ["endpoint"])
+metrics.gauge("mev_rpc_endpoint_latency_seconds", "Smoothed response time of each RPC endpoint",
+              _endpoint_gauge(lambda endpoint: endpoint.latency), ["endpoint"])
+metrics.gauge("mev_log_stream_connected", "1 while the logsSubscribe stream is connected (stream ingestion only)",
+              lambda: int(log_subscriber.connected) if log_subscriber else None)
+metrics.gauge("mev_log_stream_notifications", "Log notifications received by the logsSubscribe stream",
+              lambda: log_subscriber.notifications if log_subscriber else None)
+metrics.gauge("mev_cluster_leader", "1 in the worker that runs ingestion, 0 in the others (cluster mode only)",
+              lambda: int(is_leader) if clustered else None)
+metrics.gauge("mev_store_follower_applied", "Leader writes applied to this worker's store (cluster mode only)",
+              lambda: store_follower.applied if store_follower else None)
+metrics.gauge("mev_websocket_subscribers", "Connected WebSocket subscribers", lambda: len(broadcast_hub.subscribers))
+metrics.gauge("mev_websocket_queue_depth_max", "Deepest WebSocket subscriber send queue",
+              lambda: max((s.queue.qsize() for s in broadcast_hub.subscribers), default=0))
+metrics.gauge("mev_websocket_queue_depth_total", "Messages waiting in all WebSocket subscriber send queues",
+              lambda: sum(s.queue.qsize() for s in broadcast_hub.subscribers))
 
 async def analyze_transaction(signature: str) -> Optional[MEVTransaction]:
     """Analyze a single transaction for MEV patterns"""
@@ -183,35 +718,16 @@ async def analyze_transaction(signature: str) -> Optional[MEVTransaction]:
         if not tx_data:
             return None
         
-        # Decode transaction
-        decoded = transaction_decoder.decode_transaction(tx_data)
-        if not decoded:
+        # Decode transaction and detect MEV patterns
+        result = await _decode_stage(signature, tx_data)
+        if not result:
             return None
-        
-        # Detect MEV patterns
-        analysis = mev_detector.analyze_transaction(decoded)
+        tx_data, decoded, analysis = result
+        if analysis is None:
+            analysis = mev_detector.analyze_transaction(decoded)
         
         # Create MEV transaction object
-        mev_tx = MEVTransaction(
-            signature=signature,
-            timestamp=datetime.fromtimestamp(tx_data.get('blockTime', time.time())),
-            wallet=decoded.get('wallet', ''),
-            trade_path=decoded.get('path', ''),
-            platforms=decoded.get('platforms', []),
-            input_token=decoded.get('input_token', ''),
-            output_token=decoded.get('output_token', ''),
-            input_amount=decoded.get('input_amount', 0.0),
-            output_amount=decoded.get('output_amount', 0.0),
-            profit_usdc=analysis.get('profit_usdc', 0.0),
-            is_mev=analysis.get('is_mev', False),
-            pattern=analysis.get('pattern'),
-            confidence=analysis.get('confidence', 0.0),
-            explanation=analysis.get('explanation', ''),
-            gas_used=tx_data.get('meta', {}).get('fee', 0),
-            slot=tx_data.get('slot', 0)
-        )
-        
-        return mev_tx
+        return build_mev_transaction(signature, tx_data, decoded, analysis)
         
     except Exception as e:
         logger.error(f"Error analyzing transaction {signature}: {e}")
@@ -219,22 +735,43 @@ async def analyze_transaction(signature: str) -> Optional[MEVTransaction]:
 
 # WebSocket endpoint for real-time updates
 @app.websocket("/ws/transactions")
-async def websocket_endpoint(websocket):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    pattern: Optional[str] = None,
+    min_profit: Optional[float] = None,
+    is_mev: Optional[bool] = None
+):
     await websocket.accept()
-    last_count = 0
+    subscriber = broadcast_hub.subscribe(pattern=pattern, min_profit=min_profit, is_mev=is_mev)
     
-    try:
+    async def send_updates():
+        # Start with the latest matching transactions, then stream new ones
+        latest = transaction_store.query(limit=10, is_mev=is_mev, pattern=pattern, min_profit=min_profit)
+        await websocket.send_text(encode_message("transactions_update", latest))
         while True:
-            current_count = len(recent_transactions)
-            if current_count != last_count:
-                # Send latest transactions
-                latest = recent_transactions[:10]
-                await websocket.send_json({
-                    "type": "transactions_update",
-                    "data": [tx.dict() for tx in latest]
-                })
-                last_count = current_count
-            
-            await asyncio.sleep(2)
+            message = await subscriber.queue.get()
+            await websocket.send_text(message)
+            subscriber.sent += 1
+    
+    async def wait_for_disconnect():
+        while True:
+            await websocket.receive_text()
+    
+    tasks = [
+        asyncio.create_task(send_updates()),
+        asyncio.create_task(wait_for_disconnect()),
+        asyncio.create_task(subscriber.overflowed.wait())
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() and not isinstance(task.exception(), WebSocketDisconnect):
+                logger.error(f"WebSocket error: {task.exception()}")
+        if subscriber.overflowed.is_set():
+            await websocket.close(code=1013, reason="Client too slow")
     except Exception as e:
-        logger.error(f"WebSocket error: {e}")
\ No newline at end of file
+        logger.error(f"WebSocket error: {e}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        broadcast_hub.unsubscribe(subscriber)
@@ -1,34 +1,31 @@
 import math
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
+from itertools import chain
 import logging
 
-from models import MEVPattern
+from price_service import PriceService, StubPriceSource
+from rules import NO_MATCH, RuleEngine
+from swap_index import SwapIndex
+
+try:
+    import numpy as np
+except ImportError:  # optional; analyze_batch falls back to the scalar path
+    np = None
 
 logger = logging.getLogger(__name__)
 
 class MEVDetector:
-    def __init__(self):
-        # Minimum profit threshold for MEV detection (in USDC)
-        self.min_profit_threshold = 0.01
+    def __init__(self, price_service: PriceService = None, swap_index: SwapIndex = None,
+                 rule_engine: RuleEngine = None):
+        # USDC prices by mint; defaults to the static offline table
+        self.price_service = price_service or PriceService(StubPriceSource())
         
-        # Known profitable patterns
-        self.mev_patterns = {
-            MEVPattern.ARBITRAGE: {
-                "min_platforms": 2,
-                "min_profit": 0.05,
-                "keywords": ["swap", "exchange", "route"]
-            },
-            MEVPattern.BACKRUN: {
-                "timing_window": 30,  # seconds
-                "min_profit": 0.01,
-                "keywords": ["backrun", "follow"]
-            },
-            MEVPattern.SANDWICH: {
-                "min_profit": 0.1,
-                "keywords": ["sandwich", "front", "back"]
-            }
-        }
+        # Recent swaps by slot and pool, for patterns that span transactions
+        self.swap_index = swap_index or SwapIndex()
+        
+        # Single-transaction detection rules (built in, or MEV_RULES_PATH)
+        self.rule_engine = rule_engine or RuleEngine.from_config()
     
     def analyze_transaction(self, decoded_tx: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze a decoded transaction for MEV patterns"""
@@ -57,6 +54,97 @@ class MEVDetector:
                 "explanation": f"Analysis error: {str(e)}"
             }
     
+    def analyze_batch(self, decoded_txs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Analyze many decoded transactions at once; same results as analyze_transaction.
+        
+        Transfers of the whole batch are flattened into arrays (amount, mint
+        id, owning transaction), priced with one gather from a per-mint price
+        vector and summed per transaction with bincount, which adds in the same
+        order as the scalar loop. The detection rules then run as array masks
+        over feature columns (RuleEngine.evaluate_batch). A batch whose
+        transfers don't fit the packed layout is analyzed one by one, as it is
+        without NumPy.
+        
+        The log keyword rules scan the same text either way and dominate on
+        real logs, so this is about 1.3-1.4x faster than the scalar path on the
+        synthetic set (about 2.1x with the logs removed), not several times.
+        """
+        if np is None or not decoded_txs:
+            return [self.analyze_transaction(tx) for tx in decoded_txs]
+        
+        count = len(decoded_txs)
+        try:
+            transfer_lists = [tx.get("token_transfers", []) for tx in decoded_txs]
+            transfer_counts = [len(transfers) for transfers in transfer_lists]
+            transfers = list(chain.from_iterable(transfer_lists))
+            amounts = np.array([transfer["amount_change"] for transfer in transfers], dtype=np.float64)
+            mints = [transfer["mint"] for transfer in transfers]
+            mint_index = {mint: i for i, mint in enumerate(dict.fromkeys(mints))}
+            mint_ids = np.fromiter(map(mint_index.__getitem__, mints), dtype=np.intp, count=len(mints))
+        except Exception:
+            return [self.analyze_transaction(tx) for tx in decoded_txs]
+        
+        try:
+            # Profit: price gather, then per-transaction sums
+            get_price = self.price_service.get_price
+            prices = np.array([get_price(mint) for mint in mint_index], dtype=np.float64)
+            owners = np.repeat(np.arange(count), transfer_counts)
+            totals = np.bincount(owners, weights=amounts * prices[mint_ids], minlength=count)
+            # Python's round, not np.round, to match the scalar path bit for bit
+            profits = [round(total, 6) for total in totals.tolist()]
+            
+            matched_rules = self.rule_engine.evaluate_batch(
+                decoded_txs,
+                np.array(profits, dtype=np.float64),
+                {"transfer_count": np.array(transfer_counts, dtype=np.float64)}
+            )
+        except Exception as e:
+            logger.error(f"Error in batch analysis, analyzing one by one: {e}")
+            return [self.analyze_transaction(tx) for tx in decoded_txs]
+        
+        results = []
+        for decoded_tx, profit_usdc, rule in zip(decoded_txs, profits, matched_rules):
+            is_mev, pattern, confidence, explanation = (
+                rule.outcome(profit_usdc, decoded_tx.get("platforms", [])) if rule else NO_MATCH
+            )
+            results.append({
+                "profit_usdc": profit_usdc,
+                "is_mev": is_mev,
+                "pattern": pattern,
+                "confidence": confidence,
+                "explanation": explanation
+            })
+        return results
+    
+    def analyze_slot_context(self, signature: str, slot: int, decoded_tx: Dict[str, Any],
+                             position: int = None) -> List[Dict[str, Any]]:
+        """Feed a decoded swap into the slot index and return cross-transaction findings.
+        
+        Findings can concern this transaction or earlier ones in the same slot
+        (e.g. the front leg of a sandwich this transaction closes). `position`
+        is the index within the block; without it (signature and stream
+        ingestion) nothing is indexed, since arrival order isn't block order.
+        """
+        try:
+            token_transfers = decoded_tx.get("token_transfers", [])
+            inputs = [t for t in token_transfers if t["amount_change"] < 0]
+            outputs = [t for t in token_transfers if t["amount_change"] > 0]
+            if not inputs or not outputs:
+                return []
+            
+            return self.swap_index.observe(
+                signature,
+                slot,
+                decoded_tx.get("wallet", ""),
+                inputs[0]["mint"],
+                outputs[0]["mint"],
+                position=position
+            )
+            
+        except Exception as e:
+            logger.error(f"Error checking slot context for MEV: {e}")
+            return []
+    
     def _calculate_profit_usdc(self, decoded_tx: Dict[str, Any]) -> float:
         """Calculate profit/loss in USDC equivalent"""
         try:
@@ -65,27 +153,14 @@ class MEVDetector:
             if not token_transfers:
                 return 0.0
             
-            # For now, use a simplified calculation
-            # In a real implementation, you would fetch current token prices
-            
             total_value_change = 0.0
+            get_price = self.price_service.get_price
             
             for transfer in token_transfers:
-                symbol = transfer["symbol"]
                 amount_change = transfer["amount_change"]
                 
-                # Simple price mapping (in real implementation, fetch from API)
-                token_prices = {
-                    "SOL": 100.0,    # $100 per SOL
-                    "USDC": 1.0,     # $1 per USDC
-                    "USDT": 1.0,     # $1 per USDT
-                    "mSOL": 110.0,   # Premium over SOL
-                    "stSOL": 105.0,  # Premium over SOL
-                    "BONK": 0.000015, # Small price
-                    "jitoSOL": 105.0
-                }
-                
-                price = token_prices.get(symbol, 1.0)
+                # Cached price lookup; the price service refreshes in the background
+                price = get_price(transfer["mint"])
                 value_change = amount_change * price
                 total_value_change += value_change
             
@@ -98,67 +173,4 @@ class MEVDetector:
     
     def _detect_mev_pattern(self, decoded_tx: Dict[str, Any], profit_usdc: float) -> tuple:
         """Detect specific MEV patterns in the transaction"""
-        
-        platforms = decoded_tx.get("platforms", [])
-        logs = decoded_tx.get("logs", [])
-        path = decoded_tx.get("path", "")
-        
-        # Check for arbitrage
-        if self._is_arbitrage(platforms, profit_usdc, path):
-            return True, MEVPattern.ARBITRAGE, 0.8, f"Multi-platform arbitrage detected across {', '.join(platforms)} with ${profit_usdc:.4f} profit"
-        
-        # Check for profitable single-platform trades (potential backruns)
-        if self._is_likely_backrun(profit_usdc, platforms, logs):
-            return True, MEVPattern.BACKRUN, 0.6, f"Likely backrun trade with ${profit_usdc:.4f} profit"
-        
-        # Check for sandwich attacks
-        if self._is_sandwich_attack(profit_usdc, logs, path):
-            return True, MEVPattern.SANDWICH, 0.7, f"Potential sandwich attack with ${profit_usdc:.4f} profit"
-        
-        # Check for high-profit trades (likely MEV)
-        if profit_usdc > 1.0:  # $1+ profit is likely MEV
-            return True, MEVPattern.UNKNOWN, 0.5, f"High-profit trade (${profit_usdc:.4f}) - likely MEV"
-        
-        # Small profitable trades might be MEV
-        if profit_usdc > self.min_profit_threshold:
-            return True, MEVPattern.UNKNOWN, 0.3, f"Small profitable trade (${profit_usdc:.4f}) - possible MEV"
-        
-        return False, None, 0.0, "No MEV pattern detected"
-    
-    def _is_arbitrage(self, platforms: List[str], profit_usdc: float, path: str) -> bool:
-        """Check if transaction shows arbitrage patterns"""
-        # Multiple platforms and profitable
-        if len(platforms) >= 2 and profit_usdc > 0.05:
-            return True
-        
-        # Single platform but complex path (internal arb)
-        if len(platforms) == 1 and "→" in path and path.count("→") >= 2 and profit_usdc > 0.02:
-            return True
-        
-        return False
-    
-    def _is_likely_backrun(self, profit_usdc: float, platforms: List[str], logs: List[str]) -> bool:
-        """Check if transaction is likely a backrun"""
-        # Profitable single-platform trade
-        if profit_usdc > 0.01 and len(platforms) == 1:
-            # Check for backrun indicators in logs
-            backrun_indicators = ["swap", "exactIn", "exactOut"]
-            for indicator in backrun_indicators:
-                if any(indicator in log for log in logs):
-                    return True
-        
-        return False
-    
-    def _is_sandwich_attack(self, profit_usdc: float, logs: List[str], path: str) -> bool:
-        """Check if transaction is part of a sandwich attack"""
-        # High profit with simple path might be sandwich
-        if profit_usdc > 0.1 and "→" in path and path.count("→") == 1:
-            return True
-        
-        # Check logs for sandwich indicators
-        sandwich_keywords = ["front", "sandwich", "back"]
-        for keyword in sandwich_keywords:
-            if any(keyword in log.lower() for log in logs):
-                return True
-        
-        return False
\ No newline at end of file
+        return self.rule_engine.evaluate(decoded_tx, profit_usdc)
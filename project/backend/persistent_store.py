@@ -0,0 +1,369 @@
+import asyncio
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from models import MEVPattern, MEVTransaction
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = (
+    "signature", "slot", "block_time", "wallet", "trade_path", "platforms",
+    "input_token", "output_token", "input_amount", "output_amount", "profit_usdc",
+    "is_mev", "pattern", "confidence", "explanation", "gas_used"
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    signature     TEXT PRIMARY KEY,
+    slot          INTEGER NOT NULL,
+    block_time    REAL NOT NULL,
+    wallet        TEXT NOT NULL,
+    trade_path    TEXT NOT NULL,
+    platforms     TEXT NOT NULL, -- comma-separated
+    input_token   TEXT NOT NULL,
+    output_token  TEXT NOT NULL,
+    input_amount  REAL NOT NULL,
+    output_amount REAL NOT NULL,
+    profit_usdc   REAL NOT NULL,
+    is_mev        INTEGER NOT NULL,
+    pattern       TEXT,
+    confidence    REAL NOT NULL,
+    explanation   TEXT NOT NULL,
+    gas_used      INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_slot ON transactions (slot);
+CREATE INDEX IF NOT EXISTS idx_transactions_wallet ON transactions (wallet, slot);
+CREATE INDEX IF NOT EXISTS idx_transactions_pattern ON transactions (pattern, slot);
+CREATE INDEX IF NOT EXISTS idx_transactions_profit ON transactions (profit_usdc);
+-- Signatures in write order, for other processes following the table (see cluster.py)
+CREATE TABLE IF NOT EXISTS changes (
+    seq       INTEGER PRIMARY KEY AUTOINCREMENT,
+    signature TEXT NOT NULL
+);
+-- Transactions analyzed by processes that don't write (e.g. API workers), for the one that does
+CREATE TABLE IF NOT EXISTS submissions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    row TEXT NOT NULL -- JSON array in COLUMNS order
+);
+-- Small shared settings and status between processes using the same database
+CREATE TABLE IF NOT EXISTS cluster_state (
+    key     TEXT PRIMARY KEY,
+    value   TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+_UPDATE_COLUMNS = ", ".join(f"{column} = excluded.{column}" for column in COLUMNS[1:])
+
+_PATTERNS: Dict[Optional[str], Optional[MEVPattern]] = {pattern.value: pattern for pattern in MEVPattern}
+
+
+def transaction_row(tx: MEVTransaction) -> tuple:
+    """A transaction as a `transactions` table row, in COLUMNS order"""
+    pattern = tx.pattern
+    return (
+        tx.signature,
+        tx.slot,
+        tx.timestamp.timestamp(),
+        tx.wallet,
+        tx.trade_path,
+        ",".join(tx.platforms),
+        tx.input_token,
+        tx.output_token,
+        tx.input_amount,
+        tx.output_amount,
+        tx.profit_usdc,
+        1 if tx.is_mev else 0,
+        getattr(pattern, "value", pattern),
+        tx.confidence,
+        tx.explanation,
+        tx.gas_used
+    )
+
+
+def _from_row(row: tuple) -> MEVTransaction:
+    (signature, slot, block_time, wallet, trade_path, platforms, input_token, output_token,
+     input_amount, output_amount, profit_usdc, is_mev, pattern, confidence, explanation,
+     gas_used) = row
+    return MEVTransaction(
+        signature=signature,
+        timestamp=datetime.fromtimestamp(block_time),
+        wallet=wallet,
+        trade_path=trade_path,
+        platforms=platforms.split(",") if platforms else [],
+        input_token=input_token,
+        output_token=output_token,
+        input_amount=input_amount,
+        output_amount=output_amount,
+        profit_usdc=profit_usdc,
+        is_mev=bool(is_mev),
+        pattern=_PATTERNS.get(pattern),
+        confidence=confidence,
+        explanation=explanation,
+        gas_used=gas_used,
+        slot=slot
+    )
+
+
+class PersistentStore:
+    """SQLite (WAL mode) archive of analyzed transactions.
+
+    Writes are buffered and flushed in batches on a dedicated thread so the
+    event loop never blocks on disk. All SQLite access goes through that single
+    thread, which keeps the connection usage serialized.
+
+    With `change_log_size`, every write also appends the signature to the
+    `changes` table (keeping the newest `change_log_size` entries) so other
+    processes can replay what changed since a sequence number. Processes that
+    don't write hand their transactions to the one that does with `submit`,
+    which it collects with `take_submissions`.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 1.0,
+                 change_log_size: int = 0):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.change_log_size = change_log_size
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mev-store")
+        self._buffer: List[tuple] = []
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.written = 0
+        self.write_errors = 0
+
+    async def open(self):
+        """Open the database and start the background writer"""
+        await self._run(self._open_sync)
+        self._flush_requested = asyncio.Event()
+        self._writer_task = asyncio.create_task(self._writer_loop())
+        logger.info(f"Persistent store opened at {self.path}")
+
+    async def close(self):
+        """Flush pending writes and close the database"""
+        if self._writer_task:
+            # Stop the loop rather than cancel it: on 3.11 wait_for can swallow a cancel
+            # that arrives just as a flush is requested, and close() would then hang
+            self._closing = True
+            self._flush_requested.set()
+            await self._writer_task
+            self._writer_task = None
+        await self.flush()
+        await self._run(self._close_sync)
+        self._executor.shutdown(wait=True)
+
+    def enqueue(self, tx: MEVTransaction):
+        """Buffer a transaction for the next batch write"""
+        self._buffer.append(transaction_row(tx))
+        if len(self._buffer) >= self.batch_size and self._flush_requested:
+            self._flush_requested.set()
+
+    def enqueue_rows(self, rows: List[tuple]):
+        """Buffer rows already built with transaction_row (e.g. by worker processes)"""
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.batch_size and self._flush_requested:
+            self._flush_requested.set()
+
+    async def flush(self):
+        """Write everything buffered so far"""
+        if not self._buffer or self._conn is None:
+            return
+        rows, self._buffer = self._buffer, []
+        try:
+            await self._run(self._write_sync, rows)
+            self.written += len(rows)
+        except Exception as e:
+            self.write_errors += 1
+            logger.error(f"Error writing {len(rows)} transactions to persistent store: {e}")
+
+    async def load_recent(self, limit: int) -> List[MEVTransaction]:
+        """Most recent `limit` transactions, oldest first, for rehydrating memory"""
+        started = time.perf_counter()
+        txs = await self._run(self._load_recent_sync, limit)
+        logger.info(f"Rehydrated {len(txs)} transactions in {time.perf_counter() - started:.3f}s")
+        return txs
+
+    async def load_recent_rows(self, limit: int) -> List[tuple]:
+        """load_recent as raw rows (COLUMNS order), for TransactionStore.extend_rows"""
+        started = time.perf_counter()
+        rows = await self._run(self._load_recent_rows_sync, limit)
+        logger.info(f"Loaded {len(rows)} transactions in {time.perf_counter() - started:.3f}s")
+        return rows
+
+    async def query(self,
+                    limit: int = 100,
+                    slot_min: Optional[int] = None,
+                    slot_max: Optional[int] = None,
+                    wallet: Optional[str] = None,
+                    pattern: Optional[str] = None,
+                    min_profit: Optional[float] = None,
+                    max_profit: Optional[float] = None) -> List[MEVTransaction]:
+        """Indexed lookup over the full history, newest slot first"""
+        clauses = []
+        params: List[Any] = []
+        if slot_min is not None:
+            clauses.append("slot >= ?")
+            params.append(slot_min)
+        if slot_max is not None:
+            clauses.append("slot <= ?")
+            params.append(slot_max)
+        if wallet:
+            clauses.append("wallet = ?")
+            params.append(wallet)
+        if pattern:
+            clauses.append("pattern = ?")
+            params.append(getattr(pattern, "value", pattern))
+        if min_profit is not None:
+            clauses.append("profit_usdc >= ?")
+            params.append(min_profit)
+        if max_profit is not None:
+            clauses.append("profit_usdc <= ?")
+            params.append(max_profit)
+
+        sql = f"SELECT {', '.join(COLUMNS)} FROM transactions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY slot DESC, rowid DESC LIMIT ?"
+        params.append(limit)
+        return await self._run(self._select_sync, sql, params)
+
+    async def count(self) -> int:
+        return await self._run(self._count_sync)
+
+    async def data_version(self) -> int:
+        """Changes whenever another connection commits to the database"""
+        return await self._run(self._data_version_sync)
+
+    async def last_change(self) -> int:
+        """Sequence number of the newest change log entry (0 if there is none)"""
+        return await self._run(self._last_change_sync)
+
+    async def changes_since(self, seq: int, limit: int = 1000) -> Tuple[int, List[MEVTransaction], bool]:
+        """Transactions written after change `seq`, in write order.
+
+        Returns the sequence number to continue from, the transactions (with
+        their current contents), and whether entries after `seq` had already
+        been trimmed from the log, i.e. some changes were missed.
+        """
+        return await self._run(self._changes_since_sync, seq, limit)
+
+    async def submit(self, tx: MEVTransaction):
+        """Queue a transaction for the writing process, committed right away"""
+        await self._run(self._submit_sync, json.dumps(transaction_row(tx)))
+
+    async def take_submissions(self, limit: int = 1000) -> List[MEVTransaction]:
+        """Oldest submitted transactions, removed from the queue"""
+        return await self._run(self._take_submissions_sync, limit)
+
+    async def get_state(self, key: str) -> Optional[str]:
+        return await self._run(self._get_state_sync, key)
+
+    async def set_state(self, key: str, value: str):
+        await self._run(self._set_state_sync, key, value)
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def _writer_loop(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    # --- executor-thread helpers -------------------------------------------------
+
+    def _open_sync(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def _close_sync(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _write_sync(self, rows: List[tuple]):
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        with self._conn:
+            # An upsert keeps the row's rowid, so a relabeled transaction stays in
+            # its original place in write order (which warm restart loads by)
+            self._conn.executemany(
+                f"INSERT INTO transactions ({', '.join(COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(signature) DO UPDATE SET {_UPDATE_COLUMNS}",
+                rows
+            )
+            if self.change_log_size > 0:
+                self._conn.executemany("INSERT INTO changes (signature) VALUES (?)", [(row[0],) for row in rows])
+                last = self._conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                self._conn.execute("DELETE FROM changes WHERE seq <= ?", (last - self.change_log_size,))
+
+    def _load_recent_sync(self, limit: int) -> List[MEVTransaction]:
+        return [_from_row(row) for row in self._load_recent_rows_sync(limit)]
+
+    def _load_recent_rows_sync(self, limit: int) -> List[tuple]:
+        rows = self._conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM transactions ORDER BY rowid DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+        rows.reverse()
+        return rows
+
+    def _select_sync(self, sql: str, params: List[Any]) -> List[MEVTransaction]:
+        return [_from_row(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def _count_sync(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def _data_version_sync(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _last_change_sync(self) -> int:
+        return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    def _changes_since_sync(self, seq: int, limit: int) -> Tuple[int, List[MEVTransaction], bool]:
+        rows = self._conn.execute(
+            f"SELECT c.seq, {', '.join('t.' + column for column in COLUMNS)} "
+            f"FROM changes c JOIN transactions t ON t.signature = c.signature "
+            f"WHERE c.seq > ? ORDER BY c.seq LIMIT ?",
+            (seq, limit)
+        ).fetchall()
+        if not rows:
+            return seq, [], False
+        # Sequence numbers are contiguous, so a jump means the log was trimmed past `seq`
+        missed = rows[0][0] > seq + 1
+        return rows[-1][0], [_from_row(row[1:]) for row in rows], missed
+
+    def _submit_sync(self, row: str):
+        with self._conn:
+            self._conn.execute("INSERT INTO submissions (row) VALUES (?)", (row,))
+
+    def _take_submissions_sync(self, limit: int) -> List[MEVTransaction]:
+        with self._conn:
+            rows = self._conn.execute("SELECT seq, row FROM submissions ORDER BY seq LIMIT ?", (limit,)).fetchall()
+            if rows:
+                self._conn.execute("DELETE FROM submissions WHERE seq <= ?", (rows[-1][0],))
+        return [_from_row(json.loads(row)) for _, row in rows]
+
+    def _get_state_sync(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM cluster_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state_sync(self, key: str, value: str):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cluster_state (key, value, updated) VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
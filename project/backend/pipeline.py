@@ -0,0 +1,206 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+import logging
+
+import metrics
+from models import MEVTransaction
+
+logger = logging.getLogger(__name__)
+
+# A stage handler receives (signature, payload) and returns the payload for the
+# next stage, or None to drop the item. Handlers may be sync or async.
+StageHandler = Callable[[str, Any], Any]
+
+
+def build_mev_transaction(signature: str, tx_data: Dict[Any, Any], decoded: Dict[str, Any],
+                          analysis: Dict[str, Any]) -> MEVTransaction:
+    """Assemble an MEVTransaction from raw, decoded and analyzed transaction data"""
+    return MEVTransaction(
+        signature=signature,
+        timestamp=datetime.fromtimestamp(tx_data.get('blockTime') or time.time()),
+        wallet=decoded.get('wallet', ''),
+        trade_path=decoded.get('path', ''),
+        platforms=decoded.get('platforms', []),
+        input_token=decoded.get('input_token', ''),
+        output_token=decoded.get('output_token', ''),
+        input_amount=decoded.get('input_amount', 0.0),
+        output_amount=decoded.get('output_amount', 0.0),
+        profit_usdc=analysis.get('profit_usdc', 0.0),
+        is_mev=analysis.get('is_mev', False),
+        pattern=analysis.get('pattern'),
+        confidence=analysis.get('confidence', 0.0),
+        explanation=analysis.get('explanation', ''),
+        gas_used=(tx_data.get('meta') or {}).get('fee', 0),
+        slot=tx_data.get('slot', 0)
+    )
+
+
+STAGE_SECONDS = metrics.histogram(
+    "mev_pipeline_stage_seconds",
+    "Time a pipeline stage handler spends on one item (excluding waits on the next queue)",
+    ["stage"]
+)
+STAGE_ERRORS = metrics.counter("mev_pipeline_stage_errors_total", "Items a pipeline stage failed on", ["stage"])
+
+
+class PipelineStage:
+    """A pool of workers draining a bounded input queue"""
+
+    def __init__(self, name: str, handler: StageHandler, concurrency: int, queue_size: int):
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.in_flight = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.seconds = STAGE_SECONDS.labels(name)
+        self.error_count = STAGE_ERRORS.labels(name)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "queue_capacity": self.queue.maxsize,
+            "backlog": self.queue.qsize(),
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_time, 3)
+        }
+
+
+class AnalysisPipeline:
+    """Staged fetch -> decode -> detect pipeline with bounded queues between stages.
+
+    Each stage runs its own pool of workers, so a slow RPC only holds up the
+    fetch workers while decode/detect keep draining. Full queues apply
+    backpressure all the way back to `submit`.
+    """
+
+    def __init__(self,
+                 fetch: StageHandler,
+                 decode: StageHandler,
+                 detect: StageHandler,
+                 sink: Callable[[str, Any], Optional[Awaitable[None]]],
+                 fetch_concurrency: int = 16,
+                 decode_concurrency: int = 4,
+                 detect_concurrency: int = 4,
+                 fetch_queue_size: int = 1000,
+                 decode_queue_size: int = 256,
+                 detect_queue_size: int = 256):
+        self.stages: List[PipelineStage] = [
+            PipelineStage("fetch", fetch, fetch_concurrency, fetch_queue_size),
+            PipelineStage("decode", decode, decode_concurrency, decode_queue_size),
+            PipelineStage("detect", detect, detect_concurrency, detect_queue_size),
+        ]
+        self.sink = sink
+        self.completed = 0
+        self._pending: Set[str] = set()
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._workers)
+
+    def is_pending(self, signature: str) -> bool:
+        """Whether a signature is queued or being processed"""
+        return signature in self._pending
+
+    def start(self):
+        """Spawn the worker pools for every stage"""
+        if self._workers:
+            return
+        for index, stage in enumerate(self.stages):
+            next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            for worker_id in range(stage.concurrency):
+                task = asyncio.create_task(
+                    self._run_worker(stage, next_stage),
+                    name=f"pipeline-{stage.name}-{worker_id}"
+                )
+                self._workers.append(task)
+        logger.info("Analysis pipeline started: " + ", ".join(
+            f"{stage.name}x{stage.concurrency}" for stage in self.stages
+        ))
+
+    async def stop(self):
+        """Cancel all workers and discard anything still queued"""
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for stage in self.stages:
+            while not stage.queue.empty():
+                stage.queue.get_nowait()
+                stage.queue.task_done()
+            stage.in_flight = 0
+        self._pending.clear()
+        logger.info("Analysis pipeline stopped")
+
+    async def submit(self, signature: str, payload: Any = None) -> bool:
+        """Queue a signature for analysis, waiting while the fetch queue is full.
+
+        Returns False if the signature is already in the pipeline.
+        """
+        if signature in self._pending:
+            return False
+        self._pending.add(signature)
+        await self.stages[0].queue.put((signature, payload))
+        return True
+
+    async def join(self):
+        """Wait until every submitted item has left the pipeline"""
+        for stage in self.stages:
+            await stage.queue.join()
+
+    def backlog(self) -> int:
+        """Total number of items queued or in flight across all stages"""
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "pending": len(self._pending),
+            "completed": self.completed,
+            "stages": {stage.name: stage.stats() for stage in self.stages}
+        }
+
+    async def _run_worker(self, stage: PipelineStage, next_stage: Optional[PipelineStage]):
+        while True:
+            signature, payload = await stage.queue.get()
+            stage.in_flight += 1
+            forwarded = False
+            started = time.perf_counter()
+            try:
+                result = stage.handler(signature, payload)
+                if asyncio.iscoroutine(result):
+                    result = await result
+                stage.seconds.observe(time.perf_counter() - started)
+
+                if result is None:
+                    stage.dropped += 1
+                elif next_stage is not None:
+                    await next_stage.queue.put((signature, result))
+                    forwarded = True
+                else:
+                    sink_result = self.sink(signature, result)
+                    if asyncio.iscoroutine(sink_result):
+                        await sink_result
+                    self.completed += 1
+                stage.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stage.errors += 1
+                stage.error_count.inc()
+                logger.error(f"Pipeline {stage.name} stage failed for {signature}: {e}")
+            finally:
+                stage.busy_time += time.perf_counter() - started
+                stage.in_flight -= 1
+                if not forwarded:
+                    self._pending.discard(signature)
+                stage.queue.task_done()
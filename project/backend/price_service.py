@@ -0,0 +1,265 @@
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Used until a live price has been fetched, and whenever a source has none.
+# Mirrors the static table MEVDetector originally used.
+DEFAULT_PRICES = {
+    "So11111111111111111111111111111111111111112": 100.0,      # SOL
+    "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": 1.0,       # USDC
+    "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": 1.0,       # USDT
+    "mSoLzYCxHdYgdzU16g5QSh3i5K3z3KZK7ytfqcJm7So": 110.0,      # mSOL
+    "7dHbWXmci3dT8UFYWYZweBLXgycu7Y3iL6trKn1Y7ARj": 105.0,     # stSOL
+    "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263": 0.000015,  # BONK
+    "J1toso1uCk3RLmjorhTtrVwY9HJ7X8V9yYac6Y7kGCPn": 105.0,     # jitoSOL
+}
+
+# Stablecoins barely move, so they can be refreshed far less often
+DEFAULT_TTLS = {
+    "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": 3600.0,
+    "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": 3600.0,
+}
+
+
+class PriceSource:
+    """Something that can price a batch of mints in USDC"""
+
+    async def fetch_prices(self, mints: List[str]) -> Dict[str, float]:
+        raise NotImplementedError
+
+
+class JupiterPriceSource(PriceSource):
+    """Prices from the Jupiter price API via SolanaClient"""
+
+    def __init__(self, solana_client):
+        self.solana_client = solana_client
+
+    async def fetch_prices(self, mints: List[str]) -> Dict[str, float]:
+        prices = await self.solana_client.get_multiple_token_prices(mints)
+        # The client reports 0.0 for unknown mints and on errors; treat that as "no price"
+        return {mint: price for mint, price in prices.items() if price > 0}
+
+
+class StubPriceSource(PriceSource):
+    """Fixed local prices, for tests and offline runs"""
+
+    def __init__(self, prices: Optional[Dict[str, float]] = None):
+        self.prices = dict(DEFAULT_PRICES if prices is None else prices)
+        self.requests = 0
+
+    async def fetch_prices(self, mints: List[str]) -> Dict[str, float]:
+        self.requests += 1
+        return {mint: self.prices[mint] for mint in mints if mint in self.prices}
+
+
+class PriceService:
+    """USDC price cache that MEVDetector reads synchronously.
+
+    `get_price` is a dict lookup and never waits on the network. A background
+    task refreshes expired mints (per-mint TTLs) in batches; mints that were
+    asked for but never priced are picked up on the next refresh. Concurrent
+    async misses for the same mint share a single in-flight request, and a
+    failed refresh keeps serving the last known price. Mints not asked for
+    within `idle_ttl` stop being refreshed and are forgotten (the fallback
+    table's mints are always kept), so the long tail of one-off mints does
+    not grow the cache and the refresh batches forever.
+    """
+
+    def __init__(self,
+                 source: PriceSource,
+                 default_ttl: float = 30.0,
+                 ttls: Optional[Dict[str, float]] = None,
+                 refresh_interval: float = 5.0,
+                 batch_size: int = 100,
+                 fallback_prices: Optional[Dict[str, float]] = None,
+                 default_price: float = 1.0,
+                 idle_ttl: float = 600.0):
+        self.source = source
+        self.default_ttl = default_ttl
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.refresh_interval = refresh_interval
+        self.batch_size = max(1, batch_size)
+        self.fallback_prices = dict(DEFAULT_PRICES if fallback_prices is None else fallback_prices)
+        self.default_price = default_price
+        self.idle_ttl = idle_ttl
+
+        self._prices: Dict[str, float] = {}
+        self._expires: Dict[str, float] = {}
+        self._wanted: Set[str] = set(self.fallback_prices)
+        # Mints looked up since the last refresh tick, and when each tracked mint was last looked up
+        self._used: Set[str] = set()
+        self._last_used: Dict[str, float] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._snapshot: Dict[str, float] = {}
+        self._snapshot_version = -1
+
+        # Bumped whenever a price changes, so copies elsewhere can tell they are stale
+        self.version = 0
+        self.source_requests = 0
+        self.source_errors = 0
+        self.expired_mints = 0
+
+    def get_price(self, mint: str) -> float:
+        """Last known USDC price for a mint, O(1) and non-blocking"""
+        # Unknown mints start being fetched on the next refresh tick
+        self._used.add(mint)
+        price = self._prices.get(mint)
+        if price is not None:
+            return price
+        return self.fallback_prices.get(mint, self.default_price)
+
+    def touch(self, mints: Iterable[str]):
+        """Count lookups made against a copy of the prices (e.g. in a worker process) as use"""
+        self._used.update(mints)
+
+    async def get_price_async(self, mint: str) -> float:
+        """Price for a mint, fetching it now if missing or stale"""
+        if not self._is_fresh(mint):
+            await self.refresh([mint])
+        return self.get_price(mint)
+
+    def set_price(self, mint: str, price: float, ttl: Optional[float] = None):
+        if self._prices.get(mint) != price:
+            self._prices[mint] = price
+            self.version += 1
+        now = time.monotonic()
+        self._expires[mint] = now + (ttl if ttl is not None else self._ttl(mint))
+        self._wanted.add(mint)
+        self._last_used[mint] = now
+
+    async def refresh(self, mints: Iterable[str]):
+        """Fetch prices for the given mints, coalescing with in-flight requests"""
+        loop = asyncio.get_running_loop()
+        waiting = []
+        to_fetch = []
+        for mint in dict.fromkeys(mints):
+            future = self._inflight.get(mint)
+            if future is None:
+                future = loop.create_future()
+                self._inflight[mint] = future
+                to_fetch.append(mint)
+            waiting.append(future)
+
+        try:
+            for start in range(0, len(to_fetch), self.batch_size):
+                await self._fetch_batch(to_fetch[start:start + self.batch_size])
+        finally:
+            # Don't leave other waiters hanging if we were cancelled mid-fetch
+            for mint in to_fetch:
+                future = self._inflight.get(mint)
+                if future is not None and not future.done():
+                    del self._inflight[mint]
+                    future.cancel()
+
+        if waiting:
+            await asyncio.gather(*waiting, return_exceptions=True)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Copy of the known prices, rebuilt only when something changed"""
+        if self._snapshot_version != self.version:
+            self._snapshot = dict(self._prices)
+            self._snapshot_version = self.version
+        return self._snapshot
+
+    def load_snapshot(self, prices: Dict[str, float], version: int):
+        """Replace known prices wholesale (e.g. in a worker process)"""
+        self._prices = dict(prices)
+        self.version = version
+        self.forget_lookups()
+
+    def forget_lookups(self):
+        """Drop lookups not yet counted as use.
+
+        For copies nothing refreshes (e.g. in a worker process), which would
+        otherwise collect every mint they are asked for.
+        """
+        self._used.clear()
+
+    def start(self):
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "priced_mints": len(self._prices),
+            "tracked_mints": len(self._wanted),
+            "expired_mints": self.expired_mints,
+            "source_requests": self.source_requests,
+            "source_errors": self.source_errors
+        }
+
+    def _ttl(self, mint: str) -> float:
+        return self.ttls.get(mint, self.default_ttl)
+
+    def _is_fresh(self, mint: str) -> bool:
+        return self._expires.get(mint, 0.0) > time.monotonic()
+
+    def _track_usage(self):
+        """Start tracking mints looked up since the last tick, and forget idle ones"""
+        now = time.monotonic()
+        for mint in self._used:
+            self._last_used[mint] = now
+        self._wanted.update(self._used)
+        self._used.clear()
+
+        cutoff = now - self.idle_ttl
+        idle = [mint for mint, used in self._last_used.items()
+                if used < cutoff and mint not in self.fallback_prices]
+        for mint in idle:
+            del self._last_used[mint]
+            self._wanted.discard(mint)
+            self._expires.pop(mint, None)
+            if self._prices.pop(mint, None) is not None:
+                self.version += 1
+        self.expired_mints += len(idle)
+
+    def _stale_mints(self) -> List[str]:
+        now = time.monotonic()
+        return [mint for mint in self._wanted if self._expires.get(mint, 0.0) <= now]
+
+    async def _fetch_batch(self, mints: List[str]):
+        self.source_requests += 1
+        try:
+            prices = await self.source.fetch_prices(mints)
+        except Exception as e:
+            self.source_errors += 1
+            logger.error(f"Error refreshing prices for {len(mints)} mints: {e}")
+            prices = {}
+
+        now = time.monotonic()
+        for mint in mints:
+            price = prices.get(mint)
+            if price is not None:
+                if self._prices.get(mint) != price:
+                    self._prices[mint] = price
+                    self.version += 1
+                self._expires[mint] = now + self._ttl(mint)
+            else:
+                # Keep the last known price; retry on the next refresh tick
+                self._expires[mint] = now + self.refresh_interval
+            future = self._inflight.pop(mint, None)
+            if future is not None and not future.done():
+                future.set_result(price)
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                self._track_usage()
+                stale = self._stale_mints()
+                if stale:
+                    await self.refresh(stale)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in price refresh loop: {e}")
+            await asyncio.sleep(self.refresh_interval)
@@ -0,0 +1,175 @@
+import asyncio
+import cProfile
+import os
+import pstats
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+MODES = ("sample", "cprofile")
+
+# Worker task names end in a number ("pipeline-decode-3"); samples are grouped per pool
+_TASK_NUMBER = re.compile(r"-\d+$")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame) -> List[str]:
+    """Frame labels from the outermost call to `frame`"""
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _task_stack(task: asyncio.Task) -> List[str]:
+    """Where a suspended task is waiting: its coroutine chain, outermost first"""
+    stack = []
+    awaitable = task.get_coro()
+    if getattr(awaitable, "cr_running", False):
+        # Running right now, so it is in the thread stack instead
+        return stack
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(_frame_label(frame))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return stack
+
+
+class SamplingProfiler:
+    """Samples the event loop thread from a background thread.
+
+    Every `interval` seconds it records the loop thread's current call stack
+    (time spent running Python: JSON parsing, decoding, detection) and,
+    separately, the await chain of every suspended task (time spent waiting,
+    e.g. on an RPC response or a full queue). Nothing is installed in the
+    loop itself, so there is no overhead outside a profiling window, and
+    inside one the cost is proportional to the sampling rate.
+
+    The result is in collapsed-stack format ("frame;frame;frame count"),
+    which flamegraph.pl and speedscope read directly. Loop stacks are rooted
+    at "running", task stacks at "awaiting;<task name>".
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, thread_id: int, interval: float = 0.005,
+                 include_tasks: bool = True, exclude: Optional[asyncio.Task] = None):
+        self.loop = loop
+        self.thread_id = thread_id
+        self.interval = max(0.0005, interval)
+        self.include_tasks = include_tasks
+        self.exclude = exclude
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception as e:
+                # Task sets can change under us; skip the sample rather than stop
+                logger.debug(f"Profiler sample failed: {e}")
+
+    def _sample(self):
+        self.samples += 1
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is not None:
+            self.stacks[";".join(["running"] + _thread_stack(frame))] += 1
+        if not self.include_tasks:
+            return
+        for task in list(asyncio.all_tasks(self.loop)):
+            if task is self.exclude or task.done():
+                continue
+            stack = _task_stack(task)
+            if stack:
+                name = _TASK_NUMBER.sub("", task.get_name())
+                self.stacks[";".join(["awaiting", name] + stack)] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileSession:
+    """At most one profiling window at a time, in either mode.
+
+    "sample" runs a SamplingProfiler and returns collapsed stacks; "cprofile"
+    turns on cProfile in the event loop thread (so everything the loop runs
+    is traced, with the usual cProfile overhead) and returns pstats data.
+    Work done in analysis worker processes is not covered by either.
+    """
+
+    def __init__(self, max_seconds: float = 60.0):
+        self.max_seconds = max_seconds
+        self.active: Optional[Dict[str, Any]] = None
+        self.completed = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"active": self.active, "completed": self.completed, "max_seconds": self.max_seconds}
+
+    async def run(self, seconds: float, mode: str = "sample", interval: float = 0.005) -> bytes:
+        """Profile the running loop for `seconds` and return the encoded result"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r}, expected one of {MODES}")
+        if self.active is not None:
+            raise RuntimeError("A profile is already being recorded")
+        seconds = min(max(0.1, seconds), self.max_seconds)
+        self.active = {"mode": mode, "seconds": seconds, "started": time.time()}
+        logger.info(f"Profiling the event loop for {seconds:.1f}s ({mode})")
+        try:
+            if mode == "sample":
+                return await self._sample(seconds, interval)
+            return await self._cprofile(seconds)
+        finally:
+            self.active = None
+            self.completed += 1
+
+    async def _sample(self, seconds: float, interval: float) -> bytes:
+        profiler = SamplingProfiler(asyncio.get_running_loop(), threading.get_ident(), interval,
+                                    exclude=asyncio.current_task())
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+        logger.info(f"Profile done: {profiler.samples} samples, {len(profiler.stacks)} distinct stacks")
+        return profiler.collapsed().encode()
+
+    async def _cprofile(self, seconds: float) -> bytes:
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+        fd, path = tempfile.mkstemp(suffix=".pstats")
+        os.close(fd)
+        try:
+            pstats.Stats(profile).dump_stats(path)
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            os.remove(path)
@@ -0,0 +1,149 @@
+import json
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Known DEX program IDs
+DEFAULT_PROGRAMS = {
+    "JUP4Fb2cqiRUcaTHdrPC8h2gNsA2ETXiPDD33WcGuJB": "Jupiter V4",
+    "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4": "Jupiter V6",
+    "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8": "Raydium AMM",
+    "9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM": "Raydium CPMM",
+    "MERLuDFBMmsHnsBPZw2sDQZHvXFMwp8EdjudcU2HKky": "Meteora",
+    "PhoeNiX7VavoDXL4ZMD4fDbBGEz7dhc8EJQ1J4TjTaE": "Phoenix",
+    "opnb2LAfJYbRMAHHvqjCwQxanZn7ReEHp1k81EohpZb": "Openbook",
+    "TSWAPaqyCSx2KABk68Shruf4rp7CxcNi8hAsbdwmHbN": "Tensor"
+}
+
+# Case-insensitive log substrings and the platform they identify. Order is
+# priority: a log line matching several counts only for the first.
+DEFAULT_LOG_PATTERNS = [
+    ("jupiter", "Jupiter"),
+    ("raydium", "Raydium"),
+    ("meteora", "Meteora")
+]
+
+# Known token mints
+DEFAULT_TOKENS = {
+    "So11111111111111111111111111111111111111112": "SOL",
+    "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": "USDC",
+    "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": "USDT",
+    "mSoLzYCxHdYgdzU16g5QSh3i5K3z3KZK7ytfqcJm7So": "mSOL",
+    "7dHbWXmci3dT8UFYWYZweBLXgycu7Y3iL6trKn1Y7ARj": "stSOL",
+    "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263": "BONK",
+    "5oVNBeEEQvYi1cX3ir8Dx5n1P7pdxydbGF2X4TxVusJm": "INF",
+    "J1toso1uCk3RLmjorhTtrVwY9HJ7X8V9yYac6Y7kGCPn": "jitoSOL"
+}
+
+
+class DexRegistry:
+    """Known DEX programs, log signatures and token mints, shared by the client and decoder.
+
+    Log lines are joined and lowercased once per transaction, and each log
+    signature is located with one substring search over the joined text,
+    instead of a lowercase copy and a chain of checks per line. (CPython's
+    regex engine scans a combined alternation several times slower than
+    repeated str.find, so patterns are not merged into one regex.)
+    """
+
+    def __init__(self,
+                 programs: Optional[Dict[str, str]] = None,
+                 log_patterns: Optional[Iterable[Tuple[str, str]]] = None,
+                 tokens: Optional[Dict[str, str]] = None):
+        self.programs: Dict[str, str] = dict(DEFAULT_PROGRAMS if programs is None else programs)
+        self.tokens: Dict[str, str] = dict(DEFAULT_TOKENS if tokens is None else tokens)
+        self.log_patterns: List[Tuple[str, str]] = []
+        for pattern, platform in (DEFAULT_LOG_PATTERNS if log_patterns is None else log_patterns):
+            self._add_log_pattern(pattern, platform)
+        self._compile()
+
+    def _add_log_pattern(self, pattern: str, platform: str):
+        pattern = pattern.lower()
+        if not pattern or "\n" in pattern:
+            raise ValueError(f"Invalid log pattern: {pattern!r}")
+        for i, (existing, _) in enumerate(self.log_patterns):
+            if existing == pattern:
+                self.log_patterns[i] = (pattern, platform)
+                return
+        self.log_patterns.append((pattern, platform))
+
+    def _compile(self):
+        self.program_ids = frozenset(self.programs)
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> "DexRegistry":
+        """Defaults plus the programs, log patterns and tokens in a JSON file, if given.
+
+        The file looks like {"programs": {"<program id>": "Name"},
+        "log_patterns": [["substring", "Platform"], ...], "tokens": {"<mint>": "SYMBOL"}};
+        every section is optional and its entries are added to (or override)
+        the defaults.
+        """
+        registry = cls()
+        if not path:
+            return registry
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            registry.programs.update(data.get("programs") or {})
+            registry.tokens.update(data.get("tokens") or {})
+            for pattern, platform in data.get("log_patterns") or []:
+                registry._add_log_pattern(pattern, platform)
+            registry._compile()
+        except Exception as e:
+            logger.error(f"Error loading DEX registry from {path}, using defaults: {e}")
+            return cls()
+        logger.info(f"Loaded DEX registry from {path}: {len(registry.programs)} programs, "
+                    f"{len(registry.log_patterns)} log patterns, {len(registry.tokens)} tokens")
+        return registry
+
+    def token_symbol(self, mint: str) -> str:
+        return self.tokens.get(mint, mint[:8])
+
+    def identify_platforms(self, program_ids: Iterable[str], logs: List[str]) -> Set[str]:
+        """Platforms named by any of the program ids, plus those found in the logs"""
+        programs = self.programs
+        platforms = {programs[program_id] for program_id in program_ids if program_id in programs}
+        if not logs or not self.log_patterns:
+            return platforms
+
+        text = "\n".join(logs).lower()
+        ends = None
+        # Patterns in priority order, so the first rank recorded for a line is its best
+        best: Dict[int, int] = {}
+        for rank, (pattern, _) in enumerate(self.log_patterns):
+            position = text.find(pattern)
+            while position != -1:
+                if ends is None:
+                    ends = self._line_ends(text, logs)
+                line = bisect_right(ends, position)
+                best.setdefault(line, rank)
+                # One hit per line is enough; continue from the next line
+                position = text.find(pattern, ends[line])
+        log_patterns = self.log_patterns
+        platforms.update(log_patterns[rank][1] for rank in best.values())
+        return platforms
+
+    @staticmethod
+    def _line_ends(text: str, logs: List[str]) -> List[int]:
+        """Offset just past each log line in the joined, lowercased text"""
+        if len(text) == sum(map(len, logs)) + len(logs) - 1:
+            return list(accumulate(len(log) + 1 for log in logs))
+        # Lowercasing changed some lengths; measure the lowered lines
+        return list(accumulate(len(log.lower()) + 1 for log in logs))
+
+
+_default_registry: Optional[DexRegistry] = None
+
+
+def get_registry() -> DexRegistry:
+    """The process-wide registry, loaded from MEV_REGISTRY_PATH on first use"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = DexRegistry.load(config.REGISTRY_PATH)
+    return _default_registry
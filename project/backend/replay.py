@@ -0,0 +1,493 @@
+"""Offline replay of recorded getTransaction results through decode and detect.
+
+Streams newline-delimited JSON dumps (one getTransaction result or full JSON-RPC
+response per line; plain, .gz, .bz2, .xz, or .zst when the zstandard package
+is installed) through TransactionDecoder and MEVDetector on all cores, without
+the API or an RPC node, and writes the results to the SQLite persistent store
+or to an NDJSON file.
+
+    python replay.py dumps/*.ndjson.gz --db mev_transactions.db --checkpoint replay.ckpt
+    python replay.py dump.ndjson --output results.ndjson --workers 8
+
+With --checkpoint, progress is saved as (file, line) offsets once the results
+before them are durably written, and a rerun with the same inputs resumes there.
+"""
+import argparse
+import asyncio
+import base64
+import bz2
+import gzip
+import json
+import lzma
+import multiprocessing
+import os
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Deque, Dict, IO, Iterator, List, Optional, Set, Tuple
+
+import config
+from analysis_workers import decode_and_detect_batch
+from persistent_store import COLUMNS, PersistentStore, transaction_row
+from pipeline import build_mev_transaction
+from price_service import DEFAULT_PRICES
+from swap_index import SwapIndex
+from wire_format import b58encode, parse_transaction
+
+# Column positions in a transaction_row, for relabeling held rows
+SIGNATURE, SLOT, IS_MEV, PATTERN, CONFIDENCE, EXPLANATION = (
+    COLUMNS.index(name) for name in ("signature", "slot", "is_mev", "pattern", "confidence", "explanation")
+)
+
+# Prices never change during a replay, so workers load them once
+PRICE_VERSION = 1
+
+_prices: Dict[str, float] = {}
+
+
+def _init_replay_worker(prices: Dict[str, float]):
+    global _prices
+    _prices = prices
+
+
+def _transaction_signature(tx_data: Dict[str, Any]) -> Optional[str]:
+    transaction = tx_data.get("transaction")
+    if isinstance(transaction, list):
+        signatures = parse_transaction(base64.b64decode(transaction[0]))["signatures"]
+        return b58encode(signatures[0]) if signatures else None
+    if isinstance(transaction, dict):
+        signatures = transaction.get("signatures") or []
+        return signatures[0] if signatures else None
+    return None
+
+
+def _swap_key(compact: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
+    """(signer, input mint, output mint) for the slot index, if the transaction is a swap"""
+    transfers = compact.get("token_transfers") or []
+    inputs = [t for t in transfers if t["amount_change"] < 0]
+    outputs = [t for t in transfers if t["amount_change"] > 0]
+    if not inputs or not outputs:
+        return None
+    return compact.get("wallet", ""), inputs[0]["mint"], outputs[0]["mint"]
+
+
+def replay_chunk(lines: List[bytes]) -> Tuple[List[tuple], int]:
+    """Worker entry point: analyze a chunk of dump lines.
+
+    Returns ([(row, swap_key, position), ...], failed_count) where row is a
+    persistent store row.
+    """
+    records = []
+    signatures = []
+    failed = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if "jsonrpc" in record:
+                record = record.get("result")
+            signature = _transaction_signature(record) if record else None
+        except Exception:
+            signature = None
+        if signature is None:
+            failed += 1
+            continue
+        records.append(record)
+        signatures.append(signature)
+
+    results = []
+    for signature, analyzed in zip(signatures, decode_and_detect_batch(records, PRICE_VERSION, _prices)):
+        if analyzed is None:
+            failed += 1
+            continue
+        try:
+            summary, compact, analysis = analyzed
+            row = transaction_row(build_mev_transaction(signature, summary, compact, analysis))
+            results.append((row, _swap_key(compact), summary.get("transactionIndex")))
+        except Exception:
+            failed += 1
+    return results, failed
+
+
+def _open_input(path: str) -> IO[bytes]:
+    if path == "-":
+        return sys.stdin.buffer
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith((".xz", ".lzma")):
+        return lzma.open(path, "rb")
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise SystemExit(f"{path}: reading .zst dumps requires the zstandard package")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True)
+    return open(path, "rb")
+
+
+def _read_chunks(inputs: List[str], chunk_size: int,
+                 start_file: int, start_line: int) -> Iterator[Tuple[int, int, List[bytes]]]:
+    """Yield (file index, line offset after the chunk, lines); chunks never span files"""
+    for file_index in range(start_file, len(inputs)):
+        skip = start_line if file_index == start_file else 0
+        line_no = 0
+        chunk: List[bytes] = []
+        stream = _open_input(inputs[file_index])
+        try:
+            lines = _iter_lines(stream) if inputs[file_index].endswith(".zst") else stream
+            for line in lines:
+                line_no += 1
+                if line_no <= skip:
+                    continue
+                chunk.append(line)
+                if len(chunk) >= chunk_size:
+                    yield file_index, line_no, chunk
+                    chunk = []
+            if chunk or line_no <= skip:
+                yield file_index, line_no, chunk
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+
+def _iter_lines(stream) -> Iterator[bytes]:
+    # zstandard stream readers are not line-iterable
+    pending = b""
+    while True:
+        block = stream.read(1 << 20)
+        if not block:
+            break
+        pending += block
+        *lines, pending = pending.split(b"\n")
+        yield from lines
+    if pending:
+        yield pending
+
+
+def _row_json(row: tuple) -> str:
+    """A row in the MEVTransaction JSON shape served by the API"""
+    record = dict(zip(COLUMNS, row))
+    record["timestamp"] = datetime.fromtimestamp(record.pop("block_time")).isoformat()
+    record["platforms"] = record["platforms"].split(",") if record["platforms"] else []
+    record["is_mev"] = bool(record["is_mev"])
+    return json.dumps(record)
+
+
+class _DatabaseSink:
+    def __init__(self, path: str):
+        self.store = PersistentStore(path, batch_size=5000, flush_interval=5.0)
+
+    async def open(self, offset: Optional[int]):
+        await self.store.open()
+
+    def write(self, rows: List[tuple]):
+        self.store.enqueue_rows(rows)
+
+    async def flush(self) -> Optional[int]:
+        # The store logs and drops a batch it fails to write (here or in its
+        # background writer); stop before a checkpoint moves past those rows
+        await self.store.flush()
+        if self.store.write_errors:
+            raise SystemExit(f"Writing to {self.store.path} failed ({self.store.write_errors} batches); "
+                             f"rerun to resume from the last checkpoint")
+        return None
+
+    async def close(self):
+        await self.store.close()
+
+
+class _FileSink:
+    """NDJSON output; gzip when the name ends in .gz.
+
+    Every flush ends a gzip member, so the file is valid and can be truncated
+    back to the last checkpoint on resume.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.compressed = path.endswith(".gz")
+        self.file: Optional[IO] = None
+
+    async def open(self, offset: Optional[int]):
+        if offset is not None and os.path.exists(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+            self.file = self._open("ab")
+        else:
+            self.file = self._open("wb")
+
+    def _open(self, mode: str) -> IO:
+        return gzip.open(self.path, mode) if self.compressed else open(self.path, mode)
+
+    def write(self, rows: List[tuple]):
+        self.file.write("".join(_row_json(row) + "\n" for row in rows).encode())
+
+    async def flush(self) -> Optional[int]:
+        if self.compressed:
+            self.file.close()
+            self.file = self._open("ab")
+            return os.path.getsize(self.path)
+        self.file.flush()
+        return self.file.tell()
+
+    async def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+class Replay:
+    """Runs dump chunks through worker processes and writes the results in input order.
+
+    Rows are held back until their slot leaves the swap index window, so a
+    sandwich or backrun found by a later transaction can still relabel them
+    before they are written. That needs block positions (transactionIndex),
+    which only dumps recorded from getBlock carry.
+
+    A transaction that appears again anywhere in the inputs is skipped, which
+    keeps every signature seen (roughly 200 bytes each). After a resume only
+    the signatures seen since resuming are known; the database sink replaces
+    rows by signature anyway.
+    """
+
+    def __init__(self, inputs: List[str], sink, workers: int, chunk_size: int,
+                 prices: Dict[str, float], checkpoint_path: Optional[str] = None,
+                 checkpoint_interval: float = 10.0, progress_interval: float = 5.0):
+        self.inputs = inputs
+        self.sink = sink
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.prices = prices
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.progress_interval = progress_interval
+        self.swap_index = SwapIndex(max_slots=config.SWAP_INDEX_SLOTS, max_swaps_per_slot=config.SWAP_INDEX_MAX_PER_SLOT)
+        # Safety valve for dumps that are far out of slot order
+        self.max_held = max(100_000, config.SWAP_INDEX_MAX_PER_SLOT)
+
+        self._held: Deque[Tuple[int, list, int]] = deque()
+        self._held_by_signature: Dict[str, list] = {}
+        self._seen: Set[str] = set()
+        # Released rows wait here until their whole chunk is released, so the
+        # output always ends exactly at a chunk boundary (the resume position)
+        self._released: List[Tuple[int, tuple]] = []
+        # chunk id -> [rows still held (None until collected), records, file index, line offset after the chunk]
+        self._chunks: "OrderedDict[int, list]" = OrderedDict()
+        self._position: Tuple[int, int] = (0, 0)
+        self._position_records = 0
+
+        self.records = 0
+        self.written = 0
+        self.failed = 0
+        self.relabeled = 0
+        self.duplicates = 0
+
+    def _load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("inputs") != self.inputs:
+            raise SystemExit(f"{self.checkpoint_path} was written for different inputs; remove it to start over")
+        return checkpoint
+
+    async def _save_checkpoint(self):
+        offset = await self.sink.flush()
+        if not self.checkpoint_path:
+            return
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "inputs": self.inputs,
+                "file": self._position[0],
+                "line": self._position[1],
+                "records": self._position_records,
+                "output_offset": offset
+            }, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    async def run(self) -> Dict[str, Any]:
+        checkpoint = self._load_checkpoint()
+        if checkpoint:
+            self._position = (checkpoint["file"], checkpoint["line"])
+            self.records = self._position_records = checkpoint.get("records", 0)
+            print(f"Resuming at {self.inputs[self._position[0]] if self._position[0] < len(self.inputs) else 'end'}"
+                  f" line {self._position[1]} ({self.records:,} records already replayed)", file=sys.stderr)
+        await self.sink.open(checkpoint.get("output_offset") if checkpoint else None)
+
+        executor = None
+        if self.workers > 0:
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_replay_worker,
+                initargs=(self.prices,)
+            )
+        else:
+            _init_replay_worker(self.prices)
+
+        started = time.perf_counter()
+        resumed_records = self.records
+        last_progress = last_checkpoint = started
+        in_flight: Deque[Tuple[int, Any]] = deque()
+        max_in_flight = max(1, self.workers) * 4
+        try:
+            chunk_id = 0
+            for file_index, end_line, lines in _read_chunks(self.inputs, self.chunk_size, *self._position):
+                self._chunks[chunk_id] = [None, 0, file_index, end_line]
+                if executor:
+                    in_flight.append((chunk_id, asyncio.wrap_future(executor.submit(replay_chunk, lines))))
+                else:
+                    in_flight.append((chunk_id, replay_chunk(lines)))
+                chunk_id += 1
+
+                while len(in_flight) >= max_in_flight:
+                    await self._collect(*in_flight.popleft())
+
+                now = time.perf_counter()
+                if now - last_progress >= self.progress_interval:
+                    self._report(now - started, self.records - resumed_records)
+                    last_progress = now
+                if now - last_checkpoint >= self.checkpoint_interval:
+                    await self._save_checkpoint()
+                    last_checkpoint = now
+
+            while in_flight:
+                await self._collect(*in_flight.popleft())
+            self._release(flush_all=True)
+            await self._save_checkpoint()
+        finally:
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+            await self.sink.close()
+
+        elapsed = time.perf_counter() - started
+        replayed = self.records - resumed_records
+        return {
+            "records": replayed,
+            "written": self.written,
+            "failed": self.failed,
+            "relabeled": self.relabeled,
+            "duplicates": self.duplicates,
+            "seconds": round(elapsed, 3),
+            "records_per_second": round(replayed / elapsed, 1) if elapsed > 0 else 0.0,
+            "swap_index": self.swap_index.stats()
+        }
+
+    async def _collect(self, chunk_id: int, result: Any):
+        if asyncio.isfuture(result):
+            result = await result
+        results, failed = result
+        self.failed += failed
+        self.records += len(results) + failed
+
+        chunk = self._chunks[chunk_id]
+        chunk[0] = len(results)
+        chunk[1] = len(results) + failed
+        observe = self.swap_index.observe
+        for row, swap, position in results:
+            row = list(row)
+            signature, slot = row[SIGNATURE], row[SLOT]
+            if signature in self._seen:
+                # Same transaction twice in the dumps; keep the first
+                self.duplicates += 1
+                chunk[0] -= 1
+                continue
+            self._seen.add(signature)
+            self._held.append((slot, row, chunk_id))
+            self._held_by_signature[signature] = row
+            if swap is None:
+                continue
+            for finding in observe(signature, slot, *swap, position=position):
+                target = self._held_by_signature.get(finding["signature"])
+                if target is None:
+                    continue
+                target[IS_MEV] = 1
+                target[PATTERN] = finding["pattern"].value
+                target[CONFIDENCE] = finding["confidence"]
+                target[EXPLANATION] = finding["explanation"]
+                self.relabeled += 1
+        self._release()
+
+    def _release(self, flush_all: bool = False):
+        """Write held rows whose slot can no longer be part of a new finding"""
+        window_start = self.swap_index.window_start()
+        held = self._held
+        released = self._released
+        chunks = self._chunks
+        while held and (flush_all or held[0][0] < window_start or len(held) > self.max_held):
+            _, row, chunk_id = held.popleft()
+            del self._held_by_signature[row[SIGNATURE]]
+            released.append((chunk_id, tuple(row)))
+            chunks[chunk_id][0] -= 1
+
+        # Advance the resume position past every fully released chunk
+        while chunks:
+            chunk_id, (remaining, records, file_index, end_line) = next(iter(chunks.items()))
+            if remaining is None or remaining > 0:
+                break
+            chunks.popitem(last=False)
+            self._position = (file_index, end_line)
+            self._position_records += records
+
+        # ...and write the rows of those chunks
+        done = 0
+        while done < len(released) and released[done][0] not in chunks:
+            done += 1
+        if done:
+            self.sink.write([row for _, row in released[:done]])
+            self.written += done
+            del released[:done]
+
+    def _report(self, elapsed: float, replayed: int):
+        rate = replayed / elapsed if elapsed > 0 else 0.0
+        print(f"{self.records:,} records ({rate:,.0f}/s), {self.written:,} written, {self.failed:,} failed",
+              file=sys.stderr)
+
+
+def _load_prices(path: Optional[str]) -> Dict[str, float]:
+    prices = dict(DEFAULT_PRICES)
+    if path:
+        with open(path) as f:
+            prices.update({mint: float(price) for mint, price in json.load(f).items()})
+    return prices
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="NDJSON dump files ('-' for stdin)")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--db", default=config.DB_PATH, help="SQLite persistent store to write to (default: %(default)s)")
+    output.add_argument("--output", help="Write NDJSON results to this file instead (.gz to compress)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes; 0 analyzes in this process (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Lines per worker task")
+    parser.add_argument("--checkpoint", help="Checkpoint file to save progress to and resume from")
+    parser.add_argument("--checkpoint-interval", type=float, default=10.0, help="Seconds between checkpoints")
+    parser.add_argument("--prices", help="JSON object of mint -> USDC price, overriding the static table")
+    args = parser.parse_args()
+
+    sink = _FileSink(args.output) if args.output else _DatabaseSink(args.db)
+    replay = Replay(
+        args.inputs,
+        sink,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        prices=_load_prices(args.prices),
+        checkpoint_path=args.checkpoint,
+        checkpoint_interval=args.checkpoint_interval
+    )
+    summary = asyncio.run(replay.run())
+    print(f"Replayed {summary['records']:,} records in {summary['seconds']:.1f}s "
+          f"({summary['records_per_second']:,.0f} records/s): {summary['written']:,} written, "
+          f"{summary['failed']:,} failed, {summary['duplicates']:,} duplicates skipped, "
+          f"{summary['relabeled']:,} relabeled by slot context")
+
+
+if __name__ == "__main__":
+    main()
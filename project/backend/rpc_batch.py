@@ -0,0 +1,171 @@
+import asyncio
+import itertools
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import logging
+
+from rpc_pool import RETRIES, RETRIES_DENIED, RetryBudget, RetryPolicy, RpcError, retryable_response
+
+logger = logging.getLogger(__name__)
+
+# Sends one JSON-RPC payload (a single request object or an array of them) and
+# returns the decoded JSON response body.
+RPCSender = Callable[[Any], Awaitable[Any]]
+# Decodes a response body the sender returned undecoded (e.g. raw bytes)
+ResponseDecoder = Callable[[Any], Awaitable[Any]]
+
+# A queued call: its request object, its caller's future and which attempt it is on
+PendingCall = Tuple[Dict[str, Any], asyncio.Future, int]
+
+
+class JsonRpcBatcher:
+    """Coalesces concurrent JSON-RPC calls into batch (array) requests.
+
+    Calls made within `window` seconds of each other are merged into one HTTP
+    request of up to `max_batch_size` entries. Each call gets a unique id and
+    responses are routed back to their callers by that id, regardless of the
+    order the node returns them in.
+
+    Given a retry policy, each call is retried on its own: when the whole
+    request fails with a retryable RpcError, or when its entry in the batch
+    says the node could not serve it yet, the call is queued again after a
+    jittered backoff and goes out with whatever batch is forming then. Each
+    such retry spends one token from `budget`.
+
+    If `send` returns the response body undecoded, `decode` turns it into
+    the response object(s), e.g. in another process.
+    """
+
+    def __init__(self, send: RPCSender, max_batch_size: int = 100, window: float = 0.005,
+                 retry: Optional[RetryPolicy] = None, budget: Optional[RetryBudget] = None,
+                 decode: Optional[ResponseDecoder] = None):
+        self.send = send
+        self.decode = decode
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0.0, window)
+        self.retry = retry
+        self.budget = budget
+        self._ids = itertools.count(1)
+        self._pending: List[PendingCall] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+        # Counters for observing how well calls are being merged
+        self.calls = 0
+        self.batches = 0
+        self.retries = 0
+        self.retries_denied = 0
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    async def call(self, method: str, params: List[Any]) -> Dict[str, Any]:
+        """Queue a call and wait for its JSON-RPC response object"""
+        future = asyncio.get_running_loop().create_future()
+        request = {
+            "jsonrpc": "2.0",
+            "id": self.next_id(),
+            "method": method,
+            "params": params
+        }
+        self.calls += 1
+        self._enqueue((request, future, 1))
+        return await future
+
+    async def close(self):
+        """Flush anything queued and wait for in-flight batches and retries"""
+        while self._pending or self._tasks:
+            if self._pending:
+                self._flush()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _enqueue(self, entry: PendingCall):
+        self._pending.append(entry)
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            self._spawn(self._send_batch(batch))
+
+    def _spawn(self, coroutine: Awaitable[Any]):
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send_batch(self, batch: List[PendingCall]):
+        self.batches += 1
+        requests = [request for request, _, _ in batch]
+        # A lone call goes out as a plain request object
+        payload = requests[0] if len(requests) == 1 else requests
+
+        try:
+            body = await self.send(payload)
+            if self.decode is not None:
+                body = await self.decode(body)
+        except Exception as e:
+            retryable = isinstance(e, RpcError) and e.retryable
+            for entry in batch:
+                if not entry[1].done() and not (retryable and self._retry(entry)):
+                    entry[1].set_exception(e)
+            return
+
+        responses = body if isinstance(body, list) else [body]
+        by_id = {}
+        for response in responses:
+            if isinstance(response, dict) and "id" in response:
+                by_id[response["id"]] = response
+
+        for entry in batch:
+            request, future, _ = entry
+            if future.done():
+                continue
+            response = by_id.get(request["id"])
+            if response is None:
+                # Batch-level errors come back as a single object with a null id
+                if len(responses) == 1 and isinstance(responses[0], dict) and "error" in responses[0]:
+                    response = responses[0]
+                else:
+                    response = {
+                        "jsonrpc": "2.0",
+                        "id": request["id"],
+                        "error": {"code": -32603, "message": "Missing response in batch"}
+                    }
+            if retryable_response(request, response) and self._retry(entry):
+                continue
+            future.set_result(response)
+
+    def _retry(self, entry: PendingCall) -> bool:
+        """Queue a call again after a backoff, if the policy and budget allow"""
+        request, future, attempt = entry
+        if self.retry is None or attempt >= self.retry.max_attempts:
+            return False
+        if self.budget is not None and not self.budget.withdraw():
+            self.retries_denied += 1
+            RETRIES_DENIED.inc()
+            return False
+        logger.debug(f"Retrying {request['method']} call {request['id']} (attempt {attempt + 1})")
+        self.retries += 1
+        RETRIES.inc()
+        self._spawn(self._requeue((request, future, attempt + 1), self.retry.backoff(attempt)))
+        return True
+
+    async def _requeue(self, entry: PendingCall, delay: float):
+        await asyncio.sleep(delay)
+        if not entry[1].done():
+            self._enqueue(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "batches": self.batches,
+            "retries": self.retries,
+            "retries_denied": self.retries_denied
+        }
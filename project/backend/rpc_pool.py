@@ -0,0 +1,629 @@
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+import httpx
+
+import config
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# An endpoint that has never answered, or not for STALE_AFTER seconds, is
+# tried first, so new, recovered and long-unused endpoints get (re)measured
+UNMEASURED_LATENCY = 0.0
+STALE_AFTER = 2.0
+LATENCY_SMOOTHING = 0.2
+MAX_EJECT_SECONDS = 60.0
+# Longest a request waits for a token or a concurrency slot before checking again
+MAX_WAIT = 0.05
+# JSON-RPC errors a node returns while it is behind or briefly unable to serve
+# (node unhealthy, block not available yet, min context slot not reached)
+TRANSIENT_ERROR_CODES = frozenset({-32004, -32005, -32014, -32016})
+# Methods whose null result means the node has not seen the data yet (the
+# callers only ask for transactions they know were confirmed)
+NULL_RESULT_METHODS = frozenset({"getTransaction"})
+
+RETRIES = metrics.counter("mev_rpc_retries_total", "RPC requests retried after a failed attempt")
+RETRIES_DENIED = metrics.counter("mev_rpc_retries_denied_total", "Retries not made because the retry budget was spent")
+HEDGES = metrics.counter("mev_rpc_hedges_total", "Duplicate requests sent to a second endpoint after the hedge delay")
+HEDGE_WINS = metrics.counter("mev_rpc_hedge_wins_total", "Hedged requests answered first by the duplicate")
+
+
+class RpcError(Exception):
+    """An endpoint failed to answer (transport error, timeout, HTTP error status)"""
+
+    def __init__(self, message: str, endpoint: Optional[str] = None, retryable: bool = True,
+                 status: Optional[int] = None, response: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.endpoint = endpoint
+        self.retryable = retryable
+        self.status = status
+        # The JSON-RPC response, when the node answered but could not serve the request
+        self.response = response
+
+
+def retryable_response(request: Dict[str, Any], response: Dict[str, Any]) -> bool:
+    """Whether a JSON-RPC response means this node could not serve the request yet"""
+    error = response.get("error")
+    if error:
+        return isinstance(error, dict) and error.get("code") in TRANSIENT_ERROR_CODES
+    return response.get("result") is None and request.get("method") in NULL_RESULT_METHODS
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = max(1.0, burst if burst is not None else rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is now)"""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        if self.rate > 0:
+            self._refill(now)
+            self.tokens -= 1
+
+
+class AimdLimiter:
+    """Additive-increase / multiplicative-decrease concurrency limit.
+
+    Each success raises the limit by 1/limit (about +1 per round trip's worth
+    of requests); a 429 or timeout halves it, at most once per `cooldown`
+    seconds so a burst of failures from the same overload counts once.
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1, decrease: float = 0.5):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease = decrease
+        self._last_decrease = 0.0
+
+    def on_success(self):
+        self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def on_overload(self, now: float, cooldown: float):
+        if now - self._last_decrease < cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit * self.decrease)
+
+    def allows(self, in_flight: int) -> bool:
+        return in_flight < int(self.limit)
+
+
+class RpcEndpoint:
+    """One RPC node: its own HTTP connection pool, rate limit, concurrency limit and health.
+
+    After `eject_after` consecutive failures the endpoint is ejected for
+    `eject_seconds`, doubling (up to a minute) each time it fails again. Once
+    the period is over a single probe request is let through; success puts
+    it back in rotation.
+    """
+
+    def __init__(self, url: str,
+                 rate_limit: float = 10.0,
+                 burst: Optional[float] = None,
+                 max_connections: int = 20,
+                 initial_concurrency: int = 4,
+                 timeout: float = 30.0,
+                 weight: float = 1.0,
+                 eject_after: int = 3,
+                 eject_seconds: float = 5.0):
+        self.url = url
+        self.weight = max(0.01, weight)
+        self.timeout = timeout
+        self.max_connections = max(1, max_connections)
+        self.bucket = TokenBucket(rate_limit, burst)
+        self.limiter = AimdLimiter(initial_concurrency, self.max_connections)
+        self.eject_after = max(1, eject_after)
+        self.eject_seconds = eject_seconds
+        self.client: Optional[httpx.AsyncClient] = None
+
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.answered_at = 0.0
+        self.paused_until = 0.0
+        self.consecutive_failures = 0
+        self.ejected_until: Optional[float] = None
+        self.ejections = 0
+        self._probing = False
+
+        self.requests = 0
+        self.failures = 0
+        self.throttled = 0
+        self.timeouts = 0
+
+    def open(self):
+        self.client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections)
+        )
+
+    async def close(self):
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    def is_ejected(self, now: float) -> bool:
+        return self.ejected_until is not None and (now < self.ejected_until or self._probing)
+
+    def has_capacity(self) -> bool:
+        return self.limiter.allows(self.in_flight)
+
+    def delay(self, now: float) -> float:
+        """Seconds until the rate limit (and any Retry-After) allows another request"""
+        return max(self.bucket.delay(now), self.paused_until - now)
+
+    def score(self, now: float) -> float:
+        """Expected wait for a new request here; lower is better"""
+        latency = self.latency
+        if latency is None or now - self.answered_at > STALE_AFTER:
+            latency = UNMEASURED_LATENCY
+        return latency * (self.in_flight + 1) / self.weight
+
+    def reserve(self):
+        """Take a rate-limit token and a concurrency slot for a request about to be sent"""
+        self.bucket.take(time.monotonic())
+        if self.ejected_until is not None:
+            self._probing = True
+        self.in_flight += 1
+        self.requests += 1
+
+    def release(self):
+        """Give back the slot taken by reserve once its request is over"""
+        self.in_flight -= 1
+        self._probing = False
+
+    async def post(self, payload: Any, raw: bool = False) -> Any:
+        """Send one JSON-RPC payload; raises RpcError if the endpoint failed.
+
+        The caller takes a slot with reserve() before calling this and hands
+        it back with release() afterwards, however the request ended. With
+        `raw` the response body is returned as bytes, unparsed and unchecked.
+        """
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(self.url, json=payload)
+        except httpx.TimeoutException as e:
+            self.timeouts += 1
+            self.limiter.on_overload(time.monotonic(), self.latency or 0.0)
+            self._failed()
+            raise RpcError(f"Timed out after {time.perf_counter() - started:.1f}s: {e!r}", self.url) from e
+        except httpx.HTTPError as e:
+            self._failed()
+            raise RpcError(f"Request failed: {e!r}", self.url) from e
+
+        elapsed = time.perf_counter() - started
+        if response.status_code == 429:
+            self.throttled += 1
+            now = time.monotonic()
+            self.limiter.on_overload(now, self.latency or elapsed)
+            retry_after = _retry_after(response)
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            # Throttling is back-pressure, not a sign the node is down
+            raise RpcError("Rate limited (429)", self.url, status=429)
+        if response.status_code >= 500:
+            self._failed()
+            raise RpcError(f"HTTP {response.status_code}", self.url, status=response.status_code)
+        if response.status_code >= 400:
+            raise RpcError(f"HTTP {response.status_code}", self.url, retryable=False, status=response.status_code)
+        if raw:
+            body = response.content
+        else:
+            try:
+                body = response.json()
+            except ValueError as e:
+                self._failed()
+                raise RpcError(f"Invalid JSON response: {e}", self.url) from e
+        if not raw and isinstance(payload, dict) and isinstance(body, dict) and retryable_response(payload, body):
+            # The node answered, so it stays healthy, but another one may have the data.
+            # Calls inside a batch are checked, and retried, one by one by the batcher.
+            message = (body.get("error") or {}).get("message") or "null result"
+            raise RpcError(f"Node not ready: {message}", self.url, response=body)
+
+        self.latency = elapsed if self.latency is None else self.latency + LATENCY_SMOOTHING * (elapsed - self.latency)
+        self.answered_at = time.monotonic()
+        self.limiter.on_success()
+        self.consecutive_failures = 0
+        if self.ejected_until is not None and time.monotonic() >= self.ejected_until:
+            logger.info(f"RPC endpoint {self.url} recovered")
+            self.ejected_until = None
+            self.ejections = 0
+        return body
+
+    def _failed(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        now = time.monotonic()
+        if self.ejected_until is not None:
+            if now < self.ejected_until:
+                # A request sent before the ejection; it is already out of rotation
+                return
+        elif self.consecutive_failures < self.eject_after:
+            return
+        seconds = min(MAX_EJECT_SECONDS, self.eject_seconds * 2 ** self.ejections)
+        self.ejected_until = now + seconds
+        self.ejections += 1
+        logger.warning(f"Ejecting RPC endpoint {self.url} for {seconds:.0f}s "
+                       f"after {self.consecutive_failures} consecutive failures")
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "url": self.url,
+            "healthy": self.ejected_until is None,
+            "ejected_for_seconds": round(max(0.0, self.ejected_until - now), 1) if self.ejected_until else 0.0,
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.in_flight,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "rate_limit": self.bucket.rate,
+            "requests": self.requests,
+            "failures": self.failures,
+            "throttled": self.throttled,
+            "timeouts": self.timeouts,
+            "ejections": self.ejections
+        }
+
+
+def _give_up(error: RpcError) -> Any:
+    if error.response is not None:
+        return error.response
+    raise error
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+class RetryPolicy:
+    """How many times to send a request and how long to wait between attempts.
+
+    Delays use "full jitter": a uniform draw between 0 and an exponentially
+    growing cap, so clients retrying after the same failure spread out.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.05, max_delay: float = 2.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, retry: int) -> float:
+        """Delay before the `retry`-th retry (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+
+class RetryBudget:
+    """Caps retries and hedges at a fraction of request volume.
+
+    Every call deposits `ratio` tokens and `min_per_second` more accrue
+    over time (so a quiet client can still retry); each call retried or
+    hedged spends one, so a batch request counts once per call in it. When
+    the RPC is failing across the board this stops retries from multiplying
+    the load on it.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 5.0, max_balance: float = 100.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_balance = max_balance
+        self.balance = max_balance
+        self.updated = time.monotonic()
+
+    def deposit(self, calls: int = 1):
+        self.balance = min(self.max_balance, self.balance + self.ratio * calls)
+
+    def withdraw(self, calls: int = 1) -> bool:
+        now = time.monotonic()
+        self.balance = min(self.max_balance, self.balance + (now - self.updated) * self.min_per_second)
+        self.updated = now
+        if self.balance < calls:
+            return False
+        self.balance -= calls
+        return True
+
+
+class LatencyTracker:
+    """Recent successful response times per payload key, for choosing the hedge delay"""
+
+    def __init__(self, percentile: float = 0.95, window: int = 256, min_samples: int = 20,
+                 min_delay: float = 0.01):
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._samples: Dict[str, Deque[float]] = {}
+        self._cached: Dict[str, float] = {}
+        self._since_update: Dict[str, int] = {}
+
+    def record(self, key: str, seconds: float):
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+        self._since_update[key] = self._since_update.get(key, 0) + 1
+
+    def delay(self, key: str) -> Optional[float]:
+        """The percentile latency for `key`, or None until there are enough samples"""
+        samples = self._samples.get(key)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        # Sorting the window is cheap but not free; refresh every 16 new samples
+        if key not in self._cached or self._since_update[key] >= 16:
+            ordered = sorted(samples)
+            self._cached[key] = max(self.min_delay, ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))])
+            self._since_update[key] = 0
+        return self._cached[key]
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {key: round(delay * 1000, 1) if delay is not None else None
+                for key, delay in ((key, self.delay(key)) for key in self._samples)}
+
+
+def _payload_key(payload: Any) -> str:
+    """The method, plus the size rounded up to a power of two for a batch"""
+    if isinstance(payload, dict):
+        return str(payload.get("method"))
+    methods = {item.get("method") for item in payload if isinstance(item, dict)}
+    method = methods.pop() if len(methods) == 1 else "mixed"
+    return f"{method}[{1 << (len(payload) - 1).bit_length()}]"
+
+
+def _calls(payload: Any) -> int:
+    return len(payload) if isinstance(payload, list) else 1
+
+
+class RpcPool:
+    """Routes JSON-RPC payloads across several endpoints.
+
+    Each request goes to the healthy endpoint with the lowest expected wait
+    (smoothed latency times queue depth, divided by weight) that has both a
+    rate-limit token and a free concurrency slot, waiting if none has. When
+    every endpoint is ejected, the one due back soonest is probed rather
+    than failing outright.
+
+    A failed attempt is retried after a jittered backoff, preferring an
+    endpoint not tried yet, up to the retry policy's attempts and while the
+    retry budget allows. With hedging on, an attempt that has not answered
+    within the recent p95 latency for its method (and, for a batch, its
+    size) is duplicated to another endpoint that is ready right away; the
+    first answer wins and the other request is cancelled. Hedges spend
+    retry budget too, one token per call they duplicate.
+    """
+
+    def __init__(self, endpoints: Iterable[RpcEndpoint],
+                 retry: Optional[RetryPolicy] = None,
+                 budget: Optional[RetryBudget] = None,
+                 hedging: bool = False,
+                 latencies: Optional[LatencyTracker] = None):
+        self.endpoints: List[RpcEndpoint] = list(endpoints)
+        if not self.endpoints:
+            raise ValueError("An RPC pool needs at least one endpoint")
+        self.retry = retry or RetryPolicy()
+        self.budget = budget or RetryBudget()
+        self.hedging = hedging
+        self.latencies = latencies or LatencyTracker()
+        self._released = asyncio.Event()
+
+        self.requests = 0
+        self.retries = 0
+        self.retries_denied = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @classmethod
+    def from_config(cls) -> "RpcPool":
+        defaults = {
+            "rate_limit": config.RPC_RATE_LIMIT,
+            "max_connections": config.RPC_MAX_CONNECTIONS,
+            "initial_concurrency": config.RPC_INITIAL_CONCURRENCY,
+            "timeout": config.RPC_TIMEOUT,
+            "eject_after": config.RPC_EJECT_AFTER,
+            "eject_seconds": config.RPC_EJECT_SECONDS
+        }
+        specs: List[Dict[str, Any]] = [{"url": url} for url in config.RPC_URLS]
+        if config.RPC_ENDPOINTS_PATH:
+            try:
+                with open(config.RPC_ENDPOINTS_PATH) as f:
+                    specs = json.load(f)
+            except Exception as e:
+                logger.error(f"Error loading RPC endpoints from {config.RPC_ENDPOINTS_PATH}, using MEV_RPC_URLS: {e}")
+        return cls(
+            (RpcEndpoint(**dict(defaults, **spec)) for spec in specs),
+            retry=RetryPolicy(
+                max_attempts=config.RPC_RETRY_MAX_ATTEMPTS,
+                base_delay=config.RPC_RETRY_BASE_DELAY_MS / 1000.0,
+                max_delay=config.RPC_RETRY_MAX_DELAY_MS / 1000.0
+            ),
+            budget=RetryBudget(ratio=config.RPC_RETRY_BUDGET_RATIO,
+                               min_per_second=config.RPC_RETRY_BUDGET_MIN_PER_SECOND),
+            hedging=config.RPC_HEDGE_ENABLED,
+            latencies=LatencyTracker(percentile=config.RPC_HEDGE_PERCENTILE)
+        )
+
+    def open(self):
+        for endpoint in self.endpoints:
+            endpoint.open()
+
+    async def close(self):
+        for endpoint in self.endpoints:
+            await endpoint.close()
+
+    async def post(self, payload: Any, retry: bool = True, raw: bool = False) -> Any:
+        """Send a payload, retrying as the policy and budget allow; raises the last RpcError.
+
+        A node's "not ready" answer to a single request is returned, rather
+        than raised, once retries run out. With `retry` off the payload gets
+        a single (possibly hedged) attempt, for callers that retry each call
+        themselves, like the batcher. With `raw` the response body comes back
+        as bytes (see RpcEndpoint.post).
+        """
+        key = _payload_key(payload)
+        calls = _calls(payload)
+        self.requests += 1
+        self.budget.deposit(calls)
+        tried: Set[RpcEndpoint] = set()
+        max_attempts = self.retry.max_attempts if retry else 1
+        attempt = 1
+        while True:
+            try:
+                return await self._attempt(payload, key, tried, calls, raw)
+            except RpcError as e:
+                if not e.retryable or attempt >= max_attempts:
+                    return _give_up(e)
+                if not self.budget.withdraw(calls):
+                    self.retries_denied += 1
+                    RETRIES_DENIED.inc()
+                    return _give_up(e)
+                logger.debug(f"Retrying {key} after error from {e.endpoint}: {e}")
+                self.retries += 1
+                RETRIES.inc()
+                if len(tried) >= len(self.endpoints):
+                    tried.clear()
+                await asyncio.sleep(self.retry.backoff(attempt))
+                attempt += 1
+
+    async def _attempt(self, payload: Any, key: str, tried: Set[RpcEndpoint], calls: int, raw: bool) -> Any:
+        endpoint = await self.acquire(tried)
+        if endpoint is None:
+            raise RpcError("No RPC endpoint available")
+        tried.add(endpoint)
+        hedge_delay = self.latencies.delay(key) if self.hedging and len(self.endpoints) > 1 else None
+        if hedge_delay is None:
+            try:
+                return await self._send(endpoint, payload, key, raw)
+            finally:
+                self._release(endpoint)
+
+        pending = {self._spawn(endpoint, payload, key, raw)}
+        hedge = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if not done:
+                hedge_endpoint = self._ready_endpoint(tried)
+                if hedge_endpoint is not None and self.budget.withdraw(calls):
+                    hedge_endpoint.reserve()
+                    tried.add(hedge_endpoint)
+                    self.hedges += 1
+                    HEDGES.inc()
+                    hedge = self._spawn(hedge_endpoint, payload, key, raw)
+                    pending.add(hedge)
+            error: Optional[BaseException] = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                            HEDGE_WINS.inc()
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _spawn(self, endpoint: RpcEndpoint, payload: Any, key: str, raw: bool) -> asyncio.Future:
+        """_send on a reserved endpoint as a task; the slot is released when the task ends,
+        even if it is cancelled before it starts running"""
+        task = asyncio.ensure_future(self._send(endpoint, payload, key, raw))
+        task.add_done_callback(lambda _: self._release(endpoint))
+        return task
+
+    async def _send(self, endpoint: RpcEndpoint, payload: Any, key: str, raw: bool) -> Any:
+        started = time.perf_counter()
+        result = await endpoint.post(payload, raw)
+        self.latencies.record(key, time.perf_counter() - started)
+        return result
+
+    def _release(self, endpoint: RpcEndpoint):
+        endpoint.release()
+        self._released.set()
+
+    def _pick(self, exclude: Set[RpcEndpoint], now: float) -> Tuple[Optional[RpcEndpoint], Optional[float]]:
+        """The best endpoint ready now, else (None, seconds to wait); (None, None) if all are excluded"""
+        candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+        if not candidates:
+            return None, None
+        healthy = [endpoint for endpoint in candidates if not endpoint.is_ejected(now)]
+        if not healthy:
+            # Everything is ejected: probe whichever is due back first
+            due = min(candidates, key=lambda endpoint: endpoint.ejected_until)
+            if not due._probing:
+                return due, 0.0
+
+        wait = MAX_WAIT
+        ready = []
+        for endpoint in healthy:
+            delay = endpoint.delay(now)
+            if delay > 0:
+                wait = min(wait, delay)
+            elif endpoint.has_capacity():
+                ready.append(endpoint)
+        if ready:
+            return min(ready, key=lambda endpoint: endpoint.score(now)), 0.0
+        return None, wait
+
+    def _ready_endpoint(self, exclude: Set[RpcEndpoint]) -> Optional[RpcEndpoint]:
+        """A healthy endpoint that can take a request right now, without waiting"""
+        now = time.monotonic()
+        endpoint, _ = self._pick(exclude, now)
+        if endpoint is None or endpoint.is_ejected(now):
+            return None
+        return endpoint
+
+    async def acquire(self, exclude: Set[RpcEndpoint]) -> Optional[RpcEndpoint]:
+        """Wait for the best endpoint not in `exclude` to have a token and a free slot.
+
+        The token and slot are taken (RpcEndpoint.reserve) before this
+        returns, so concurrent callers never pick the same free capacity; the
+        caller releases the endpoint once its request is over.
+        """
+        while True:
+            endpoint, wait = self._pick(exclude, time.monotonic())
+            if endpoint is not None:
+                endpoint.reserve()
+                return endpoint
+            if wait is None:
+                return None
+            self._released.clear()
+            try:
+                await asyncio.wait_for(self._released.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "retries_denied": self.retries_denied,
+            "retry_budget": round(self.budget.balance, 1),
+            "hedging": self.hedging,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay_ms": self.latencies.stats(),
+            "endpoints": [endpoint.stats() for endpoint in self.endpoints]
+        }
@@ -0,0 +1,460 @@
+import json
+import operator
+import os
+import time
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+
+import config
+from models import MEVPattern
+
+try:
+    import numpy as np
+except ImportError:  # optional; only evaluate_batch needs it
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Transaction features a rule condition can test: relative evaluation cost
+# and whether the value is a number or log text
+FIELDS: Dict[str, Tuple[float, str]] = {
+    "profit_usdc": (1.0, "number"),
+    "platform_count": (1.0, "number"),
+    "transfer_count": (1.0, "number"),
+    "input_amount": (1.0, "number"),
+    "output_amount": (1.0, "number"),
+    "path_hops": (2.0, "number"),
+    "logs": (25.0, "text"),
+}
+
+NUMBER_OPS: Dict[str, Callable[[Any, Any], Any]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# "contains_any" matches keywords as written; "icontains_any" ignores case
+TEXT_OPS = ("contains_any", "icontains_any")
+
+# Re-rank a rule's conditions after this many evaluations
+REORDER_EVERY = 1024
+
+NO_MATCH = (False, None, 0.0, "No MEV pattern detected")
+
+# The built-in rule set, in the same shape as a MEV_RULES_PATH file. Rules
+# are tried in this order and the first match wins.
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {
+        "name": "arbitrage_multi_platform",
+        "pattern": "arbitrage",
+        "confidence": 0.8,
+        "explanation": "Multi-platform arbitrage detected across {platforms} with ${profit_usdc:.4f} profit",
+        "when": [
+            {"field": "platform_count", "op": ">=", "value": 2},
+            {"field": "profit_usdc", "op": ">", "value": 0.05}
+        ]
+    },
+    {
+        "name": "arbitrage_internal_route",
+        "pattern": "arbitrage",
+        "confidence": 0.8,
+        "explanation": "Multi-platform arbitrage detected across {platforms} with ${profit_usdc:.4f} profit",
+        "when": [
+            {"field": "platform_count", "op": "==", "value": 1},
+            {"field": "path_hops", "op": ">=", "value": 2},
+            {"field": "profit_usdc", "op": ">", "value": 0.02}
+        ]
+    },
+    {
+        "name": "backrun",
+        "pattern": "backrun",
+        "confidence": 0.6,
+        "explanation": "Likely backrun trade with ${profit_usdc:.4f} profit",
+        "when": [
+            {"field": "profit_usdc", "op": ">", "value": 0.01},
+            {"field": "platform_count", "op": "==", "value": 1},
+            {"field": "logs", "op": "contains_any", "value": ["swap", "exactIn", "exactOut"]}
+        ]
+    },
+    {
+        "name": "sandwich_single_hop",
+        "pattern": "sandwich",
+        "confidence": 0.7,
+        "explanation": "Potential sandwich attack with ${profit_usdc:.4f} profit",
+        "when": [
+            {"field": "profit_usdc", "op": ">", "value": 0.1},
+            {"field": "path_hops", "op": "==", "value": 1}
+        ]
+    },
+    {
+        "name": "sandwich_log_keywords",
+        "pattern": "sandwich",
+        "confidence": 0.7,
+        "explanation": "Potential sandwich attack with ${profit_usdc:.4f} profit",
+        "when": [
+            {"field": "logs", "op": "icontains_any", "value": ["front", "sandwich", "back"]}
+        ]
+    },
+    {
+        "name": "high_profit",
+        "pattern": "unknown",
+        "confidence": 0.5,
+        "explanation": "High-profit trade (${profit_usdc:.4f}) - likely MEV",
+        "when": [{"field": "profit_usdc", "op": ">", "value": 1.0}]
+    },
+    {
+        "name": "small_profit",
+        "pattern": "unknown",
+        "confidence": 0.3,
+        "explanation": "Small profitable trade (${profit_usdc:.4f}) - possible MEV",
+        "when": [{"field": "profit_usdc", "op": ">", "value": 0.01}]
+    }
+]
+
+
+class TransactionFeatures:
+    """Feature values of one decoded transaction, computed on first use"""
+
+    def __init__(self, decoded_tx: Dict[str, Any], profit_usdc: float):
+        self.decoded_tx = decoded_tx
+        self.values: Dict[str, Any] = {"profit_usdc": profit_usdc}
+
+    def get(self, field: str) -> Any:
+        value = self.values.get(field)
+        if value is None:
+            value = self.values[field] = feature_value(self.decoded_tx, field)
+        return value
+
+    def lower_logs(self) -> str:
+        value = self.values.get("logs_lower")
+        if value is None:
+            value = self.values["logs_lower"] = self.get("logs").lower()
+        return value
+
+
+def feature_value(decoded_tx: Dict[str, Any], field: str) -> Any:
+    if field == "platform_count":
+        return len(decoded_tx.get("platforms", []))
+    if field == "path_hops":
+        return decoded_tx.get("path", "").count("→")
+    if field == "transfer_count":
+        return len(decoded_tx.get("token_transfers", []))
+    if field == "logs":
+        # Keywords never contain a newline, so matching the joined logs is
+        # the same as matching each line
+        return "\n".join(decoded_tx.get("logs", []))
+    return decoded_tx.get(field, 0.0)
+
+
+def feature_column(decoded_txs: List[Dict[str, Any]], field: str) -> List[Any]:
+    """feature_value of every transaction, without a call per row for the common fields"""
+    if field == "platform_count":
+        return [len(tx.get("platforms", [])) for tx in decoded_txs]
+    if field == "path_hops":
+        return [tx.get("path", "").count("→") for tx in decoded_txs]
+    if field == "transfer_count":
+        return [len(tx.get("token_transfers", [])) for tx in decoded_txs]
+    return [feature_value(tx, field) for tx in decoded_txs]
+
+
+def _keyword_hits(condition: "Condition", texts: List[str]) -> List[bool]:
+    """condition.test for many log texts: one find per keyword hit over the joined texts.
+
+    Texts are joined with newlines, which no keyword contains, so a match
+    never spans two of them; after a hit the search resumes at the next text.
+    """
+    blob = "\n".join(texts)
+    if condition.op == "icontains_any":
+        lowered = blob.lower()
+        if len(lowered) != len(blob):
+            # A few non-ASCII characters change length when lowered
+            texts = [text.lower() for text in texts]
+            lowered = "\n".join(texts)
+        blob = lowered
+    starts = [0, *accumulate(len(text) + 1 for text in texts)]
+    hits = [False] * len(texts)
+    for keyword in condition.value:
+        position = blob.find(keyword)
+        while position != -1:
+            index = bisect_right(starts, position) - 1
+            hits[index] = True
+            position = blob.find(keyword, starts[index + 1])
+    return hits
+
+
+class Condition:
+    """One test of a transaction feature, with pass-rate accounting"""
+
+    def __init__(self, field: str, op: str, value: Any):
+        if field not in FIELDS:
+            raise ValueError(f"Unknown field {field!r}")
+        cost, kind = FIELDS[field]
+        if kind == "number":
+            if op not in NUMBER_OPS:
+                raise ValueError(f"Operator {op!r} doesn't apply to {field}")
+            self._compare = NUMBER_OPS[op]
+            value = float(value)
+        else:
+            if op not in TEXT_OPS:
+                raise ValueError(f"Operator {op!r} doesn't apply to {field}")
+            if isinstance(value, str) or not value or any(not isinstance(k, str) or not k or "\n" in k for k in value):
+                raise ValueError(f"{op} needs a list of non-empty single-line keywords")
+            value = [k.lower() for k in value] if op == "icontains_any" else list(value)
+            cost += len(value)
+        self.field = field
+        self.op = op
+        self.value = value
+        self.kind = kind
+        self.cost = cost
+        self.evaluated = 0
+        self.passed = 0
+
+    def test(self, features: TransactionFeatures) -> bool:
+        if self.kind == "number":
+            return self._compare(features.get(self.field), self.value)
+        text = features.lower_logs() if self.op == "icontains_any" else features.get(self.field)
+        return any(keyword in text for keyword in self.value)
+
+    def rank(self) -> float:
+        """Expected cost of testing this condition per rejection; cheapest and most selective first"""
+        pass_rate = (self.passed + 1) / (self.evaluated + 2)
+        return self.cost / max(1.0 - pass_rate, 0.01)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "field": self.field,
+            "op": self.op,
+            "value": self.value,
+            "evaluated": self.evaluated,
+            "pass_rate": round(self.passed / self.evaluated, 4) if self.evaluated else None
+        }
+
+
+class Rule:
+    """A named detector: when all its conditions hold, the transaction gets its pattern"""
+
+    def __init__(self, name: str, pattern: Optional[str], confidence: float, explanation: str,
+                 when: Sequence[Dict[str, Any]]):
+        self.name = name
+        self.pattern = MEVPattern(pattern) if pattern else None
+        self.confidence = float(confidence)
+        self.explanation = explanation
+        if not when:
+            raise ValueError(f"Rule {name!r} has no conditions")
+        # Cheapest first until there are pass rates to go by
+        self.conditions = sorted(
+            (Condition(c["field"], c["op"], c["value"]) for c in when),
+            key=lambda condition: condition.cost
+        )
+        explanation.format(profit_usdc=0.0, platforms="")
+        self.evaluated = 0
+        self.hits = 0
+        self.time_ns = 0
+
+    def matches(self, features: TransactionFeatures) -> bool:
+        started = time.perf_counter_ns()
+        matched = True
+        for condition in self.conditions:
+            condition.evaluated += 1
+            if not condition.test(features):
+                matched = False
+                break
+            condition.passed += 1
+        self.time_ns += time.perf_counter_ns() - started
+        self.evaluated += 1
+        self.hits += matched
+        if self.evaluated % REORDER_EVERY == 0:
+            self.reorder()
+        return matched
+
+    def reorder(self):
+        self.conditions.sort(key=Condition.rank)
+
+    def outcome(self, profit_usdc: float, platforms: List[str]) -> tuple:
+        """(is_mev, pattern, confidence, explanation) for a transaction this rule matched"""
+        explanation = self.explanation.format(profit_usdc=profit_usdc, platforms=", ".join(platforms))
+        return True, self.pattern, self.confidence, explanation
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "pattern": self.pattern.value if self.pattern else None,
+            "evaluated": self.evaluated,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.evaluated, 4) if self.evaluated else None,
+            "time_ms": round(self.time_ns / 1e6, 3),
+            "ns_per_evaluation": round(self.time_ns / self.evaluated) if self.evaluated else None,
+            "conditions": [condition.stats() for condition in self.conditions]
+        }
+
+
+def parse_rules(entries: Sequence[Dict[str, Any]]) -> List[Rule]:
+    rules = []
+    for entry in entries:
+        try:
+            rules.append(Rule(
+                entry["name"],
+                entry.get("pattern"),
+                entry.get("confidence", 0.5),
+                entry.get("explanation", ""),
+                entry.get("when") or []
+            ))
+        except Exception as e:
+            raise ValueError(f"Invalid rule {entry.get('name', '?')!r}: {e}") from e
+    return rules
+
+
+class RuleEngine:
+    """Ordered MEV detection rules, optionally loaded from a JSON file and reloaded when it changes.
+
+    Rules are tried in declared order and the first match wins, so the order
+    expresses precedence. Within a rule, conditions are tested cheapest and
+    most selective first (re-ranked from observed pass rates) and stop at the
+    first failure; feature values are computed once per transaction and only
+    when a condition needs them. Every rule and condition keeps counts and
+    time spent for /api/rules.
+
+    The file is {"rules": [...]} with entries shaped like DEFAULT_RULES and
+    replaces the built-in set. Its modification time is checked at most every
+    `reload_interval` seconds; a file that fails to parse is logged and the
+    current rules stay in effect.
+    """
+
+    def __init__(self, path: str = "", reload_interval: float = 5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.rules: List[Rule] = parse_rules(DEFAULT_RULES)
+        self.source = "defaults"
+        self.version = 0
+        self.loaded_at = time.time()
+        self.reload_errors = 0
+        self.last_error: Optional[str] = None
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        if path:
+            self.reload()
+
+    @classmethod
+    def from_config(cls) -> "RuleEngine":
+        return cls(config.RULES_PATH, config.RULES_RELOAD_INTERVAL)
+
+    def reload(self) -> bool:
+        """Load the rules file now; returns False (keeping the current rules) if it is invalid"""
+        if not self.path:
+            return False
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path) as f:
+                rules = parse_rules(json.load(f)["rules"])
+        except Exception as e:
+            self.reload_errors += 1
+            self.last_error = str(e)
+            logger.error(f"Error loading detection rules from {self.path}, keeping current rules: {e}")
+            return False
+        self.rules = rules
+        self.source = self.path
+        self.version += 1
+        self.loaded_at = time.time()
+        self._mtime = mtime
+        self.last_error = None
+        logger.info(f"Loaded {len(rules)} detection rules from {self.path} (version {self.version})")
+        return True
+
+    def maybe_reload(self):
+        """Reload if the rules file changed; cheap enough to call per transaction"""
+        if not self.path:
+            return
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.reload_interval
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            # reload() records the mtime only once the file loads, so a broken
+            # file is retried on the next check instead of being skipped
+            self.reload()
+
+    def evaluate(self, decoded_tx: Dict[str, Any], profit_usdc: float) -> tuple:
+        """(is_mev, pattern, confidence, explanation) from the first rule that matches"""
+        self.maybe_reload()
+        features = TransactionFeatures(decoded_tx, profit_usdc)
+        for rule in self.rules:
+            if rule.matches(features):
+                return rule.outcome(profit_usdc, decoded_tx.get("platforms", []))
+        return NO_MATCH
+
+    def evaluate_batch(self, decoded_txs: List[Dict[str, Any]], profits,
+                       columns: Optional[Dict[str, Any]] = None) -> List[Optional[Rule]]:
+        """The matching rule (or None) for each transaction, with conditions applied as array masks.
+
+        Needs NumPy. `profits` is a float array aligned with decoded_txs, and
+        `columns` may carry other feature arrays the caller already has. Each
+        rule only looks at the rows no earlier rule matched, and each condition
+        only at the rows that passed the previous ones; feature columns are
+        built on first use, and log conditions search the joined logs of the
+        remaining rows at once (_keyword_hits).
+
+        Searching the logs costs the same here as in evaluate, and usually
+        dominates: this saves the per-row interpretation, not the text scans.
+        """
+        self.maybe_reload()
+        count = len(decoded_txs)
+        columns = dict(columns or {}, profit_usdc=profits)
+        logs: Dict[int, str] = {}
+        matched: List[Optional[Rule]] = [None] * count
+        undecided = np.arange(count)
+        for rule in self.rules:
+            if not undecided.size:
+                break
+            started = time.perf_counter_ns()
+            rows = undecided
+            for condition in rule.conditions:
+                condition.evaluated += rows.size
+                if condition.kind == "number":
+                    column = columns.get(condition.field)
+                    if column is None:
+                        column = columns[condition.field] = np.array(
+                            feature_column(decoded_txs, condition.field), dtype=np.float64
+                        )
+                    rows = rows[condition._compare(column[rows], condition.value)]
+                else:
+                    texts = []
+                    for row in rows.tolist():
+                        text = logs.get(row)
+                        if text is None:
+                            text = logs[row] = feature_value(decoded_txs[row], "logs")
+                        texts.append(text)
+                    hits = _keyword_hits(condition, texts)
+                    rows = rows[np.array(hits, dtype=bool)]
+                condition.passed += rows.size
+                if not rows.size:
+                    break
+            for row in rows.tolist():
+                matched[row] = rule
+            rule.time_ns += time.perf_counter_ns() - started
+            rule.evaluated += undecided.size
+            rule.hits += rows.size
+            if rows.size:
+                undecided = np.setdiff1d(undecided, rows, assume_unique=True)
+        for rule in self.rules:
+            rule.reorder()
+        return matched
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "reload_interval": self.reload_interval,
+            "reload_errors": self.reload_errors,
+            "last_error": self.last_error,
+            "rules": [rule.stats() for rule in self.rules]
+        }
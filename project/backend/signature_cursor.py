@@ -0,0 +1,129 @@
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SignatureCursor:
+    """How far signature polling has got for one program address.
+
+    `newest` is the most recent signature already handed out; the next poll
+    asks the RPC for everything `until` it. When a poll can't page all the way
+    back to `newest` (e.g. after a stall), the unfetched range is kept as a
+    gap, {"before", "until", "until_slot"}, and filled on later polls.
+    """
+
+    def __init__(self, address: str,
+                 newest: Optional[str] = None,
+                 newest_slot: Optional[int] = None,
+                 newest_block_time: Optional[int] = None,
+                 gaps: Optional[List[Dict[str, Any]]] = None):
+        self.address = address
+        self.newest = newest
+        self.newest_slot = newest_slot
+        self.newest_block_time = newest_block_time
+        self.gaps: List[Dict[str, Any]] = gaps or []
+        self.fetched = 0
+        self.pages = 0
+        self.errors = 0
+        self.last_poll: Optional[float] = None
+
+    def advance(self, newest: Dict[str, Any]):
+        """Move the head to a signature info returned by getSignaturesForAddress"""
+        self.newest = newest["signature"]
+        self.newest_slot = newest.get("slot")
+        self.newest_block_time = newest.get("blockTime")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "newest": self.newest,
+            "newest_slot": self.newest_slot,
+            "newest_block_time": self.newest_block_time,
+            "gaps": self.gaps
+        }
+
+    @classmethod
+    def from_dict(cls, address: str, data: Dict[str, Any]) -> "SignatureCursor":
+        return cls(
+            address,
+            newest=data.get("newest"),
+            newest_slot=data.get("newest_slot"),
+            newest_block_time=data.get("newest_block_time"),
+            gaps=list(data.get("gaps") or [])
+        )
+
+    def lag(self) -> Dict[str, Any]:
+        """Ingestion lag: age of the newest signature seen and how far back unfilled gaps reach"""
+        now = time.time()
+        gap_slots = None
+        if self.gaps and self.newest_slot is not None:
+            oldest = min((gap.get("until_slot") for gap in self.gaps if gap.get("until_slot") is not None), default=None)
+            if oldest is not None:
+                gap_slots = self.newest_slot - oldest
+        return {
+            "newest_slot": self.newest_slot,
+            "lag_seconds": round(now - self.newest_block_time, 1) if self.newest_block_time else None,
+            "seconds_since_poll": round(now - self.last_poll, 1) if self.last_poll else None,
+            "open_gaps": len(self.gaps),
+            "gap_slots": gap_slots,
+            "fetched": self.fetched,
+            "pages": self.pages,
+            "errors": self.errors
+        }
+
+
+class SignatureCursorStore:
+    """Signature cursors for a set of program addresses, saved to a small JSON file"""
+
+    def __init__(self, path: str, addresses: List[str]):
+        self.path = path
+        self.cursors: Dict[str, SignatureCursor] = {address: SignatureCursor(address) for address in addresses}
+
+    def __getitem__(self, address: str) -> SignatureCursor:
+        return self.cursors[address]
+
+    def has_gaps(self) -> bool:
+        return any(cursor.gaps for cursor in self.cursors.values())
+
+    def totals(self) -> Tuple[int, int]:
+        """Pages fetched and failed page requests, summed over all programs"""
+        return (sum(cursor.pages for cursor in self.cursors.values()),
+                sum(cursor.errors for cursor in self.cursors.values()))
+
+    def load(self):
+        """Restore cursors saved by a previous run, if any"""
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.error(f"Error loading signature cursors from {self.path}: {e}")
+            return
+        for address, data in saved.items():
+            if address in self.cursors:
+                self.cursors[address] = SignatureCursor.from_dict(address, data)
+        logger.info(f"Loaded signature cursors for {len(saved)} programs from {self.path}")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current positions, in the saved file's shape"""
+        return {
+            address: dict(cursor.to_dict(), gaps=[dict(gap) for gap in cursor.gaps])
+            for address, cursor in self.cursors.items()
+        }
+
+    def save(self, snapshot: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Write a snapshot (by default the current positions) atomically: temp file + rename"""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot if snapshot is not None else self.snapshot(), f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Error saving signature cursors to {self.path}: {e}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {address: cursor.lag() for address, cursor in self.cursors.items()}
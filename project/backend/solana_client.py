@@ -1,115 +1,308 @@
 import asyncio
+import base64
 import httpx
 import base58
+import functools
+import itertools
 import json
 import time
 from typing import List, Dict, Any, Optional
 import logging
 from datetime import datetime, timedelta
 
+import config
+import metrics
+from log_subscription import LogSubscriber, websocket_url
+from registry import get_registry
+from rpc_batch import JsonRpcBatcher
+from rpc_pool import RpcPool
+from signature_cursor import SignatureCursor, SignatureCursorStore
+from tx_cache import TransactionCache, TransactionData
+from wire_format import b58encode, encode_pubkey, parse_transaction
+
 logger = logging.getLogger(__name__)
 
+RPC_SECONDS = metrics.histogram("mev_rpc_request_seconds", "JSON-RPC call latency, including time spent in a batch", ["method"])
+RPC_ERRORS = metrics.counter("mev_rpc_errors_total", "JSON-RPC calls that raised or returned an error object", ["method"])
+
+# getBlock errors for a slot with no block to return: skipped, or missing after a
+# ledger jump (-32007) or from long-term storage (-32009). Asking again won't help.
+SLOT_SKIPPED_ERROR_CODES = frozenset({-32007, -32009})
+
 class SolanaClient:
     def __init__(self):
-        self.rpc_url = "https://api.mainnet-beta.solana.com"
         self.helius_url = "https://api.helius.xyz/v0"
         self.client = None
+        self.pool: Optional[RpcPool] = None
+        self.batcher: Optional[JsonRpcBatcher] = None
+        # Batches getTransaction calls whose results stay JSON bytes (see use_raw_transactions)
+        self.raw_batcher: Optional[JsonRpcBatcher] = None
+        self.tx_cache: Optional[TransactionCache] = None
         
-        # Known DEX program IDs
-        self.dex_programs = {
-            "JUP4Fb2cqiRUcaTHdrPC8h2gNsA2ETXiPDD33WcGuJB": "Jupiter V4",
-            "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4": "Jupiter V6", 
-            "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8": "Raydium AMM",
-            "9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM": "Raydium CPMM",
-            "MERLuDFBMmsHnsBPZw2sDQZHvXFMwp8EdjudcU2HKky": "Meteora",
-            "PhoeNiX7VavoDXL4ZMD4fDbBGEz7dhc8EJQ1J4TjTaE": "Phoenix",
-            "opnb2LAfJYbRMAHHvqjCwQxanZn7ReEHp1k81EohpZb": "Openbook",
-            "TSWAPaqyCSx2KABk68Shruf4rp7CxcNi8hAsbdwmHbN": "Tensor"
-        }
+        # Known DEX programs, shared with the decoder
+        self.registry = get_registry()
+        
+        # Programs polled for new signatures (Jupiter is the most active), and
+        # how far polling has got for each
+        self.signature_programs = [
+            "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4",
+            "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8"
+        ]
+        self.signature_cursors = SignatureCursorStore(config.CURSOR_PATH, self.signature_programs)
         
-    async def initialize(self):
-        """Initialize the HTTP client"""
+        # Newest confirmed slot the node has reported, for ingestion lag
+        self.tip_slot: Optional[int] = None
+        
+    async def initialize(self, open_cache: bool = True):
+        """Initialize the HTTP clients.
+        
+        Without `open_cache` the transaction cache stays memory-only until
+        tx_cache.open() is called, e.g. by the process that owns its directory.
+        """
         self.client = httpx.AsyncClient(timeout=30.0)
+        self.pool = RpcPool.from_config()
+        self.pool.open()
+        if config.RPC_BATCH_ENABLED:
+            # The batcher retries each call itself, so batches get one attempt at the pool
+            self.batcher = JsonRpcBatcher(
+                functools.partial(self._post_rpc, retry=False),
+                max_batch_size=config.RPC_BATCH_MAX_SIZE,
+                window=config.RPC_BATCH_WINDOW_MS / 1000.0,
+                retry=self.pool.retry,
+                budget=self.pool.budget
+            )
+        if config.TX_CACHE_ENABLED:
+            self.tx_cache = TransactionCache(
+                config.TX_CACHE_DIR,
+                max_memory_entries=config.TX_CACHE_MEMORY_ENTRIES,
+                max_disk_bytes=config.TX_CACHE_DISK_MB * 1024 * 1024
+            )
+            if open_cache:
+                await self.tx_cache.open()
+        self.signature_cursors.load()
         logger.info("Solana client initialized")
     
+    def use_raw_transactions(self, decode):
+        """Fetch transactions for get_transaction(raw=True) as JSON bytes.
+
+        The batch response bodies are handed to `decode`, e.g.
+        AnalysisPool.split_response, which parses them in another process and
+        leaves each transaction as bytes, so they never get parsed here.
+        Needs batching; without it raw requests return parsed transactions.
+        """
+        if self.batcher:
+            self.raw_batcher = JsonRpcBatcher(
+                functools.partial(self._post_rpc, retry=False, raw=True),
+                max_batch_size=config.RPC_BATCH_MAX_SIZE,
+                window=config.RPC_BATCH_WINDOW_MS / 1000.0,
+                retry=self.pool.retry,
+                budget=self.pool.budget,
+                decode=decode
+            )
+    
     async def close(self):
         """Close the HTTP client"""
+        if self.batcher:
+            await self.batcher.close()
+        if self.raw_batcher:
+            await self.raw_batcher.close()
+        if self.tx_cache:
+            self.tx_cache.close()
+        if self.pool:
+            await self.pool.close()
         if self.client:
             await self.client.aclose()
     
+    async def _post_rpc(self, payload: Any, retry: bool = True, raw: bool = False) -> Any:
+        """Send a JSON-RPC payload (single request or batch array) through the endpoint pool"""
+        return await self.pool.post(payload, retry=retry, raw=raw)
+    
+    async def _rpc_call(self, method: str, params: List[Any], batchable: bool = True,
+                        raw: bool = False) -> Dict[str, Any]:
+        """Make a JSON-RPC call, merged into a batch request when batching is enabled.
+        
+        With `raw`, an object result may come back as JSON bytes (see use_raw_transactions).
+        """
+        started = time.perf_counter()
+        try:
+            if raw and self.raw_batcher:
+                result = await self.raw_batcher.call(method, params)
+            elif self.batcher and batchable:
+                result = await self.batcher.call(method, params)
+            else:
+                payload = {
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": method,
+                    "params": params
+                }
+                result = await self._post_rpc(payload)
+        except Exception:
+            RPC_SECONDS.labels(method).observe(time.perf_counter() - started)
+            RPC_ERRORS.labels(method).inc()
+            raise
+        RPC_SECONDS.labels(method).observe(time.perf_counter() - started)
+        if "error" in result:
+            RPC_ERRORS.labels(method).inc()
+        return result
+    
+    def log_subscriber(self, on_connect=None) -> LogSubscriber:
+        """A logsSubscribe stream of new signatures for the polled DEX programs"""
+        return LogSubscriber(
+            config.RPC_WS_URL or websocket_url(self.pool.endpoints[0].url if self.pool else config.RPC_URLS[0]),
+            self.signature_programs,
+            max_backoff=config.STREAM_RECONNECT_MAX_DELAY,
+            on_connect=on_connect,
+            on_slot=self._observe_slot
+        )
+    
+    def _observe_slot(self, slot: Optional[int]):
+        if slot is not None and (self.tip_slot is None or slot > self.tip_slot):
+            self.tip_slot = slot
+    
     async def get_recent_signatures(self, limit: int = 50) -> List[str]:
-        """Get recent transaction signatures from known DEX programs"""
-        signatures = []
+        """Get the signatures of known DEX programs that are new since the last call.
         
+        Each program has a cursor at the newest signature already returned, and
+        everything after it is paged in with `until`/`before`, so nothing is
+        skipped in a busy interval. After a stall, whatever doesn't fit in this
+        call's page budget is kept as a gap and filled on the following calls.
+        `limit` only bounds the first fetch for a program without a cursor.
+        Failed transactions are left out. Signatures come back oldest first.
+        """
         try:
-            # Get signatures from Jupiter (most active)
-            jupiter_sigs = await self._get_signatures_for_address(
-                "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4", 
-                limit=limit//2
-            )
-            signatures.extend(jupiter_sigs)
-            
-            # Get signatures from Raydium
-            raydium_sigs = await self._get_signatures_for_address(
-                "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8",
-                limit=limit//2
-            )
-            signatures.extend(raydium_sigs)
+            per_program = await asyncio.gather(*(
+                self._poll_signature_cursor(self.signature_cursors[address], limit=max(1, limit // len(self.signature_programs)))
+                for address in self.signature_programs
+            ))
+            signatures = []
+            for infos in per_program:
+                signatures.extend(reversed(infos))
+            signatures.sort(key=lambda info: info.get("slot") or 0)
             
-            # Remove duplicates and sort by time
-            unique_signatures = list(dict.fromkeys(signatures))
-            return unique_signatures[:limit]
+            # Remove duplicates (a transaction can touch several programs)
+            return list(dict.fromkeys(info["signature"] for info in signatures if info.get("err") is None))
             
         except Exception as e:
             logger.error(f"Error getting recent signatures: {e}")
             return []
     
-    async def _get_signatures_for_address(self, address: str, limit: int = 25) -> List[str]:
-        """Get transaction signatures for a specific program address"""
-        payload = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "getSignaturesForAddress",
-            "params": [
-                address,
-                {
-                    "limit": limit,
-                    "commitment": "confirmed"
-                }
-            ]
+    async def _poll_signature_cursor(self, cursor: SignatureCursor, limit: int) -> List[Dict[str, Any]]:
+        """Fetch what is new for one program, then keep filling its open gaps"""
+        cursor.last_poll = time.time()
+        page_size = config.SIGNATURE_PAGE_SIZE
+        budget = config.SIGNATURE_MAX_PAGES
+        
+        if cursor.newest is None:
+            # First run for this program: start at the tip rather than at genesis
+            page = await self._get_signatures_for_address(cursor.address, limit=limit)
+            if page is None:
+                cursor.errors += 1
+            if not page:
+                return []
+            cursor.pages += 1
+            cursor.fetched += len(page)
+            cursor.advance(page[0])
+            return page
+        
+        # New signatures since the head, newest first
+        fetched: List[Dict[str, Any]] = []
+        reached_head = False
+        before = None
+        while budget > 0:
+            page = await self._get_signatures_for_address(cursor.address, limit=page_size, before=before, until=cursor.newest)
+            if page is None:
+                cursor.errors += 1
+                break
+            budget -= 1
+            cursor.pages += 1
+            fetched.extend(page)
+            if len(page) < page_size:
+                reached_head = True
+                break
+            before = page[-1]["signature"]
+        
+        if fetched:
+            if not reached_head:
+                cursor.gaps.append({"before": fetched[-1]["signature"], "until": cursor.newest, "until_slot": cursor.newest_slot})
+            cursor.advance(fetched[0])
+        
+        # Older gaps, most recent first
+        while budget > 0 and cursor.gaps:
+            gap = cursor.gaps[-1]
+            page = await self._get_signatures_for_address(cursor.address, limit=page_size, before=gap["before"], until=gap["until"])
+            if page is None:
+                cursor.errors += 1
+                break
+            budget -= 1
+            cursor.pages += 1
+            fetched.extend(page)
+            if len(page) < page_size:
+                cursor.gaps.pop()
+            else:
+                gap["before"] = page[-1]["signature"]
+        
+        cursor.fetched += len(fetched)
+        return fetched
+    
+    async def _get_signatures_for_address(self, address: str, limit: int = 25,
+                                          before: Optional[str] = None,
+                                          until: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """Get signature infos for a program address, newest first (None on error)"""
+        options: Dict[str, Any] = {
+            "limit": limit,
+            "commitment": "confirmed"
         }
+        if before:
+            options["before"] = before
+        if until:
+            options["until"] = until
+        params = [address, options]
         
         try:
-            response = await self.client.post(self.rpc_url, json=payload)
-            result = response.json()
+            result = await self._rpc_call("getSignaturesForAddress", params)
             
-            if "result" in result and result["result"]:
-                return [tx["signature"] for tx in result["result"]]
-            return []
+            if "error" in result:
+                logger.error(f"Error getting signatures for {address}: {result['error']}")
+                return None
+            page = result.get("result") or []
+            if page:
+                self._observe_slot(page[0].get("slot"))
+            return page
             
         except Exception as e:
             logger.error(f"Error getting signatures for {address}: {e}")
-            return []
+            return None
     
-    async def get_transaction(self, signature: str) -> Optional[Dict[Any, Any]]:
-        """Get detailed transaction information"""
-        payload = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "getTransaction",
-            "params": [
-                signature,
-                {
-                    "encoding": "jsonParsed",
-                    "maxSupportedTransactionVersion": 0,
-                    "commitment": "confirmed"
-                }
-            ]
-        }
+    async def get_transaction(self, signature: str, raw: bool = False) -> Optional[TransactionData]:
+        """Get detailed transaction information, served from the local cache when possible.
+        
+        With `raw` the transaction may come back as the JSON bytes the RPC sent.
+        """
+        if self.tx_cache:
+            cached = await self.tx_cache.get(signature, raw=raw)
+            if cached is not None:
+                return cached
+        
+        tx_data = await self._fetch_transaction(signature, raw=raw)
+        if tx_data is not None and self.tx_cache:
+            # Confirmed transactions are immutable, so they can be cached forever
+            await self.tx_cache.put(signature, tx_data)
+        return tx_data
+    
+    async def _fetch_transaction(self, signature: str, raw: bool = False) -> Optional[TransactionData]:
+        """Get detailed transaction information from the RPC"""
+        params = [
+            signature,
+            {
+                "encoding": config.TX_ENCODING,
+                "maxSupportedTransactionVersion": 0,
+                "commitment": "confirmed"
+            }
+        ]
         
         try:
-            response = await self.client.post(self.rpc_url, json=payload)
-            result = response.json()
+            result = await self._rpc_call("getTransaction", params, raw=raw)
             
             if "result" in result and result["result"]:
                 return result["result"]
@@ -119,6 +312,124 @@ class SolanaClient:
             logger.error(f"Error getting transaction {signature}: {e}")
             return None
     
+    async def get_transactions(self, signatures: List[str]) -> List[Optional[Dict[Any, Any]]]:
+        """Get several transactions at once; concurrent calls share batch requests"""
+        return list(await asyncio.gather(*(self.get_transaction(sig) for sig in signatures)))
+    
+    async def get_slot(self, commitment: str = "confirmed") -> Optional[int]:
+        """Get the latest slot at the given commitment"""
+        try:
+            result = await self._rpc_call("getSlot", [{"commitment": commitment}])
+            slot = result.get("result")
+            self._observe_slot(slot)
+            return slot
+        except Exception as e:
+            logger.error(f"Error getting slot: {e}")
+            return None
+    
+    async def get_blocks(self, start_slot: int, end_slot: int) -> Optional[List[int]]:
+        """Get confirmed slots in [start_slot, end_slot] that produced a block; None on error"""
+        try:
+            result = await self._rpc_call("getBlocks", [start_slot, end_slot, {"commitment": "confirmed"}])
+            if "error" in result or not isinstance(result.get("result"), list):
+                logger.error(f"Error getting blocks {start_slot}-{end_slot}: {result.get('error')}")
+                return None
+            return result["result"]
+        except Exception as e:
+            logger.error(f"Error getting blocks {start_slot}-{end_slot}: {e}")
+            return None
+    
+    async def get_block(self, slot: int) -> Optional[Dict[Any, Any]]:
+        """Get a whole block with full transaction details and meta.
+        
+        A slot without a block (skipped, or missing from the node's ledger)
+        comes back as an empty dict; None means the block could not be
+        fetched this time (node behind, transport errors) and may be retried.
+        """
+        params = [
+            slot,
+            {
+                "encoding": config.TX_ENCODING,
+                "transactionDetails": "full",
+                "maxSupportedTransactionVersion": 0,
+                "rewards": False,
+                "commitment": "confirmed"
+            }
+        ]
+        
+        try:
+            # Blocks are large; send them on their own rather than inside a batch
+            result = await self._rpc_call("getBlock", params, batchable=False)
+            if "result" in result and result["result"]:
+                return result["result"]
+            error = result.get("error") or {}
+            if error.get("code") in SLOT_SKIPPED_ERROR_CODES:
+                logger.debug(f"Slot {slot} has no block: {error.get('message')}")
+                return {}
+            logger.warning(f"Block {slot} not available: {error.get('message') or 'null result'}")
+            return None
+        except Exception as e:
+            logger.error(f"Error getting block {slot}: {e}")
+            return None
+    
+    async def get_dex_block_transactions(self, slot: int) -> Optional[List[tuple]]:
+        """Get (signature, tx_data) for every transaction in a block that touches a DEX program.
+        
+        Each tx_data is shaped like a getTransaction result (slot and blockTime
+        are copied from the block), so it can go straight to the decoder, plus
+        the transaction's position in the block as transactionIndex. Failed
+        transactions are skipped, as are malformed ones (logged). None if the
+        block could not be fetched.
+        """
+        block = await self.get_block(slot)
+        if block is None:
+            return None
+        
+        block_time = block.get("blockTime")
+        matches = []
+        for index, entry in enumerate(block.get("transactions") or []):
+            meta = entry.get("meta") or {}
+            if meta.get("err") is not None:
+                continue
+            try:
+                signature = self._dex_transaction_signature(entry.get("transaction"), meta)
+            except Exception as e:
+                logger.warning(f"Skipping malformed transaction {index} in block {slot}: {e}")
+                continue
+            if signature is None:
+                continue
+            tx_data = dict(entry, slot=slot, blockTime=block_time, transactionIndex=index)
+            matches.append((signature, tx_data))
+        return matches
+    
+    def _dex_transaction_signature(self, transaction: Any, meta: Dict[str, Any]) -> Optional[str]:
+        """First signature if the transaction references a DEX program, else None.
+        
+        Addresses loaded from lookup tables (meta's loadedAddresses) count as
+        references too: an inner instruction can invoke a program only listed there.
+        """
+        loaded = meta.get("loadedAddresses") or {}
+        loaded_keys = itertools.chain(loaded.get("writable") or [], loaded.get("readonly") or [])
+        
+        if isinstance(transaction, list):
+            # base64 wire format
+            message = parse_transaction(base64.b64decode(transaction[0]))
+            keys = {encode_pubkey(key) for key in message["account_keys"]}
+            keys.update(loaded_keys)
+            if keys.isdisjoint(self.registry.program_ids):
+                return None
+            return b58encode(message["signatures"][0]) if message["signatures"] else None
+        
+        if not isinstance(transaction, dict):
+            return None
+        message = transaction.get("message") or {}
+        keys = {key.get("pubkey") if isinstance(key, dict) else key for key in message.get("accountKeys") or []}
+        keys.update(loaded_keys)
+        if keys.isdisjoint(self.registry.program_ids):
+            return None
+        signatures = transaction.get("signatures") or []
+        return signatures[0] if signatures else None
+    
     async def get_token_price(self, mint: str) -> float:
         """Get token price in USDC using Jupiter API"""
         try:
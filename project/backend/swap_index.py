@@ -0,0 +1,275 @@
+import bisect
+import heapq
+from typing import Any, Dict, List, Optional, Set, Tuple
+import logging
+
+from models import MEVPattern
+
+logger = logging.getLogger(__name__)
+
+# A pool is identified by its (sorted) mint pair; the decoder does not expose
+# pool accounts, and within one slot the pair is almost always one pool.
+PoolKey = Tuple[str, str]
+
+
+# At most this many victims are named in a sandwich explanation
+MAX_NAMED_VICTIMS = 5
+
+
+class Swap:
+    """One decoded swap: who traded which way on which pair, and where in the block"""
+
+    __slots__ = ("signature", "signer", "order", "direction")
+
+    def __init__(self, signature: str, signer: str, order: Tuple[int, int], direction: int):
+        self.signature = signature
+        self.signer = signer
+        # (position in block, arrival sequence); arrival only breaks ties
+        self.order = order
+        # 0 sells the first mint of the pool key for the second, 1 the reverse
+        self.direction = direction
+
+    def __lt__(self, other: "Swap") -> bool:
+        return self.order < other.order
+
+
+class _PoolSlot:
+    """Swaps on one pool within one slot, each list kept in block order"""
+
+    __slots__ = ("swaps", "by_direction", "by_signer", "pair_ends", "pairs")
+
+    def __init__(self):
+        self.swaps: List[Swap] = []
+        self.by_direction: Tuple[List[Swap], List[Swap]] = ([], [])
+        self.by_signer: Dict[str, List[Swap]] = {}
+        # Front/back leg candidates (a signer's trade and its next trade on the
+        # pool, in the opposite direction), ordered by the back leg
+        self.pair_ends: List[Swap] = []
+        self.pairs: List[Tuple[Swap, Swap]] = []
+
+    def insert(self, swap: Swap) -> int:
+        # Swaps mostly arrive in block order, so these inserts land at or near the end
+        index = bisect.bisect(self.swaps, swap)
+        self.swaps.insert(index, swap)
+        bisect.insort(self.by_direction[swap.direction], swap)
+        bisect.insort(self.by_signer.setdefault(swap.signer, []), swap)
+        return index
+
+    def add_pair(self, front: Swap, back: Swap):
+        index = bisect.bisect(self.pair_ends, back)
+        self.pair_ends.insert(index, back)
+        self.pairs.insert(index, (front, back))
+
+    def remove_pair(self, front: Swap, back: Swap):
+        index = bisect.bisect_left(self.pair_ends, back)
+        if index < len(self.pairs) and self.pairs[index] == (front, back):
+            del self.pair_ends[index]
+            del self.pairs[index]
+
+    def victims(self, front: Swap, back: Swap) -> Tuple[int, List[Swap]]:
+        """Other signers' trades in the front leg's direction between the legs: (count, first few)"""
+        same_direction = self.by_direction[front.direction]
+        start = bisect.bisect_right(same_direction, front)
+        end = bisect.bisect_left(same_direction, back)
+        # The legs are consecutive trades of their signer, so none of these are the attacker's
+        return max(0, end - start), same_direction[start:min(end, start + MAX_NAMED_VICTIMS)]
+
+
+class _SlotSwaps:
+    __slots__ = ("pools", "count", "sandwiches", "legs", "backruns")
+
+    def __init__(self):
+        self.pools: Dict[PoolKey, _PoolSlot] = {}
+        self.count = 0
+        # (front, back) signature -> number of victims already reported
+        self.sandwiches: Dict[Tuple[str, str], int] = {}
+        self.legs: Set[str] = set()
+        self.backruns: Dict[str, str] = {}
+
+
+class SwapIndex:
+    """Sliding window of recent swaps for cross-transaction MEV detection.
+
+    Swaps are grouped by slot, then by pool (mint pair), then by signer. A
+    sandwich is a signer's trade on a pool and that signer's next trade on
+    it, in the opposite direction, with one or more other signers trading in
+    the first direction in between, all in one slot. A backrun is the first
+    trade of a signer on a pool that immediately follows, and reverses,
+    someone else's trade.
+
+    Roles depend on block order, so only swaps with a position in the block
+    (block ingestion) are indexed; swaps without one are counted as
+    `unordered` and never labeled. Transactions of a block may still arrive
+    in any order, so each new swap is checked as a possible front leg, back
+    leg, victim, backrun target and backrun. Legs are found through the
+    signer's own trades, victims are counted by bisecting the pool's trades
+    in one direction, and a late victim only looks at leg pairs closing
+    after it, so a swap costs O(log n) in the swaps of its pool and slot
+    plus the findings it produces. Memory is bounded by the number of slots
+    kept and a per-slot swap cap.
+    """
+
+    def __init__(self, max_slots: int = 150, max_swaps_per_slot: int = 20_000):
+        self.max_slots = max(1, max_slots)
+        self.max_swaps_per_slot = max_swaps_per_slot
+        self._slots: Dict[int, _SlotSwaps] = {}
+        self._slot_heap: List[int] = []
+        self._newest_slot = 0
+        self._arrivals = 0
+        self.observed = 0
+        self.ignored = 0
+        self.unordered = 0
+        self.sandwiches_found = 0
+        self.backruns_found = 0
+
+    def __len__(self) -> int:
+        return sum(slot.count for slot in self._slots.values())
+
+    def observe(self, signature: str, slot: int, signer: str,
+                input_mint: str, output_mint: str, position: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Add a swap and return findings for every transaction it completes a pattern for.
+
+        Each finding is {"signature", "pattern", "confidence", "explanation"};
+        it may concern an earlier transaction as well as this one. `position`
+        is the index within the block; without it the swap is not indexed.
+        """
+        if not slot or not signer or not input_mint or not output_mint or input_mint == output_mint:
+            return []
+        if position is None:
+            # Arrival order of concurrently fetched transactions says nothing
+            # about who traded first, so there are no roles to assign
+            self.unordered += 1
+            return []
+        if slot < self.window_start():
+            # Older than the window; its neighbours are already gone
+            self.ignored += 1
+            return []
+        if slot > self._newest_slot:
+            self._newest_slot = slot
+            self._evict()
+
+        slot_swaps = self._slots.get(slot)
+        if slot_swaps is None:
+            slot_swaps = self._slots[slot] = _SlotSwaps()
+            heapq.heappush(self._slot_heap, slot)
+        if slot_swaps.count >= self.max_swaps_per_slot:
+            self.ignored += 1
+            return []
+
+        pool: PoolKey = (input_mint, output_mint) if input_mint < output_mint else (output_mint, input_mint)
+        direction = 0 if input_mint == pool[0] else 1
+        self._arrivals += 1
+        swap = Swap(signature, signer, (position, self._arrivals), direction)
+
+        pool_slot = slot_swaps.pools.get(pool)
+        if pool_slot is None:
+            pool_slot = slot_swaps.pools[pool] = _PoolSlot()
+        index = pool_slot.insert(swap)
+        slot_swaps.count += 1
+        self.observed += 1
+
+        findings: List[Dict[str, Any]] = []
+        self._find_sandwiches(slot, pool, slot_swaps, pool_slot, swap, findings)
+        self._find_backruns(slot, pool, slot_swaps, pool_slot, index, findings)
+        return findings
+
+    def window_start(self) -> int:
+        """Oldest slot still indexed; swaps before it can no longer match anything"""
+        return self._newest_slot - self.max_slots + 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "slots": len(self._slots),
+            "swaps": len(self),
+            "observed": self.observed,
+            "ignored": self.ignored,
+            "unordered": self.unordered,
+            "sandwiches": self.sandwiches_found,
+            "backruns": self.backruns_found
+        }
+
+    def _evict(self):
+        cutoff = self._newest_slot - self.max_slots
+        heap = self._slot_heap
+        while heap and heap[0] <= cutoff:
+            del self._slots[heapq.heappop(heap)]
+
+    def _find_sandwiches(self, slot: int, pool: PoolKey, slot_swaps: _SlotSwaps,
+                         pool_slot: _PoolSlot, swap: Swap, findings: List[Dict[str, Any]]):
+        pairs = []
+
+        # The new swap as a front or back leg: the signer's neighbouring trades
+        own = pool_slot.by_signer[swap.signer]
+        at = bisect.bisect_left(own, swap)
+        if at > 0 and own[at - 1].direction != swap.direction:
+            pairs.append((own[at - 1], swap))
+        if at + 1 < len(own) and own[at + 1].direction != swap.direction:
+            pairs.append((swap, own[at + 1]))
+        if 0 < at < len(own) - 1:
+            # Arrived between two of the signer's trades, which are no longer consecutive
+            pool_slot.remove_pair(own[at - 1], own[at + 1])
+        for front, back in pairs:
+            pool_slot.add_pair(front, back)
+
+        # The new swap as a victim of legs that are already indexed: only
+        # pairs closing after it can surround it, and with block-ordered
+        # arrival there are none
+        for front, back in pool_slot.pairs[bisect.bisect(pool_slot.pair_ends, swap):]:
+            if (front < swap and front.direction == swap.direction and front.signer != swap.signer
+                    and (front, back) not in pairs):
+                pairs.append((front, back))
+
+        for front, back in pairs:
+            count, named = pool_slot.victims(front, back)
+            key = (front.signature, back.signature)
+            if not count or count <= slot_swaps.sandwiches.get(key, 0):
+                continue
+            if key not in slot_swaps.sandwiches:
+                self.sandwiches_found += 1
+            slot_swaps.sandwiches[key] = count
+            slot_swaps.legs.update(key)
+
+            pair = "/".join(pool)
+            victim_list = ", ".join(victim.signature[:8] for victim in named)
+            if count > len(named):
+                victim_list += f" (+{count - len(named)} more)"
+            findings.append({
+                "signature": front.signature,
+                "pattern": MEVPattern.SANDWICH,
+                "confidence": 0.95,
+                "explanation": f"Sandwich front-run on {pair} in slot {slot}: "
+                               f"victims {victim_list}, closed by {back.signature[:8]}"
+            })
+            findings.append({
+                "signature": back.signature,
+                "pattern": MEVPattern.SANDWICH,
+                "confidence": 0.95,
+                "explanation": f"Sandwich back-run on {pair} in slot {slot}: "
+                               f"opened by {front.signature[:8]}, victims {victim_list}"
+            })
+
+    def _find_backruns(self, slot: int, pool: PoolKey, slot_swaps: _SlotSwaps,
+                       pool_slot: _PoolSlot, index: int, findings: List[Dict[str, Any]]):
+        swaps = pool_slot.swaps
+        # The new swap may backrun its predecessor, or be backrun by its successor
+        for position in (index, index + 1):
+            if position <= 0 or position >= len(swaps):
+                continue
+            target, backrun = swaps[position - 1], swaps[position]
+            if backrun.signer == target.signer or backrun.direction == target.direction:
+                continue
+            if backrun.signature in slot_swaps.backruns or backrun.signature in slot_swaps.legs:
+                continue
+            # A signer that already traded this pool earlier in the slot is
+            # closing a position (a sandwich back leg), not backrunning
+            if pool_slot.by_signer[backrun.signer][0] is not backrun:
+                continue
+            slot_swaps.backruns[backrun.signature] = target.signature
+            self.backruns_found += 1
+            findings.append({
+                "signature": backrun.signature,
+                "pattern": MEVPattern.BACKRUN,
+                "confidence": 0.85,
+                "explanation": f"Backrun on {'/'.join(pool)} in slot {slot}: "
+                               f"reverses {target.signature[:8]} immediately after it"
+            })
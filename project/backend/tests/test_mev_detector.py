@@ -0,0 +1,59 @@
+"""MEVDetector.analyze_batch must give exactly what analyze_transaction gives.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mev_detector  # noqa: E402
+from benchmarks.synthetic import SyntheticTransactionGenerator  # noqa: E402
+from mev_detector import MEVDetector  # noqa: E402
+from transaction_decoder import TransactionDecoder  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def decoded():
+    decoder = TransactionDecoder()
+    parsed = SyntheticTransactionGenerator(seed=0).generate_many(2000, encoding="jsonParsed")
+    return [decoder.decode_transaction(tx) for tx in parsed]
+
+
+def _scalar(detector, decoded_txs):
+    return [detector.analyze_transaction(tx) for tx in decoded_txs]
+
+
+def test_batch_matches_scalar(decoded):
+    if mev_detector.np is None:
+        pytest.skip("numpy is not installed")
+    detector = MEVDetector()
+    expected = _scalar(detector, decoded)
+    assert any(result["is_mev"] for result in expected)
+
+    def no_fallback(tx):
+        raise AssertionError("analyze_batch fell back to the scalar path")
+    detector.analyze_transaction = no_fallback
+    assert detector.analyze_batch(decoded) == expected
+
+
+def test_batch_matches_scalar_in_small_batches(decoded):
+    detector = MEVDetector()
+    for start in range(0, 200, 7):
+        chunk = decoded[start:start + 7]
+        assert detector.analyze_batch(chunk) == _scalar(detector, chunk)
+
+
+def test_batch_with_unusual_transactions(decoded):
+    detector = MEVDetector()
+    batch = [{}, {"token_transfers": []}] + decoded[:50] + [{"token_transfers": [], "logs": None}]
+    assert detector.analyze_batch(batch) == _scalar(detector, batch)
+    assert detector.analyze_batch([]) == []
+
+
+def test_batch_without_numpy(decoded, monkeypatch):
+    monkeypatch.setattr(mev_detector, "np", None)
+    detector = MEVDetector()
+    assert detector.analyze_batch(decoded[:200]) == _scalar(detector, decoded[:200])
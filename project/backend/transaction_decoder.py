@@ -1,35 +1,18 @@
 import json
+import base64
 import base58
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 
+from registry import DexRegistry, get_registry
+from wire_format import encode_pubkey, parse_transaction
+
 logger = logging.getLogger(__name__)
 
 class TransactionDecoder:
-    def __init__(self):
-        # Known token mints
-        self.token_mints = {
-            "So11111111111111111111111111111111111111112": "SOL",
-            "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": "USDC",
-            "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": "USDT",
-            "mSoLzYCxHdYgdzU16g5QSh3i5K3z3KZK7ytfqcJm7So": "mSOL",
-            "7dHbWXmci3dT8UFYWYZweBLXgycu7Y3iL6trKn1Y7ARj": "stSOL",
-            "DezXAZ8z7PnrnRJjz3wXBoRgixCa6xjnB7YaB1pPB263": "BONK",
-            "5oVNBeEEQvYi1cX3ir8Dx5n1P7pdxydbGF2X4TxVusJm": "INF",
-            "J1toso1uCk3RLmjorhTtrVwY9HJ7X8V9yYac6Y7kGCPn": "jitoSOL"
-        }
-        
-        # Known DEX program IDs
-        self.dex_programs = {
-            "JUP4Fb2cqiRUcaTHdrPC8h2gNsA2ETXiPDD33WcGuJB": "Jupiter V4",
-            "JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4": "Jupiter V6", 
-            "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8": "Raydium AMM",
-            "9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM": "Raydium CPMM",
-            "MERLuDFBMmsHnsBPZw2sDQZHvXFMwp8EdjudcU2HKky": "Meteora",
-            "PhoeNiX7VavoDXL4ZMD4fDbBGEz7dhc8EJQ1J4TjTaE": "Phoenix",
-            "opnb2LAfJYbRMAHHvqjCwQxanZn7ReEHp1k81EohpZb": "Openbook",
-            "TSWAPaqyCSx2KABk68Shruf4rp7CxcNi8hAsbdwmHbN": "Tensor"
-        }
+    def __init__(self, registry: Optional[DexRegistry] = None):
+        # Known DEX programs, log signatures and token mints
+        self.registry = registry or get_registry()
     
     def decode_transaction(self, tx_data: Dict[Any, Any]) -> Optional[Dict[str, Any]]:
         """Decode a Solana transaction and extract trading information"""
@@ -38,26 +21,13 @@ class TransactionDecoder:
                 return None
                 
             transaction = tx_data["transaction"]
-            meta = tx_data.get("meta", {})
-            
-            # Get the signer (wallet)
-            wallet = ""
-            if "message" in transaction and "accountKeys" in transaction["message"]:
-                account_keys = transaction["message"]["accountKeys"]
-                if account_keys:
-                    wallet = account_keys[0]
-                    if isinstance(wallet, dict):
-                        wallet = wallet.get("pubkey", "")
-            
-            # Extract instructions
-            instructions = []
-            if "message" in transaction and "instructions" in transaction["message"]:
-                instructions = transaction["message"]["instructions"]
+            meta = tx_data.get("meta") or {}
             
-            # Extract inner instructions
-            inner_instructions = []
-            if "innerInstructions" in meta:
-                inner_instructions = meta["innerInstructions"]
+            if isinstance(transaction, list):
+                # base64 encoding: ["<data>", "base64"]
+                wallet, instructions, inner_instructions = self._decode_wire_transaction(transaction, meta)
+            else:
+                wallet, instructions, inner_instructions = self._decode_parsed_transaction(transaction, meta)
             
             # Extract logs
             logs = meta.get("logMessages", [])
@@ -93,33 +63,89 @@ class TransactionDecoder:
             logger.error(f"Error decoding transaction: {e}")
             return None
     
+    def _decode_parsed_transaction(self, transaction: Dict, meta: Dict) -> Tuple[str, List, List]:
+        """Signer, instructions and inner instructions from a jsonParsed transaction"""
+        # Get the signer (wallet)
+        wallet = ""
+        if "message" in transaction and "accountKeys" in transaction["message"]:
+            account_keys = transaction["message"]["accountKeys"]
+            if account_keys:
+                wallet = account_keys[0]
+                if isinstance(wallet, dict):
+                    wallet = wallet.get("pubkey", "")
+        
+        # Extract instructions
+        instructions = []
+        if "message" in transaction and "instructions" in transaction["message"]:
+            instructions = transaction["message"]["instructions"]
+        
+        # Extract inner instructions
+        inner_instructions = []
+        if "innerInstructions" in meta:
+            inner_instructions = meta["innerInstructions"]
+        
+        return wallet, instructions, inner_instructions
+    
+    def _decode_wire_transaction(self, transaction: List, meta: Dict) -> Tuple[str, List, List]:
+        """Signer, instructions and inner instructions from a base64 wire-format transaction.
+        
+        Only program ids are base58-encoded, since platform detection is all
+        that reads them: instructions come back in the compiled shape the
+        "json" encoding uses, {"programId", "accounts", "data"} with account
+        indexes, and raw data bytes for top-level instructions (inner ones
+        keep meta's base58 string).
+        """
+        data, encoding = transaction[0], transaction[1] if len(transaction) > 1 else "base64"
+        if encoding != "base64":
+            raise ValueError(f"Unsupported transaction encoding: {encoding}")
+        message = parse_transaction(base64.b64decode(data))
+        
+        # Static keys, then v0 lookup-table addresses (writable first, then readonly)
+        static_keys = message["account_keys"]
+        loaded = meta.get("loadedAddresses") or {}
+        loaded_keys = loaded.get("writable", []) + loaded.get("readonly", [])
+        
+        keys: Dict[int, str] = {}
+        
+        def account_key(index: int) -> str:
+            key = keys.get(index)
+            if key is None:
+                if index < len(static_keys):
+                    key = encode_pubkey(static_keys[index])
+                else:
+                    key = loaded_keys[index - len(static_keys)]
+                keys[index] = key
+            return key
+        
+        wallet = account_key(0) if static_keys else ""
+        
+        instructions = [
+            {"programId": account_key(program_id_index), "accounts": accounts, "data": ix_data}
+            for program_id_index, accounts, ix_data in message["instructions"]
+        ]
+        
+        inner_instructions = []
+        for group in meta.get("innerInstructions") or []:
+            resolved = []
+            for instruction in group.get("instructions", []):
+                resolved_instruction = {
+                    "programId": account_key(instruction["programIdIndex"]),
+                    "accounts": instruction.get("accounts", []),
+                    "data": instruction.get("data", "")
+                }
+                if "stackHeight" in instruction:
+                    resolved_instruction["stackHeight"] = instruction["stackHeight"]
+                resolved.append(resolved_instruction)
+            inner_instructions.append({"index": group.get("index"), "instructions": resolved})
+        
+        return wallet, instructions, inner_instructions
+    
     def _identify_platforms(self, instructions: List, inner_instructions: List, logs: List[str]) -> List[str]:
         """Identify which DEX platforms were used in the transaction"""
-        platforms = set()
-        
-        # Check main instructions
-        for instruction in instructions:
-            program_id = instruction.get("programId", "")
-            if program_id in self.dex_programs:
-                platforms.add(self.dex_programs[program_id])
-        
-        # Check inner instructions
+        program_ids = [instruction.get("programId", "") for instruction in instructions]
         for inner_group in inner_instructions:
-            for instruction in inner_group.get("instructions", []):
-                program_id = instruction.get("programId", "")
-                if program_id in self.dex_programs:
-                    platforms.add(self.dex_programs[program_id])
-        
-        # Check logs for additional platform identification
-        for log in logs:
-            if "jupiter" in log.lower():
-                platforms.add("Jupiter")
-            elif "raydium" in log.lower():
-                platforms.add("Raydium")
-            elif "meteora" in log.lower():
-                platforms.add("Meteora")
-        
-        return list(platforms)
+            program_ids.extend(instruction.get("programId", "") for instruction in inner_group.get("instructions", []))
+        return list(self.registry.identify_platforms(program_ids, logs))
     
     def _extract_token_transfers(self, meta: Dict) -> List[Dict]:
         """Extract token transfer information from transaction meta"""
@@ -150,7 +176,7 @@ class TransactionDecoder:
                 transfer = {
                     "account": account,
                     "mint": mint,
-                    "symbol": self.token_mints.get(mint, mint[:8]),
+                    "symbol": self.registry.token_symbol(mint),
                     "amount_change": post_amount - pre_amount,
                     "pre_amount": pre_amount,
                     "post_amount": post_amount
@@ -0,0 +1,353 @@
+import bisect
+import heapq
+from collections import defaultdict, deque
+from itertools import chain
+from typing import Any, Deque, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+import logging
+
+from aggregates import MEVAggregates
+from compact_records import PATTERNS, TransactionColumns
+from models import MEVTransaction
+
+logger = logging.getLogger(__name__)
+
+
+class TransactionStore:
+    """Fixed-capacity ring buffer of analyzed transactions with secondary indexes.
+
+    Every record gets a monotonically increasing sequence number; its ring slot
+    is `seq % capacity`. Because eviction is strictly oldest-first, each
+    secondary index can be a deque of sequence numbers in insertion order:
+    inserts append on the right and evictions pop from the left. Profit is kept
+    in a sorted list of (profit, seq) pairs for range queries.
+
+    Records are held in compact columns (see TransactionColumns) rather than as
+    models; MEVTransaction objects are only built for what get/query return.
+    """
+
+    def __init__(self, capacity: int = 100_000):
+        self.capacity = max(1, capacity)
+        self.clear()
+
+    def clear(self):
+        """Drop every record, e.g. before reloading the window with extend_rows"""
+        self._columns = TransactionColumns(self.capacity)
+        self._next_seq = 0
+        self._by_signature: Dict[str, int] = {}
+        self._by_pattern: Dict[Optional[str], Deque[int]] = {}
+        self._by_is_mev: Dict[bool, Deque[int]] = {}
+        self._by_wallet: Dict[str, Deque[int]] = {}
+        self._by_platform: Dict[str, Deque[int]] = {}
+        self._by_profit: List[Tuple[float, int]] = []
+        self.aggregates = MEVAggregates()
+
+    def __len__(self) -> int:
+        return len(self._by_signature)
+
+    def __contains__(self, signature: str) -> bool:
+        return signature in self._by_signature
+
+    def __iter__(self) -> Iterator[MEVTransaction]:
+        """Iterate newest first"""
+        return (self._columns.materialize(seq % self.capacity) for seq in self._seqs_newest_first())
+
+    def get(self, signature: str) -> Optional[MEVTransaction]:
+        """Look up a transaction by signature in O(1)"""
+        seq = self._by_signature.get(signature)
+        if seq is None:
+            return None
+        return self._columns.materialize(seq % self.capacity)
+
+    def add(self, tx: MEVTransaction) -> bool:
+        """Insert a transaction, evicting the oldest one when full.
+
+        Returns False if the signature is already stored.
+        """
+        if tx.signature in self._by_signature:
+            return False
+        seq = self._append(tx)
+        bisect.insort(self._by_profit, (tx.profit_usdc, seq))
+        return True
+
+    def extend(self, txs: List[MEVTransaction]):
+        """Bulk-load transactions given oldest first (e.g. rehydrating from disk).
+
+        Equivalent to calling add() for each one, but the profit index is sorted
+        once at the end instead of insorted per record.
+        """
+        added = []
+        for tx in txs[-self.capacity:]:
+            if tx.signature not in self._by_signature:
+                added.append((tx.profit_usdc, self._append(tx)))
+        # Evictions above bisect into the existing (sorted) index, so merge last
+        self._by_profit.extend(added)
+        self._by_profit.sort()
+
+    def extend_rows(self, rows: List[tuple]):
+        """Bulk-load persisted rows (persistent_store.COLUMNS order), oldest first.
+
+        Same result as extend(), but values go straight into the columns
+        without a validated MEVTransaction per record. Loading into an empty
+        store (a warm restart) fills whole columns and builds each index in
+        one pass.
+        """
+        rows = rows[-self.capacity:]
+        if self._next_seq == 0 and len({values[0] for values in rows}) == len(rows):
+            self._fill(rows)
+            return
+        added = []
+        for values in rows:
+            if values[0] not in self._by_signature:
+                seq = self._append_values(values)
+                added.append((self._columns.profits[seq % self.capacity], seq))
+        self._by_profit.extend(added)
+        self._by_profit.sort()
+
+    def _fill(self, rows: List[tuple]):
+        """extend_rows into an empty store: row i gets sequence number i"""
+        columns = self._columns
+        columns.fill(rows)
+        count = len(rows)
+        seqs = range(count)
+        codes = columns.patterns[:count]
+        is_mev = columns.is_mev[:count]
+
+        self._by_signature = dict(zip(columns.signatures[:count], seqs))
+        self._by_pattern = {PATTERNS[code] if code >= 0 else None: deque(group)
+                            for code, group in self._group(codes).items()}
+        self._by_is_mev = {bool(flag): deque(group) for flag, group in self._group(is_mev).items()}
+        strings = columns.strings
+        self._by_wallet = {strings[symbol]: deque(group)
+                           for symbol, group in self._group(columns.wallets[:count]).items()}
+        by_platform: Dict[str, List[List[int]]] = defaultdict(list)
+        for symbol, group in self._group(columns.platforms[:count]).items():
+            for platform in dict.fromkeys(columns.platform_sets[symbol]):
+                by_platform[platform].append(group)
+        # Timsort merges the already ascending groups in linear time, well ahead of heapq.merge
+        self._by_platform = {platform: deque(groups[0] if len(groups) == 1 else sorted(chain.from_iterable(groups)))
+                             for platform, groups in by_platform.items()}
+        # Key sort on the floats is much cheaper than comparing tuples; stability keeps ties in seq order
+        profits = columns.profits
+        by_profit = sorted(seqs, key=profits.__getitem__)
+        self._by_profit = list(zip(map(profits.__getitem__, by_profit), by_profit))
+        self.aggregates.add_all(is_mev, columns.profits, [PATTERNS[code] if code >= 0 else None for code in codes])
+        self._next_seq = count
+
+    @staticmethod
+    def _group(keys: Sequence[Hashable]) -> Dict[Hashable, List[int]]:
+        """Positions of each distinct key, ascending"""
+        groups: Dict[Hashable, List[int]] = {}
+        for position, key in enumerate(keys):
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [position]
+            else:
+                group.append(position)
+        return groups
+
+    def replace(self, tx: MEVTransaction) -> bool:
+        """Swap a stored record for an updated one with the same signature.
+
+        The record keeps its place in the ring. Returns False if the signature
+        is not stored (never seen, or already evicted).
+        """
+        seq = self._by_signature.get(tx.signature)
+        if seq is None:
+            return False
+        row = seq % self.capacity
+        columns = self._columns
+        old_profit = columns.profits[row]
+        old_keys = list(self._row_keys(row))
+        new_keys = list(self._keys(tx.pattern, tx.is_mev, tx.wallet, tx.platforms))
+        old_set = set((id(index), key) for index, key in old_keys)
+        new_set = set((id(index), key) for index, key in new_keys)
+        for index, key in old_keys:
+            if (id(index), key) not in new_set:
+                self._index_remove(index, key, seq)
+        for index, key in new_keys:
+            if (id(index), key) not in old_set:
+                self._index_insert(index, key, seq)
+        if tx.profit_usdc != old_profit:
+            del self._by_profit[bisect.bisect_left(self._by_profit, (old_profit, seq))]
+            bisect.insort(self._by_profit, (tx.profit_usdc, seq))
+
+        self.aggregates.remove(bool(columns.is_mev[row]), old_profit, columns.pattern(row))
+        columns.clear(row)
+        columns.write(row, tx)
+        self.aggregates.add(tx.is_mev, tx.profit_usdc, tx.pattern)
+        return True
+
+    def latest(self, limit: int = 10) -> List[MEVTransaction]:
+        """Most recent transactions, newest first"""
+        return self.query(limit=limit)
+
+    def query(self,
+              limit: int = 50,
+              is_mev: Optional[bool] = None,
+              pattern: Optional[str] = None,
+              min_profit: Optional[float] = None,
+              wallet: Optional[str] = None,
+              platform: Optional[str] = None) -> List[MEVTransaction]:
+        """Filtered lookup, newest first.
+
+        Candidates come from the most selective index available, so the cost is
+        proportional to the size of that index rather than the whole buffer.
+        """
+        if limit <= 0:
+            return []
+        pattern = getattr(pattern, "value", pattern)
+
+        candidates: List[Tuple[int, str, Any]] = []
+        if is_mev is not None:
+            seqs = self._by_is_mev.get(is_mev, ())
+            candidates.append((len(seqs), "deque", seqs))
+        if pattern:
+            seqs = self._by_pattern.get(pattern, ())
+            candidates.append((len(seqs), "deque", seqs))
+        if wallet:
+            seqs = self._by_wallet.get(wallet, ())
+            candidates.append((len(seqs), "deque", seqs))
+        if platform:
+            seqs = self._by_platform.get(platform, ())
+            candidates.append((len(seqs), "deque", seqs))
+        if min_profit is not None:
+            start = bisect.bisect_left(self._by_profit, (min_profit, -1))
+            candidates.append((len(self._by_profit) - start, "profit", start))
+
+        columns = self._columns
+        capacity = self.capacity
+        pattern_code = columns.pattern_code(pattern) if pattern else None
+        wallet_id = columns.strings.lookup(wallet) if wallet else None
+
+        def matches(seq: int) -> bool:
+            row = seq % capacity
+            if is_mev is not None and bool(columns.is_mev[row]) != is_mev:
+                return False
+            if pattern and columns.patterns[row] != pattern_code:
+                return False
+            if min_profit is not None and columns.profits[row] < min_profit:
+                return False
+            if wallet and columns.wallets[row] != wallet_id:
+                return False
+            if platform and platform not in columns.platform_set(row):
+                return False
+            return True
+
+        if not candidates:
+            seqs_iter = self._seqs_newest_first()
+        else:
+            _, kind, source = min(candidates, key=lambda c: c[0])
+            if kind == "deque":
+                seqs_iter = reversed(source)
+            else:
+                # Profit-ordered slice: pick the newest matches by sequence number
+                by_profit = self._by_profit
+                seqs = heapq.nlargest(
+                    limit,
+                    (by_profit[i][1] for i in range(source, len(by_profit)) if matches(by_profit[i][1]))
+                )
+                return [columns.materialize(seq % capacity) for seq in seqs]
+
+        results = []
+        for seq in seqs_iter:
+            if matches(seq):
+                results.append(columns.materialize(seq % capacity))
+                if len(results) >= limit:
+                    break
+        return results
+
+    def _seqs_newest_first(self) -> Iterator[int]:
+        oldest = max(0, self._next_seq - self.capacity)
+        return iter(range(self._next_seq - 1, oldest - 1, -1))
+
+    def _keys(self, pattern: Any, is_mev: bool, wallet: str,
+              platforms: Iterable[str]) -> Iterator[Tuple[Dict[Any, Deque[int]], Hashable]]:
+        # MEVPattern is a str enum, so members hash and compare equal to their values
+        yield self._by_pattern, pattern
+        yield self._by_is_mev, is_mev
+        yield self._by_wallet, wallet
+        for platform in dict.fromkeys(platforms):
+            yield self._by_platform, platform
+
+    def _row_keys(self, row: int) -> Iterator[Tuple[Dict[Any, Deque[int]], Hashable]]:
+        columns = self._columns
+        return self._keys(columns.pattern(row), bool(columns.is_mev[row]), columns.wallet(row), columns.platform_set(row))
+
+    def _append(self, tx: MEVTransaction) -> int:
+        """Place a record in the ring and every index except profit"""
+        seq = self._next_seq
+        row = seq % self.capacity
+        if self._columns.signatures[row] is not None:
+            self._evict(row, seq - self.capacity)
+
+        self._columns.write(row, tx)
+        self._next_seq += 1
+        self._by_signature[tx.signature] = seq
+        for index, key in self._keys(tx.pattern, tx.is_mev, tx.wallet, tx.platforms):
+            self._index_append(index, key, seq)
+        self.aggregates.add(tx.is_mev, tx.profit_usdc, tx.pattern)
+        return seq
+
+    def _append_values(self, values: tuple) -> int:
+        """_append for a persisted row"""
+        seq = self._next_seq
+        row = seq % self.capacity
+        columns = self._columns
+        if columns.signatures[row] is not None:
+            self._evict(row, seq - self.capacity)
+
+        columns.write_values(row, values)
+        self._next_seq += 1
+        self._by_signature[values[0]] = seq
+        pattern = columns.pattern(row)
+        is_mev = bool(columns.is_mev[row])
+        for index, key in self._keys(pattern, is_mev, values[3], columns.platform_set(row)):
+            self._index_append(index, key, seq)
+        self.aggregates.add(is_mev, columns.profits[row], pattern)
+        return seq
+
+    @staticmethod
+    def _index_append(index: Dict[Any, Deque[int]], key: Hashable, seq: int):
+        # A repeated seq means a duplicate platform on the same record; index it once
+        seqs = index.get(key)
+        if seqs is None:
+            index[key] = deque((seq,))
+        elif seqs[-1] != seq:
+            seqs.append(seq)
+
+    @staticmethod
+    def _index_remove(index: Dict[Any, Deque[int]], key: Hashable, seq: int):
+        # Replaced records are almost always recent, so search from the right
+        seqs = index[key]
+        for offset in range(len(seqs) - 1, -1, -1):
+            if seqs[offset] == seq:
+                del seqs[offset]
+                break
+        if not seqs:
+            del index[key]
+
+    @staticmethod
+    def _index_insert(index: Dict[Any, Deque[int]], key: Hashable, seq: int):
+        # Keep the deque in sequence order so eviction can still popleft
+        seqs = index.get(key)
+        if seqs is None:
+            index[key] = deque((seq,))
+            return
+        offset = len(seqs)
+        while offset > 0 and seqs[offset - 1] > seq:
+            offset -= 1
+        seqs.insert(offset, seq)
+
+    def _evict(self, row: int, seq: int):
+        columns = self._columns
+        del self._by_signature[columns.signatures[row]]
+        for index, key in self._row_keys(row):
+            seqs = index[key]
+            seqs.popleft()
+            if not seqs:
+                del index[key]
+        profit = columns.profits[row]
+        pos = bisect.bisect_left(self._by_profit, (profit, seq))
+        del self._by_profit[pos]
+        self.aggregates.remove(bool(columns.is_mev[row]), profit, columns.pattern(row))
+        columns.clear(row)
@@ -0,0 +1,215 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+# Solana transaction wire format:
+#   compact-u16 signature count, 64-byte signatures, then the message.
+# Message:
+#   [0x80 | version]            only for versioned (v0) messages
+#   3-byte header               required sigs, readonly signed, readonly unsigned
+#   compact-u16 + 32-byte keys  static account keys
+#   32-byte recent blockhash
+#   compact-u16 instructions    each: u8 program id index,
+#                                     compact-u16 + u8 account indexes,
+#                                     compact-u16 + data bytes
+#   compact-u16 lookups         v0 only; each: 32-byte table key,
+#                                     compact-u16 + u8 writable indexes,
+#                                     compact-u16 + u8 readonly indexes
+
+SIGNATURE_LENGTH = 64
+PUBKEY_LENGTH = 32
+VERSION_PREFIX_MASK = 0x80
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+# Every two-digit base58 string, indexed by value (0..58**2-1), and the largest
+# power of 58 that still divides cheaply: ten digits per bignum divmod.
+_BASE58_PAIRS = [a + b for a in BASE58_ALPHABET for b in BASE58_ALPHABET]
+_BASE58_CHUNK = 58 ** 10
+
+# Base58 encoding of 32-byte keys is the slowest part of decoding, and the same
+# program and pool accounts show up in most transactions, so memoize it.
+_KEY_CACHE: Dict[bytes, str] = {}
+_KEY_CACHE_LIMIT = 100_000
+
+
+class WireFormatError(ValueError):
+    """Raised when a serialized transaction is truncated or malformed"""
+
+
+def b58encode(data: bytes) -> str:
+    """Bitcoin-alphabet base58, about twice as fast as the base58 package.
+
+    Peels ten digits per bignum divmod and turns them into characters two at a
+    time through a lookup table.
+    """
+    pairs = _BASE58_PAIRS
+    n = int.from_bytes(data, "big")
+    parts = []
+    while n:
+        n, rem = divmod(n, _BASE58_CHUNK)
+        rem, d5 = divmod(rem, 3364)
+        rem, d4 = divmod(rem, 3364)
+        rem, d3 = divmod(rem, 3364)
+        d1, d2 = divmod(rem, 3364)
+        parts.append(pairs[d1] + pairs[d2] + pairs[d3] + pairs[d4] + pairs[d5])
+    encoded = "".join(reversed(parts)).lstrip("1")
+    # Leading zero bytes are written as leading "1"s
+    leading_zeros = len(data) - len(data.lstrip(b"\0"))
+    return "1" * leading_zeros + encoded
+
+
+def encode_pubkey(key: bytes) -> str:
+    """Base58 string for a raw 32-byte key, memoized"""
+    encoded = _KEY_CACHE.get(key)
+    if encoded is None:
+        if len(_KEY_CACHE) >= _KEY_CACHE_LIMIT:
+            _KEY_CACHE.clear()
+        encoded = b58encode(key)
+        _KEY_CACHE[key] = encoded
+    return encoded
+
+
+def read_compact_u16(buf: bytes, offset: int) -> Tuple[int, int]:
+    """Decode a compact-u16 (1-3 byte little-endian base-128 varint).
+
+    Returns (value, new_offset).
+    """
+    value = 0
+    for shift in (0, 7, 14):
+        if offset >= len(buf):
+            raise WireFormatError("Truncated compact-u16")
+        byte = buf[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+    raise WireFormatError("compact-u16 longer than 3 bytes")
+
+
+def encode_compact_u16(value: int) -> bytes:
+    """Inverse of read_compact_u16"""
+    if not 0 <= value <= 0xFFFF:
+        raise WireFormatError(f"compact-u16 out of range: {value}")
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _take(buf: bytes, offset: int, length: int) -> Tuple[bytes, int]:
+    end = offset + length
+    if end > len(buf):
+        raise WireFormatError("Unexpected end of transaction")
+    return buf[offset:end], end
+
+
+def _take_many(buf: bytes, offset: int, count: int, length: int) -> Tuple[List[bytes], int]:
+    """`count` consecutive `length`-byte fields, bounds-checked once"""
+    end = offset + count * length
+    if end > len(buf):
+        raise WireFormatError("Unexpected end of transaction")
+    return [buf[start:start + length] for start in range(offset, end, length)], end
+
+
+def _read_u8_array(buf: bytes, offset: int) -> Tuple[List[int], int]:
+    count, offset = read_compact_u16(buf, offset)
+    data, offset = _take(buf, offset, count)
+    return list(data), offset
+
+
+def parse_transaction(raw: bytes) -> Dict[str, Any]:
+    """Parse a serialized legacy or v0 transaction.
+
+    Keys, blockhash and signatures are returned as raw bytes; instructions are
+    (program_id_index, account_indexes, data) tuples.
+    """
+    offset = 0
+    sig_count, offset = read_compact_u16(raw, offset)
+    signatures, offset = _take_many(raw, offset, sig_count, SIGNATURE_LENGTH)
+
+    if offset >= len(raw):
+        raise WireFormatError("Missing message")
+    version: Optional[int] = None
+    if raw[offset] & VERSION_PREFIX_MASK:
+        version = raw[offset] & ~VERSION_PREFIX_MASK & 0xFF
+        offset += 1
+        if version != 0:
+            raise WireFormatError(f"Unsupported message version {version}")
+
+    header, offset = _take(raw, offset, 3)
+
+    key_count, offset = read_compact_u16(raw, offset)
+    account_keys, offset = _take_many(raw, offset, key_count, PUBKEY_LENGTH)
+
+    recent_blockhash, offset = _take(raw, offset, PUBKEY_LENGTH)
+
+    instruction_count, offset = read_compact_u16(raw, offset)
+    instructions = []
+    for _ in range(instruction_count):
+        if offset >= len(raw):
+            raise WireFormatError("Truncated instruction")
+        program_id_index = raw[offset]
+        offset += 1
+        accounts, offset = _read_u8_array(raw, offset)
+        data_length, offset = read_compact_u16(raw, offset)
+        data, offset = _take(raw, offset, data_length)
+        instructions.append((program_id_index, accounts, data))
+
+    address_table_lookups = []
+    if version is not None:
+        lookup_count, offset = read_compact_u16(raw, offset)
+        for _ in range(lookup_count):
+            table_key, offset = _take(raw, offset, PUBKEY_LENGTH)
+            writable, offset = _read_u8_array(raw, offset)
+            readonly, offset = _read_u8_array(raw, offset)
+            address_table_lookups.append((table_key, writable, readonly))
+
+    return {
+        "signatures": signatures,
+        "version": version,
+        "header": tuple(header),
+        "account_keys": account_keys,
+        "recent_blockhash": recent_blockhash,
+        "instructions": instructions,
+        "address_table_lookups": address_table_lookups
+    }
+
+
+def serialize_transaction(signatures: List[bytes],
+                          header: Tuple[int, int, int],
+                          account_keys: List[bytes],
+                          recent_blockhash: bytes,
+                          instructions: List[Tuple[int, List[int], bytes]],
+                          address_table_lookups: Optional[List[Tuple[bytes, List[int], List[int]]]] = None,
+                          version: Optional[int] = None) -> bytes:
+    """Build a serialized transaction (inverse of parse_transaction)"""
+    out = bytearray(encode_compact_u16(len(signatures)))
+    for signature in signatures:
+        out += signature
+    if version is not None:
+        out.append(VERSION_PREFIX_MASK | version)
+    out += bytes(header)
+    out += encode_compact_u16(len(account_keys))
+    for key in account_keys:
+        out += key
+    out += recent_blockhash
+    out += encode_compact_u16(len(instructions))
+    for program_id_index, accounts, data in instructions:
+        out.append(program_id_index)
+        out += encode_compact_u16(len(accounts))
+        out += bytes(accounts)
+        out += encode_compact_u16(len(data))
+        out += data
+    if version is not None:
+        lookups = address_table_lookups or []
+        out += encode_compact_u16(len(lookups))
+        for table_key, writable, readonly in lookups:
+            out += table_key
+            out += encode_compact_u16(len(writable))
+            out += bytes(writable)
+            out += encode_compact_u16(len(readonly))
+            out += bytes(readonly)
+    return bytes(out)